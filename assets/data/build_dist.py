@@ -0,0 +1,234 @@
+"""
+Build Dist - minified, precompressed copies of the databases for the static site
+Mirrors every *.json under assets/data (databases and maps/) into
+assets/dist/data with the same relative paths, except the build bookkeeping
+the mapping pipeline keeps next to the maps (define-index.json and the
+per-config *-manifest.json files):
+
+    printer-profiles.json        minified (no indentation, no spaces)
+    printer-profiles.json.gz     gzip -9
+    printer-profiles.json.br     brotli -q 11 (only if the brotli package is installed)
+
+and writes manifest.json next to them, with the SHA-256 of every minified
+file for cache-busting (fetch(`${path}?v=${manifest.files[path].hash}`)).
+Serve assets/dist/data in place of assets/data. The fetch paths stay the same.
+Hosts that support precompressed files (nginx gzip_static/brotli_static,
+Caddy precompressed, ...) then send the .gz/.br directly.
+
+The manifest also records each source file's size, mtime and SHA-256.
+Unchanged sources are skipped (stat fast path, SHA-256 fallback), and the
+outputs of deleted sources are removed. Source files are never modified.
+
+Usage:
+    python build_dist.py                 # incremental build
+    python build_dist.py --force         # rebuild everything
+    python build_dist.py --out public/assets/data
+"""
+
+import os
+import sys
+import gzip
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+from database_validator import DATA_DIR
+
+DIST_DIR = DATA_DIR.parent / 'dist' / 'data'
+MANIFEST_NAME = 'manifest.json'
+
+# Pipeline bookkeeping under maps/, not data for the site
+BOOKKEEPING_PATTERNS = ('define-index.json', '*-manifest.json')
+
+# Bump when the output format changes (forces a full rebuild)
+BUILD_VERSION = 1
+
+
+def source_files(data_dir: Path = DATA_DIR, out_dir: Optional[Path] = None) -> List[Path]:
+    """
+    Every *.json under data_dir, skipping dotfiles (.validation-cache.json),
+    bookkeeping (BOOKKEEPING_PATTERNS) and out_dir
+    """
+    out_dir = out_dir.resolve() if out_dir else None
+    return sorted((path for path in data_dir.rglob('*.json')
+                   if not any(part.startswith('.') for part in path.relative_to(data_dir).parts)
+                   and not any(path.match(pattern) for pattern in BOOKKEEPING_PATTERNS)
+                   and (out_dir is None or out_dir not in path.resolve().parents)),
+                  key=lambda path: path.relative_to(data_dir).as_posix().lower())
+
+
+def write_bytes_atomic(target: Path, data: bytes):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        temp_file.write_bytes(data)
+        temp_file.replace(target)
+    finally:
+        temp_file.unlink(missing_ok=True)
+
+
+def build_file(source: Path, target: Path, use_brotli: bool) -> Dict[str, Any]:
+    """Minify + compress one file (pool worker); returns its manifest entry"""
+    raw = source.read_bytes()
+    stat = source.stat()
+    entry = {
+        'sourceSha256': hashlib.sha256(raw).hexdigest(),
+        'sourceMtimeNs': stat.st_mtime_ns,
+        'sourceBytes': len(raw),
+    }
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        entry['error'] = f"invalid JSON: {e}"
+        return entry
+
+    minified = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    write_bytes_atomic(target, minified)
+    compressed = gzip.compress(minified, compresslevel=9, mtime=0)
+    write_bytes_atomic(target.with_name(target.name + '.gz'), compressed)
+    entry.update(sha256=hashlib.sha256(minified).hexdigest(), bytes=len(minified), gzipBytes=len(compressed),
+                 brotliBytes=None)
+    entry['hash'] = entry['sha256'][:12]
+    if use_brotli:
+        compressed = brotli.compress(minified, quality=11)
+        write_bytes_atomic(target.with_name(target.name + '.br'), compressed)
+        entry['brotliBytes'] = len(compressed)
+    else:
+        target.with_name(target.name + '.br').unlink(missing_ok=True)  # left by an earlier build
+    return entry
+
+
+def output_paths(target: Path) -> List[Path]:
+    return [target, target.with_name(target.name + '.gz'), target.with_name(target.name + '.br')]
+
+
+def load_manifest(out_dir: Path) -> Dict[str, Any]:
+    """The previous build's manifest ({} if there is none)"""
+    try:
+        with open(out_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_current(source: Path, target: Path, entry: Optional[Dict[str, Any]], use_brotli: bool) -> bool:
+    """True if the previous build of source is still valid (outputs present, source unchanged)"""
+    if not entry or 'error' in entry:
+        return False
+    needed = output_paths(target) if use_brotli else output_paths(target)[:2]
+    if not all(path.exists() for path in needed):
+        return False
+    stat = source.stat()
+    if entry['sourceMtimeNs'] == stat.st_mtime_ns and entry['sourceBytes'] == stat.st_size:
+        return True
+    if hashlib.sha256(source.read_bytes()).hexdigest() == entry['sourceSha256']:
+        entry['sourceMtimeNs'] = stat.st_mtime_ns  # touched, not changed
+        return True
+    return False
+
+
+def format_size(size: float) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def build(data_dir: Path = DATA_DIR, out_dir: Path = DIST_DIR, jobs: int = 0, force: bool = False,
+          use_brotli: bool = True) -> int:
+    """Incremental build of out_dir; returns the number of files that failed"""
+    use_brotli = use_brotli and brotli is not None
+    manifest = load_manifest(out_dir)
+    previous = manifest.get('files', {})
+    # Reuse the previous outputs only if they were built the same way
+    reusable = {} if force or manifest.get('buildVersion') != BUILD_VERSION \
+        or manifest.get('brotli') != use_brotli else previous
+    sources = source_files(data_dir, out_dir)
+    names = [path.relative_to(data_dir).as_posix() for path in sources]
+
+    files: Dict[str, Dict[str, Any]] = {}
+    stale = []
+    for name, source in zip(names, sources):
+        entry = reusable.get(name)
+        if is_current(source, out_dir / name, entry, use_brotli):
+            files[name] = entry
+        else:
+            stale.append(name)
+
+    workers = min(jobs if jobs > 0 else (os.cpu_count() or 1), len(stale))
+    args = ([data_dir / name for name in stale], [out_dir / name for name in stale], [use_brotli] * len(stale))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(build_file, *args))
+    else:
+        fresh = list(map(build_file, *args))
+
+    failed = 0
+    for name, entry in zip(stale, fresh):
+        files[name] = entry
+        if 'error' in entry:
+            failed += 1
+            print(f"❌ {name}: {entry['error']}")
+        else:
+            print(f"✅ {name}: {format_size(entry['sourceBytes'])} → {format_size(entry['bytes'])} "
+                  f"(gz {format_size(entry['gzipBytes'])}"
+                  + (f", br {format_size(entry['brotliBytes'])}" if entry['brotliBytes'] else '') + ")")
+
+    removed = [name for name in previous if name not in files]
+    for name in removed:
+        for path in output_paths(out_dir / name):
+            path.unlink(missing_ok=True)
+        print(f"🗑️  {name}: source removed")
+
+    manifest = {
+        'buildVersion': BUILD_VERSION,
+        'brotli': use_brotli,
+        'files': {name: files[name] for name in names},
+    }
+    write_bytes_atomic(out_dir / MANIFEST_NAME,
+                       json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8'))
+
+    built = [entry for entry in files.values() if 'error' not in entry]
+    print("\n" + "=" * 60)
+    print(f"Files:        {len(names)} ({len(stale) - failed} built, {len(names) - len(stale)} unchanged"
+          f"{f', {len(removed)} removed' if removed else ''}{f', {failed} failed' if failed else ''})")
+    print(f"Source:       {format_size(sum(entry['sourceBytes'] for entry in built))}")
+    print(f"Minified:     {format_size(sum(entry['bytes'] for entry in built))}")
+    print(f"gzip:         {format_size(sum(entry['gzipBytes'] for entry in built))}")
+    if use_brotli:
+        print(f"brotli:       {format_size(sum(entry['brotliBytes'] for entry in built))}")
+    print("=" * 60)
+    if brotli is None:
+        print("➖ brotli not installed - .br files skipped (pip install brotli)")
+    print(f"📄 Manifest: {out_dir / MANIFEST_NAME}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build minified + precompressed copies of the databases')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR,
+                        help='Source directory (default: this script\'s folder)')
+    parser.add_argument('--out', type=Path, default=DIST_DIR, help=f'Output directory (default: {DIST_DIR})')
+    parser.add_argument('-j', '--jobs', type=int, default=0, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Rebuild every file, even unchanged ones')
+    parser.add_argument('--no-brotli', action='store_true', help='Skip the .br files')
+    args = parser.parse_args()
+
+    if args.out.resolve() == args.data_dir.resolve():
+        print("❌ --out must not be the source directory")
+        return 1
+    failed = build(args.data_dir, args.out, args.jobs, args.force, not args.no_brotli)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""
+Database Schemas - structure of the assets/data JSON databases
+One DatabaseSchema per file: the top-level keys it must have and, for each
+record collection (e.g. printer-profiles.json "printers"), the typed fields
+of a record, which field is the record ID and which fields reference IDs in
+another collection.
+
+Only the fields listed are checked; records may carry extra keys. Records
+whose keys all start with "_" ({"_section": "=== CREALITY ==="}) are
+separators and are skipped.
+
+Used by database_validator.py (validate_all.py / validate_single.py) and
+entity_index.py.
+"""
+
+from typing import Dict, NamedTuple, Optional, Tuple
+
+NUMBER = (int, float)
+TEXT = (str,)
+FLAG = (bool,)
+LIST = (list,)
+OBJECT = (dict,)
+NULL = (type(None),)
+
+
+class Field(NamedTuple):
+    types: Tuple[type, ...]
+    required: bool = True
+    items: Optional[Tuple[type, ...]] = None  # element types of a list field
+    ref: Optional[str] = None                 # "file.json#collection" the value(s) must exist in
+
+
+def req(*types, items=None, ref=None) -> Field:
+    return Field(sum(types, ()), True, items, ref)
+
+
+def opt(*types, items=None, ref=None) -> Field:
+    return Field(sum(types, ()), False, items, ref)
+
+
+class Collection(NamedTuple):
+    key: str                                  # top-level key holding the record list
+    fields: Dict[str, Field]
+    id_key: Optional[str] = 'id'              # unique within the collection
+
+
+class DatabaseSchema(NamedTuple):
+    collections: Tuple[Collection, ...] = ()
+    required_keys: Tuple[str, ...] = ()       # other top-level keys that must be present
+
+
+BOARDS = 'marlin-boards-V2.json#boards'
+THERMISTORS = 'thermistors-V2.json#thermistors'
+HOTENDS = 'Hotends.json#hotends'
+DISPLAYS = 'displays.json#displays'
+PROBES = 'bed-probes.json#probes'
+
+PRINTER_FIELDS = {
+    'id': req(TEXT),
+    'name': req(TEXT),
+    'manufacturer': req(TEXT),
+    'variants': req(LIST, items=TEXT),
+    'kinematics': req(TEXT),
+    'bedSize': req(OBJECT),
+    'stockBoard': req(TEXT, ref=BOARDS),
+    'stockDisplay': req(TEXT, NULL, ref=DISPLAYS),
+    'stockHotend': req(TEXT, NULL, ref=HOTENDS),
+    'stockProbe': req(TEXT, NULL, ref=PROBES),
+    'bedType': req(TEXT),
+    'extruderType': req(TEXT, NULL),
+    'notes': req(TEXT),
+}
+
+BOARD_FIELDS = {
+    'id': req(TEXT),
+    'name': req(TEXT),
+    'manufacturer': req(TEXT),
+    'mcu': req(TEXT),
+    'voltage': req(NUMBER),
+    'commonOn': req(LIST, items=TEXT),
+    'serialPorts': req(NUMBER),
+    'supportsTMC': req(FLAG),
+    'supportsWiFi': req(FLAG),
+    'flashSize': req(TEXT),
+    'notes': req(TEXT),
+}
+
+# Resin printers use vendor boards/screens that are not in the Marlin databases
+RESIN_PRINTER_FIELDS = {
+    **PRINTER_FIELDS,
+    'stockBoard': req(TEXT),
+    'stockDisplay': req(TEXT, NULL),
+    'stockHotend': req(NULL),
+    'stockProbe': req(NULL),
+    'extruderType': req(NULL),
+}
+
+SCHEMAS: Dict[str, DatabaseSchema] = {
+    'printer-profiles.json': DatabaseSchema(
+        (Collection('printers', PRINTER_FIELDS),), ('_metadata',)),
+    'Resin-printer-profiles.json': DatabaseSchema(
+        (Collection('printers', RESIN_PRINTER_FIELDS),), ('_metadata',)),
+    'marlin-boards-V2.json': DatabaseSchema(
+        (Collection('boards', {**BOARD_FIELDS, 'driverSlots': req(NUMBER)}),)),
+    'marlin-boards.json': DatabaseSchema(
+        (Collection('boards', BOARD_FIELDS),)),
+    'thermistors-V2.json': DatabaseSchema((Collection('thermistors', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'type': req(TEXT),
+        'category': req(TEXT),
+        'maxTemp': req(NUMBER, TEXT),
+        'marlinDefine': req(TEXT),
+        'stockOnBoards': req(LIST, items=TEXT, ref=BOARDS),
+        'stockOnPrinters': req(LIST, items=TEXT),
+        'stockOnHotends': req(LIST, items=TEXT, ref=HOTENDS),
+        'notes': req(TEXT),
+    }),)),
+    'stepper-drivers-V2.json': DatabaseSchema((Collection('drivers', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'manufacturer': req(TEXT),
+        'type': req(TEXT),
+        'category': req(TEXT),
+        'microstepping': req(LIST, items=NUMBER),
+        'maxMicrostepping': req(NUMBER),
+        'stealthChop': req(FLAG),
+        'spreadCycle': req(FLAG),
+        'stallGuard': req(FLAG),
+        'sensorlessHoming': req(FLAG),
+        'marlinDefine': req(TEXT),
+        'stockOnBoards': req(LIST, items=TEXT, ref=BOARDS),
+        'stockOnPrinters': req(LIST, items=TEXT),
+        'notes': req(TEXT),
+    }),)),
+    'Hotends.json': DatabaseSchema((Collection('hotends', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'manufacturer': req(TEXT),
+        'type': req(TEXT),
+        'maxTemp': req(NUMBER),
+        'nozzleDiameter': req(LIST, items=NUMBER),
+        'nozzleType': req(TEXT),
+        'filamentDiameter': req(NUMBER),
+        'thermistor': req(TEXT, ref=THERMISTORS),
+        'extruder': req(OBJECT),
+        'notes': req(TEXT),
+    }),)),
+    'Nozzle.json': DatabaseSchema((Collection('nozzles', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'type': req(TEXT),
+        'material': req(TEXT),
+        'diameterOptions': req(LIST, items=NUMBER),
+        'threadLength': req(NUMBER, NULL),
+        'maxTemp': req(NUMBER),
+        'abrasiveResistant': req(FLAG),
+        'highFlow': req(FLAG),
+        'compatibleHotends': req(LIST, items=TEXT, ref=HOTENDS),
+        'stockOnPrinters': req(LIST, items=TEXT),
+        'notes': req(TEXT),
+    }),), ('nozzleTypes', 'nozzleMaterials')),
+    'Extruders-V2.json': DatabaseSchema((Collection('extruders', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'manufacturer': req(TEXT),
+        'type': req(TEXT),
+        'gearType': req(TEXT),
+        'defaultESteps': req(NUMBER, NULL),
+        'eStepsRange': req(LIST, NULL, items=NUMBER),
+        'driveGearDiameter': req(NUMBER, NULL),
+        'compatiblePrinters': req(LIST, items=TEXT),
+        'notes': req(TEXT),
+    }),), ('extruderTypes', 'gearTypes')),
+    'Extruders.json': DatabaseSchema((Collection('extruders', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'type': req(TEXT),
+        'defaultESteps': req(NUMBER),
+        'eStepsRange': req(LIST, items=NUMBER),
+        'notes': req(TEXT),
+    }),)),
+    'extruder-types.json': DatabaseSchema((Collection('extruders', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'type': req(TEXT),
+        'geared': req(FLAG),
+        'motor': req(OBJECT),
+        'notes': req(TEXT),
+    }),), ('extruderTypes',)),
+    'bed-probes.json': DatabaseSchema((Collection('probes', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'type': req(TEXT),
+        'notes': req(TEXT),
+    }),)),
+    'displays.json': DatabaseSchema((Collection('displays', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'type': req(TEXT),
+        'encoder': req(FLAG),
+        'sdCard': req(FLAG),
+        'touchScreen': req(FLAG),
+        'commonOn': req(LIST, items=TEXT),
+        'notes': req(TEXT),
+    }),)),
+    'build-surfaces.json': DatabaseSchema((Collection('surfaces', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'type': req(TEXT),
+        'maxTemp': req(NUMBER),
+        'zOffsetAdjustment': req(NUMBER),
+        'stockOnPrinters': req(LIST, items=TEXT),
+        'notes': req(TEXT),
+    }),)),
+    'heaters.json': DatabaseSchema((
+        Collection('hotendHeaters', {
+            'id': req(TEXT),
+            'name': req(TEXT),
+            'wattage': req(NUMBER),
+            'voltage': req(NUMBER),
+            'maxTemp': req(NUMBER),
+            'stockOnPrinters': req(LIST, items=TEXT),
+            'stockOnHotends': req(LIST, items=TEXT, ref=HOTENDS),
+            'notes': req(TEXT),
+        }),
+        Collection('bedHeaters', {
+            'id': req(TEXT),
+            'name': req(TEXT),
+            'wattage': req(NUMBER),
+            'voltage': req(NUMBER, TEXT),
+            'maxTemp': req(NUMBER),
+            'stockOnPrinters': req(LIST, items=TEXT),
+            'notes': req(TEXT),
+        }),
+    )),
+    'filaments.json': DatabaseSchema((Collection('materials', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'category': req(TEXT),
+        'hotendTemp': req(OBJECT),
+        'bedTemp': req(OBJECT),
+        'requiresEnclosure': req(FLAG),
+        'requiresAllMetal': req(FLAG),
+        'notes': req(TEXT),
+    }),)),
+    'fans.json': DatabaseSchema((Collection('fanTypes', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'voltage': req(NUMBER, LIST),
+        'commonUse': req(LIST, items=TEXT),
+        'stockOnPrinters': opt(LIST, items=TEXT),
+        'notes': req(TEXT),
+    }),)),
+    'endstops.json': DatabaseSchema((Collection('endstopTypes', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'type': req(TEXT),
+        'marlinConfig': req(OBJECT),
+        'stockOnPrinters': req(LIST, items=TEXT),
+        'notes': req(TEXT),
+    }),)),
+    'motors-steppers.json': DatabaseSchema((Collection('stepperMotors', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'stepAngle': req(NUMBER),
+        'stepsPerRevolution': req(NUMBER),
+        'ratedCurrent': req(NUMBER),
+        'commonOn': req(LIST, items=TEXT),
+        'notes': req(TEXT),
+    }),)),
+    'kinematics.json': DatabaseSchema((
+        Collection('kinematicTypes', {
+            'id': req(TEXT),
+            'name': req(TEXT),
+            'description': req(TEXT),
+            'marlinDefine': req(TEXT),
+        }),
+        Collection('zAxisConfigurations', {
+            'id': req(TEXT),
+            'name': req(TEXT),
+            'description': req(TEXT),
+            'marlinDefine': req(TEXT),
+            'numMotors': req(NUMBER),
+            'popularPrinters': req(LIST, items=TEXT),
+        }),
+    )),
+    'leveling-types.json': DatabaseSchema((Collection('levelingTypes', {
+        'id': req(TEXT),
+        'name': req(TEXT),
+        'description': req(TEXT),
+        'probeRequired': req(FLAG),
+        'marlinDefines': req(LIST, items=TEXT),
+        'flashCost': req(NUMBER),
+        'ramCost': req(NUMBER),
+    }),)),
+}
+
+
+# Entity type name (entity_index.py get()) -> "file.json#collection"
+ENTITY_TYPES: Dict[str, str] = {
+    'printer': 'printer-profiles.json#printers',
+    'resin-printer': 'Resin-printer-profiles.json#printers',
+    'board': BOARDS,
+    'board-v1': 'marlin-boards.json#boards',
+    'thermistor': THERMISTORS,
+    'driver': 'stepper-drivers-V2.json#drivers',
+    'hotend': HOTENDS,
+    'nozzle': 'Nozzle.json#nozzles',
+    'extruder': 'Extruders-V2.json#extruders',
+    'extruder-v1': 'Extruders.json#extruders',
+    'extruder-type': 'extruder-types.json#extruders',
+    'probe': PROBES,
+    'display': DISPLAYS,
+    'surface': 'build-surfaces.json#surfaces',
+    'hotend-heater': 'heaters.json#hotendHeaters',
+    'bed-heater': 'heaters.json#bedHeaters',
+    'filament': 'filaments.json#materials',
+    'fan': 'fans.json#fanTypes',
+    'endstop': 'endstops.json#endstopTypes',
+    'motor': 'motors-steppers.json#stepperMotors',
+    'kinematics': 'kinematics.json#kinematicTypes',
+    'z-axis': 'kinematics.json#zAxisConfigurations',
+    'leveling': 'leveling-types.json#levelingTypes',
+}
+
+
+def schema_for(file_name: str) -> Optional[DatabaseSchema]:
+    return SCHEMAS.get(file_name)
+
+
+def split_ref(ref: str) -> Tuple[str, str]:
+    """'marlin-boards-V2.json#boards' -> ('marlin-boards-V2.json', 'boards')"""
+    file_name, _, collection = ref.partition('#')
+    return file_name, collection
@@ -0,0 +1,312 @@
+"""
+Database Validator - schema, ID and cross-reference checks for assets/data
+Validates every *.json database in two phases:
+
+1. Per file (in a worker pool): parse the JSON, check it against its schema
+   in database_schemas.py (required keys, field types, unique record IDs)
+   and collect its record IDs and outgoing references.
+2. Across files: resolve every reference (printer stockBoard ->
+   marlin-boards-V2.json boards[].id, thermistor stockOnBoards, ...) against
+   the collected IDs.
+
+Phase 1 results are cached in .validation-cache.json by file content
+(mtime/size fast path, SHA-256 fallback) and by the schema module's hash, so
+only changed files are re-parsed. Phase 2 is a set lookup per reference and
+always runs, so an edited target file is picked up by its referrers.
+
+Files without a schema only get the parse and non-empty checks.
+
+Used by validate_all.py and validate_single.py.
+"""
+
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from database_schemas import Collection, DatabaseSchema, schema_for, split_ref
+
+DATA_DIR = Path(__file__).resolve().parent
+CACHE_FILE_NAME = '.validation-cache.json'
+
+# Bump when the checks below change (the schema module is hashed separately)
+CACHE_VERSION = 1
+
+ERROR = 'error'
+WARNING = 'warning'
+
+
+def schema_module_sha256() -> str:
+    return hashlib.sha256((DATA_DIR / 'database_schemas.py').read_bytes()).hexdigest()
+
+
+def describe(data: Any) -> str:
+    """'12 keys' / '40 items' summary of a parsed document"""
+    if isinstance(data, dict):
+        return f"{len(data)} keys"
+    if isinstance(data, list):
+        return f"{len(data)} items"
+    return ''
+
+
+def type_names(types) -> str:
+    return '/'.join('null' if t is type(None) else t.__name__ for t in types)
+
+
+def matches(value: Any, types) -> bool:
+    # bool is an int subclass - true/false is not a number
+    if isinstance(value, bool) and bool not in types:
+        return False
+    return isinstance(value, types)
+
+
+def is_separator(record: Any) -> bool:
+    """{"_section": ...} / {"_comment": ...} entries between records"""
+    return isinstance(record, dict) and all(key.startswith('_') for key in record)
+
+
+def check_collection(collection: Collection, records: Any, result: Dict[str, Any]):
+    """Type/required/uniqueness checks of one record list; fills ids and refs"""
+    issues = result['issues']
+    if not isinstance(records, list):
+        issues.append([ERROR, collection.key, f"expected a list, found {type(records).__name__}"])
+        return
+
+    seen: Dict[str, int] = {}
+    for index, record in enumerate(records):
+        if is_separator(record):
+            continue
+        if not isinstance(record, dict):
+            issues.append([ERROR, f"{collection.key}[{index}]",
+                           f"expected an object, found {type(record).__name__}"])
+            continue
+
+        record_id = record.get(collection.id_key) if collection.id_key else None
+        where = f"{collection.key}[{index}]{f' {record_id}' if record_id is not None else ''}"
+
+        for name, field in collection.fields.items():
+            if name not in record:
+                if field.required:
+                    issues.append([ERROR, where, f"missing required field '{name}'"])
+                continue
+            value = record[name]
+            if not matches(value, field.types):
+                issues.append([ERROR, f"{where}.{name}",
+                               f"expected {type_names(field.types)}, found {type_names([type(value)])}"])
+                continue
+            if field.items and isinstance(value, list):
+                for position, item in enumerate(value):
+                    if not matches(item, field.items):
+                        issues.append([ERROR, f"{where}.{name}[{position}]",
+                                       f"expected {type_names(field.items)}, "
+                                       f"found {type_names([type(item)])}"])
+            if field.ref and value is not None:
+                for item in (value if isinstance(value, list) else [value]):
+                    if isinstance(item, str):
+                        result['refs'].append([field.ref, item, f"{where}.{name}"])
+
+        if collection.id_key:
+            if not isinstance(record_id, str) or not record_id:
+                continue  # reported above as a missing/mistyped field
+            if record_id in seen:
+                issues.append([ERROR, where, f"duplicate id (first used by "
+                                             f"{collection.key}[{seen[record_id]}])"])
+            else:
+                seen[record_id] = index
+    result['ids'][collection.key] = list(seen)
+
+
+def check_schema(schema: DatabaseSchema, data: Any, result: Dict[str, Any]):
+    if not isinstance(data, dict):
+        result['issues'].append([ERROR, '(root)', f"expected an object, found {type(data).__name__}"])
+        return
+    for key in schema.required_keys:
+        if key not in data:
+            result['issues'].append([ERROR, '(root)', f"missing top-level key '{key}'"])
+    for collection in schema.collections:
+        if collection.key not in data:
+            result['issues'].append([ERROR, '(root)', f"missing top-level key '{collection.key}'"])
+            continue
+        check_collection(collection, data[collection.key], result)
+
+
+def check_file(path: Path) -> Dict[str, Any]:
+    """Phase 1 for one file (pool worker); the result is plain JSON data for the cache"""
+    raw = path.read_bytes()
+    result = {
+        'sha256': hashlib.sha256(raw).hexdigest(),
+        'status': 'ok',
+        'summary': '',
+        'issues': [],
+        'ids': {},
+        'refs': [],
+    }
+    if not raw.strip():
+        result['status'] = 'empty'
+        result['issues'].append([ERROR, '(file)', 'empty file'])
+        return result
+    try:
+        data = json.loads(raw)
+    except ValueError as e:  # JSONDecodeError / UnicodeDecodeError
+        result['status'] = 'invalid'
+        result['issues'].append([ERROR, '(file)', f"invalid JSON: {e}"])
+        return result
+
+    result['summary'] = describe(data)
+    if not data:
+        result['status'] = 'empty'
+        result['issues'].append([WARNING, '(file)', 'empty JSON document'])
+        return result
+
+    schema = schema_for(path.name)
+    if schema is not None:
+        result['schema'] = True
+        check_schema(schema, data, result)
+    return result
+
+
+class ValidationCache:
+    """Phase 1 results per file, keyed by content"""
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self.cache_file = data_dir / CACHE_FILE_NAME
+        self.schema_sha256 = schema_module_sha256()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION and data.get('schemaSha256') == self.schema_sha256:
+                self.entries = data.get('files', {})
+        except (OSError, ValueError):
+            pass
+
+    def lookup(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Cached result if the file is unchanged (stat match, or same content after a touch)"""
+        entry = self.entries.get(path.name)
+        if not entry:
+            return None
+        stat = path.stat()
+        if entry['mtimeNs'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry['result']
+        if hashlib.sha256(path.read_bytes()).hexdigest() == entry['result']['sha256']:
+            entry.update(mtimeNs=stat.st_mtime_ns, size=stat.st_size)
+            self._dirty = True
+            return entry['result']
+        return None
+
+    def store(self, path: Path, result: Dict[str, Any]):
+        stat = path.stat()
+        self.entries[path.name] = {'mtimeNs': stat.st_mtime_ns, 'size': stat.st_size, 'result': result}
+        self._dirty = True
+
+    def forget_missing(self, data_dir: Path):
+        for name in [name for name in self.entries if not (data_dir / name).exists()]:
+            del self.entries[name]
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            temp_file = self.cache_file.with_name(f".{self.cache_file.name}.{os.getpid()}.tmp")
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'schemaSha256': self.schema_sha256,
+                           'files': self.entries}, f)
+            temp_file.replace(self.cache_file)
+            self._dirty = False
+        except OSError:
+            pass  # Read-only checkout etc. - caching is best effort
+
+
+def database_files(data_dir: Path = DATA_DIR) -> List[Path]:
+    # Skip dotfiles (.validation-cache.json)
+    return sorted((path for path in data_dir.glob('*.json') if not path.name.startswith('.')),
+                  key=lambda path: path.name.lower())
+
+
+def referenced_files(paths: Iterable[Path]) -> List[str]:
+    """Names of the files the schemas of the given files point into"""
+    names = []
+    for path in paths:
+        schema = schema_for(Path(path).name)
+        for collection in schema.collections if schema else ():
+            for field in collection.fields.values():
+                if field.ref:
+                    names.append(split_ref(field.ref)[0])
+    return list(dict.fromkeys(names))
+
+
+def run_checks(paths: List[Path], jobs: int = 0,
+               cache: Optional[ValidationCache] = None) -> Dict[str, Dict[str, Any]]:
+    """Phase 1 over paths (cached results reused, the rest in a worker pool) -> name -> result"""
+    results: Dict[str, Dict[str, Any]] = {}
+    stale = []
+    for path in paths:
+        cached = cache.lookup(path) if cache else None
+        if cached is not None:
+            results[path.name] = dict(cached, cached=True)
+        else:
+            stale.append(path)
+
+    workers = min(jobs if jobs > 0 else (os.cpu_count() or 1), len(stale))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(check_file, stale))
+    else:
+        fresh = [check_file(path) for path in stale]
+
+    for path, result in zip(stale, fresh):
+        if cache:
+            cache.store(path, result)
+        results[path.name] = dict(result, cached=False)
+    return results
+
+
+def resolve_references(results: Dict[str, Dict[str, Any]], strict: bool = False):
+    """Phase 2: report references whose target ID does not exist (warnings unless strict)"""
+    ids = {(name, collection): set(values)
+           for name, result in results.items() for collection, values in result['ids'].items()}
+    severity = ERROR if strict else WARNING
+    for result in results.values():
+        result['issues'] = list(result['issues'])  # don't extend the cached list
+        unavailable = set()
+        for ref, value, where in result['refs']:
+            target = split_ref(ref)
+            if target not in ids:
+                if ref not in unavailable:
+                    unavailable.add(ref)
+                    result['issues'].append([WARNING, where, f"cannot resolve references: "
+                                                             f"{ref} was not validated"])
+                continue
+            if value not in ids[target]:
+                result['issues'].append([severity, where, f"'{value}' not found in {ref}"])
+
+
+def validate_database(paths: Optional[List[Path]] = None, data_dir: Path = DATA_DIR, jobs: int = 0,
+                      use_cache: bool = True, strict: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Validate the given files (default: every database in data_dir).
+    Files they reference are checked too, so references can be resolved;
+    only the requested files are returned.
+    """
+    requested = [Path(path) for path in paths] if paths is not None else database_files(data_dir)
+    requested_names = {path.name for path in requested}
+    targets = [data_dir / name for name in referenced_files(requested)
+               if name not in requested_names and (data_dir / name).exists()]
+
+    cache = ValidationCache(data_dir) if use_cache else None
+    results = run_checks(requested + targets, jobs, cache)
+    if cache:
+        if paths is None:
+            cache.forget_missing(data_dir)
+        cache.save()
+
+    resolve_references(results, strict)
+    return {path.name: results[path.name] for path in requested}
+
+
+def count_issues(result: Dict[str, Any], severity: str) -> int:
+    return sum(1 for issue in result['issues'] if issue[0] == severity)
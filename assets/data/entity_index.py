@@ -0,0 +1,184 @@
+"""
+Entity Index - every database record by ID, with its foreign keys resolved
+Loads the assets/data databases that have a schema (database_schemas.py) in
+one pass and builds a hash index per entity type:
+
+    index.get('board', 'BOARD_MELZI_CREALITY')   -> the board record (or None)
+    index.references_to('board', 'BOARD_MELZI_CREALITY')
+        -> ['printer-profiles.json:$.printers[1].stockBoard', ...]
+
+Every foreign key declared in the schemas (printer stockBoard / stockDisplay
+/ stockHotend / stockProbe, thermistor stockOnBoards, ...) is resolved while
+loading. References to IDs that don't exist are kept in index.dangling with
+their JSON paths.
+
+Usage:
+    python entity_index.py                        # entity counts + dangling summary
+    python entity_index.py --dangling             # every dangling reference
+    python entity_index.py board BOARD_MELZI_CREALITY
+"""
+
+import sys
+import json
+import argparse
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from database_schemas import ENTITY_TYPES, SCHEMAS, split_ref
+from database_validator import DATA_DIR, is_separator
+
+# "file.json#collection" -> entity type
+ENTITY_TYPE_BY_REF = {ref: entity_type for entity_type, ref in ENTITY_TYPES.items()}
+
+
+class DanglingReference(NamedTuple):
+    path: str          # file.json:$.printers[4].stockHotend
+    target: str        # entity type the value should name
+    value: str
+
+
+def json_path(file_name: str, collection: str, index: int, field: Optional[str] = None,
+              position: Optional[int] = None) -> str:
+    path = f"{file_name}:$.{collection}[{index}]"
+    if field is not None:
+        path += f".{field}"
+    if position is not None:
+        path += f"[{position}]"
+    return path
+
+
+class EntityIndex:
+    """ID -> record per entity type, plus resolved foreign keys"""
+
+    def __init__(self):
+        self._entities: Dict[str, Dict[str, Dict[str, Any]]] = {name: {} for name in ENTITY_TYPES}
+        self._locations: Dict[Tuple[str, str], str] = {}
+        self._referrers: Dict[Tuple[str, str], List[str]] = {}
+        self.dangling: List[DanglingReference] = []
+        self.files: List[str] = []
+
+    @classmethod
+    def load(cls, data_dir: Path = DATA_DIR) -> 'EntityIndex':
+        """Read every schema'd database in data_dir once and resolve all references"""
+        index = cls()
+        pending: List[Tuple[str, str, str]] = []  # (target ref, value, json path)
+
+        for file_name, schema in SCHEMAS.items():
+            path = data_dir / file_name
+            if not path.exists():
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            index.files.append(file_name)
+
+            for collection in schema.collections:
+                entity_type = ENTITY_TYPE_BY_REF.get(f"{file_name}#{collection.key}")
+                entities = index._entities[entity_type] if entity_type else None
+                refs = [(name, field.ref) for name, field in collection.fields.items() if field.ref]
+
+                for position, record in enumerate(data.get(collection.key, [])):
+                    if not isinstance(record, dict) or is_separator(record):
+                        continue
+                    record_id = record.get(collection.id_key)
+                    # Duplicate IDs are reported by validate_all.py - the first record wins here
+                    if entities is not None and isinstance(record_id, str) \
+                            and record_id not in entities:
+                        entities[record_id] = record
+                        index._locations[(entity_type, record_id)] = json_path(
+                            file_name, collection.key, position)
+
+                    for name, ref in refs:
+                        value = record.get(name)
+                        if isinstance(value, str):
+                            pending.append((ref, value, json_path(
+                                file_name, collection.key, position, name)))
+                        elif isinstance(value, list):
+                            pending.extend((ref, item, json_path(
+                                file_name, collection.key, position, name, item_position))
+                                for item_position, item in enumerate(value) if isinstance(item, str))
+
+        for ref, value, path in pending:
+            target = ENTITY_TYPE_BY_REF[ref]
+            if value in index._entities[target]:
+                index._referrers.setdefault((target, value), []).append(path)
+            elif split_ref(ref)[0] in index.files:
+                index.dangling.append(DanglingReference(path, target, value))
+        return index
+
+    def get(self, entity_type: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        """The record with this ID, or None (KeyError for an unknown entity type)"""
+        return self._entities[entity_type].get(entity_id)
+
+    def entities(self, entity_type: str) -> Mapping[str, Dict[str, Any]]:
+        """All records of one type, by ID"""
+        return self._entities[entity_type]
+
+    def location(self, entity_type: str, entity_id: str) -> Optional[str]:
+        """JSON path of a record (file.json:$.boards[12])"""
+        return self._locations.get((entity_type, entity_id))
+
+    def references_to(self, entity_type: str, entity_id: str) -> List[str]:
+        """JSON paths of every field that references this record"""
+        return self._referrers.get((entity_type, entity_id), [])
+
+
+def print_summary(index: EntityIndex):
+    print(f"📚 Indexed {len(index.files)} database file(s):")
+    for entity_type in ENTITY_TYPES:
+        count = len(index.entities(entity_type))
+        if count:
+            print(f"   • {entity_type:<15} {count:>4}  ({ENTITY_TYPES[entity_type]})")
+
+    if not index.dangling:
+        print("\n✅ Every reference resolves")
+        return
+    print(f"\n⚠️  {len(index.dangling)} dangling reference(s):")
+    by_field = Counter((path.split(':')[0], path.rsplit('.', 1)[-1].partition('[')[0], target)
+                       for path, target, _ in index.dangling)
+    for (file_name, field, target), count in by_field.most_common():
+        print(f"   {file_name} {field} → {target}: {count}")
+    print("\n   Run with --dangling to list them")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Look up database records by ID and check references')
+    parser.add_argument('entity_type', nargs='?', choices=list(ENTITY_TYPES),
+                        help='Entity type to look up')
+    parser.add_argument('entity_id', nargs='?', help='ID to look up')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR,
+                        help='Directory with the *.json databases (default: this script\'s folder)')
+    parser.add_argument('--dangling', action='store_true', help='List every dangling reference')
+    args = parser.parse_args()
+
+    index = EntityIndex.load(args.data_dir)
+
+    if args.entity_type:
+        if not args.entity_id:
+            print(f"{len(index.entities(args.entity_type))} {args.entity_type} record(s):")
+            for entity_id in index.entities(args.entity_type):
+                print(f"   {entity_id}")
+            return 0
+        record = index.get(args.entity_type, args.entity_id)
+        if record is None:
+            print(f"❌ No {args.entity_type} with id '{args.entity_id}'")
+            return 1
+        print(f"✅ {index.location(args.entity_type, args.entity_id)}")
+        print(json.dumps(record, indent=2, ensure_ascii=False))
+        referrers = index.references_to(args.entity_type, args.entity_id)
+        print(f"\n🔗 Referenced by {len(referrers)} field(s)")
+        for path in referrers:
+            print(f"   {path}")
+        return 0
+
+    if args.dangling:
+        for path, target, value in index.dangling:
+            print(f"❌ {path}: '{value}' is not a {target} id")
+        return 1 if index.dangling else 0
+
+    print_summary(index)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,417 @@
+"""
+Filter Records - remove (or keep only) matching records of a JSON database
+
+    python filter_records.py printer-profiles.json --path printers \
+        --match bedType=resin --match technology=sla --match technology=dlp
+
+Records are matched declaratively with --match FIELD=VALUE:
+  - several values for one field = set membership (technology in {sla, dlp})
+  - different fields are OR'ed (--all to require every field to match)
+  - VALUE is read as JSON when it parses (null, true, 3) and as text otherwise
+  - FIELD may be dotted (bedSize.z)
+
+The record array is walked one record at a time. Each record is decoded,
+tested, and then either dropped or copied through as its original text.
+Everything outside the removed records (other sections, formatting, inline
+arrays) stays byte-for-byte the same. Separator entries ({"_section": ...})
+are always kept. The count and lastUpdated fields of the top-level _meta /
+_metadata object are updated. The result is written to a temp file and
+renamed over the target, so an interrupted run never leaves half a file.
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from database_validator import is_separator
+
+META_KEYS = ('_meta', '_metadata')
+
+_WHITESPACE = re.compile(r'\s*')
+_decoder = json.JSONDecoder()
+
+
+def parse_value(text: str) -> Any:
+    """JSON scalar if it parses (null, true, 250), else the text itself"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def field_value(record: Dict[str, Any], field: str) -> Any:
+    """record['a']['b'] for 'a.b' (None when any step is missing)"""
+    value: Any = record
+    for part in field.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class RecordMatcher:
+    """Declarative predicate: field -> set of accepted values"""
+
+    def __init__(self, conditions: Sequence[Tuple[str, Any]], require_all: bool = False,
+                 ignore_case: bool = False):
+        self.require_all = require_all
+        self.ignore_case = ignore_case
+        self.fields: Dict[str, set] = {}
+        for field, value in conditions:
+            self.fields.setdefault(field, set()).add(self._normalize(value))
+
+    @classmethod
+    def from_args(cls, matches: Sequence[str], require_all: bool = False,
+                  ignore_case: bool = False) -> 'RecordMatcher':
+        conditions = []
+        for match in matches:
+            field, sep, value = match.partition('=')
+            if not sep or not field:
+                raise ValueError(f"--match needs FIELD=VALUE, got '{match}'")
+            conditions.append((field.strip(), parse_value(value)))
+        return cls(conditions, require_all, ignore_case)
+
+    def _normalize(self, value: Any) -> Any:
+        if self.ignore_case and isinstance(value, str):
+            return value.lower()
+        return value if not isinstance(value, (list, dict)) else json.dumps(value, sort_keys=True)
+
+    def field_matches(self, record: Dict[str, Any], field: str) -> bool:
+        return self._normalize(field_value(record, field)) in self.fields[field]
+
+    def matched_fields(self, record: Dict[str, Any]) -> List[str]:
+        return [field for field in self.fields if self.field_matches(record, field)]
+
+    def matches(self, record: Dict[str, Any]) -> bool:
+        check = all if self.require_all else any
+        return check(self.field_matches(record, field) for field in self.fields)
+
+    def describe(self) -> str:
+        joiner = ' AND ' if self.require_all else ' OR '
+        return joiner.join(
+            f"{field} = {next(iter(values))!r}" if len(values) == 1
+            else f"{field} in {{{', '.join(repr(value) for value in sorted(values, key=str))}}}"
+            for field, values in self.fields.items())
+
+
+class FilterResult(NamedTuple):
+    total: int                      # records before (separators excluded)
+    kept: int
+    removed: List[Dict[str, Any]]   # id/name/manufacturer + matched fields of each removed record
+    meta_updates: Dict[str, Any]
+    written: bool
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    return _WHITESPACE.match(text, pos).end()
+
+
+def _expect(text: str, pos: int, char: str) -> int:
+    if pos >= len(text) or text[pos] != char:
+        raise ValueError(f"expected '{char}' at offset {pos}")
+    return pos + 1
+
+
+def _member_positions(text: str, pos: int):
+    """(key, key start, value start) of each member of the object at pos; caller finds value ends"""
+    pos = _skip_whitespace(text, _expect(text, pos, '{'))
+    if text[pos] == '}':
+        return
+    while True:
+        key_start = pos
+        key, pos = _decoder.raw_decode(text, pos)
+        pos = _skip_whitespace(text, _expect(text, _skip_whitespace(text, pos), ':'))
+        value_end = yield key, key_start, pos
+        pos = _skip_whitespace(text, value_end)
+        if text[pos] == '}':
+            return
+        pos = _skip_whitespace(text, _expect(text, pos, ','))
+
+
+def _find_member_spans(text: str, pos: int, key_path: List[str], meta_keys: Sequence[str],
+                       on_array) -> Dict[str, Tuple[int, int, int]]:
+    """
+    Walk the object at pos down key_path; on_array(pos) -> end handles the target array.
+    Returns {meta key: (key start, value start, value end)} of this object's meta members.
+    """
+    spans = {}
+    members = _member_positions(text, pos)
+    try:
+        key, key_start, value_start = next(members)
+        while True:
+            if key == key_path[0]:
+                if len(key_path) == 1:
+                    if text[value_start] != '[':
+                        raise ValueError(f"'{key}' is not an array")
+                    value_end = on_array(value_start)
+                else:
+                    if text[value_start] != '{':
+                        raise ValueError(f"'{key}' is not an object")
+                    _find_member_spans(text, value_start, key_path[1:], (), on_array)
+                    value_end = _decoder.raw_decode(text, value_start)[1]
+            else:
+                value_end = _decoder.raw_decode(text, value_start)[1]
+                if key in meta_keys:
+                    spans[key] = (key_start, value_start, value_end)
+            key, key_start, value_start = members.send(value_end)
+    except StopIteration:
+        pass
+    return spans
+
+
+def parse_array_path(path: str) -> List[str]:
+    """'$.printers' / 'printers' / 'a.b' -> key list"""
+    path = path[2:] if path.startswith('$.') else path
+    keys = [key for key in path.split('.') if key]
+    if not keys:
+        raise ValueError("the record array path is empty")
+    return keys
+
+
+def count_keys_for(meta: Dict[str, Any], array_key: str) -> List[str]:
+    """Meta fields that hold the record count of array_key (totalPrinters, printerCount, ...)"""
+    singular = array_key[:-1] if array_key.endswith('s') else array_key
+    candidates = (f"total{array_key[0].upper()}{array_key[1:]}", f"{singular}Count",
+                  f"{array_key}Count", 'count', 'recordCount')
+    return [key for key in candidates if isinstance(meta.get(key), int)]
+
+
+def line_indent(text: str, pos: int) -> str:
+    return text[text.rfind('\n', 0, pos) + 1:pos]
+
+
+def record_spans(text: str, array_path: str) -> Tuple[List[Tuple[int, int]], int]:
+    """(start, end) of every element of the array at array_path, and the offset of its ']'"""
+    spans: List[Tuple[int, int]] = []
+    closing = []
+
+    def collect(pos: int) -> int:
+        cursor = _skip_whitespace(text, pos + 1)
+        while text[cursor] != ']':
+            end = _decoder.raw_decode(text, cursor)[1]
+            spans.append((cursor, end))
+            cursor = _skip_whitespace(text, end)
+            if text[cursor] == ',':
+                cursor = _skip_whitespace(text, cursor + 1)
+        closing.append(cursor)
+        return cursor + 1
+
+    _find_member_spans(text, _skip_whitespace(text, 0), parse_array_path(array_path), (), collect)
+    if not closing:
+        raise ValueError(f"no array at '{array_path}'")
+    return spans, closing[0]
+
+
+def meta_spans_of(text: str, array_path: str) -> Dict[str, Tuple[int, int, int]]:
+    """{meta key: (key start, value start, value end)} of the object holding the array at array_path"""
+    found = []
+
+    def skip_array(pos: int) -> int:
+        found.append(pos)
+        return _decoder.raw_decode(text, pos)[1]
+
+    spans = _find_member_spans(text, _skip_whitespace(text, 0), parse_array_path(array_path),
+                               META_KEYS, skip_array)
+    if not found:
+        raise ValueError(f"no array at '{array_path}'")
+    return spans
+
+
+def update_meta(text: str, meta_spans: Dict[str, Tuple[int, int, int]], array_key: str, count: int,
+                edits: List[Tuple[int, int, str]], count_key: Optional[str] = None,
+                today: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Set the record count of array_key (count_key, or the keys count_keys_for finds) and
+    lastUpdated, if present, in the _meta/_metadata member; appends the edit to edits.
+    Returns the updated meta fields ({} without a meta member or nothing to update).
+    """
+    if not meta_spans:
+        return {}
+    meta_key = next(key for key in META_KEYS if key in meta_spans)
+    key_start, value_start, value_end = meta_spans[meta_key]
+    meta = json.loads(text[value_start:value_end])
+    meta_updates: Dict[str, Any] = {}
+    for key in ([count_key] if count_key else count_keys_for(meta, array_key)):
+        meta_updates[key] = count
+    if 'lastUpdated' in meta:
+        meta_updates['lastUpdated'] = today or date.today().isoformat()
+    if meta_updates:
+        meta.update(meta_updates)
+        # The meta object is a top-level member, so its key's indent is one indent unit
+        indent = line_indent(text, key_start)
+        serialized = json.dumps(meta, indent=len(indent) or 2, ensure_ascii=False)
+        edits.append((value_start, value_end, serialized.replace('\n', '\n' + indent)))
+    return meta_updates
+
+
+def apply_edits(text: str, edits: Sequence[Tuple[int, int, str]]) -> List[str]:
+    """Text pieces with each (start, end, replacement) applied (edits must not overlap)"""
+    pieces = []
+    position = 0
+    for start, end, replacement in sorted(edits):
+        pieces.append(text[position:start])
+        pieces.append(replacement)
+        position = end
+    pieces.append(text[position:])
+    return pieces
+
+
+def write_atomic(target: Path, pieces: Sequence[str]):
+    """Write via a temp file in the same directory + rename (never a half-written file)"""
+    temp_file = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_file, 'w', encoding='utf-8', newline='') as f:
+            f.writelines(pieces)
+        temp_file.replace(target)
+    finally:
+        temp_file.unlink(missing_ok=True)
+
+
+def filter_file(path: Path, array_path: str, matcher: RecordMatcher, keep_matching: bool = False,
+                output: Optional[Path] = None, dry_run: bool = False,
+                count_key: Optional[str] = None, today: Optional[str] = None) -> FilterResult:
+    """
+    Drop the records of the array at array_path that match (or, keep_matching, that don't).
+    Writes atomically unless dry_run: in place only if something was removed, while
+    an explicit output always gets the result (an unchanged copy if nothing matched).
+    Raises ValueError if there is no array at array_path.
+    """
+    text = Path(path).read_text(encoding='utf-8')
+    key_path = parse_array_path(array_path)
+    removed: List[Dict[str, Any]] = []
+    counts = {'total': 0, 'kept': 0}
+    edits: List[Tuple[int, int, str]] = []
+    found = []
+
+    def filter_array(pos: int) -> int:
+        found.append(pos)
+        kept_items = []
+        gap_start = pos + 1
+        cursor = _skip_whitespace(text, gap_start)
+        tail = ''
+        if text[cursor] == ']':
+            return cursor + 1
+        while True:
+            record, end = _decoder.raw_decode(text, cursor)
+            is_record = isinstance(record, dict) and not is_separator(record)
+            drop = False
+            if is_record:
+                counts['total'] += 1
+                drop = matcher.matches(record) != keep_matching
+            if drop:
+                removed.append({
+                    'id': record.get('id'),
+                    'name': record.get('name'),
+                    'manufacturer': record.get('manufacturer'),
+                    'matched': {field: field_value(record, field)
+                                for field in matcher.matched_fields(record)},
+                })
+            else:
+                counts['kept'] += is_record
+                kept_items.append(text[gap_start:end])
+            cursor = _skip_whitespace(text, end)
+            if text[cursor] == ']':
+                tail = text[end:cursor]
+                break
+            cursor = _expect(text, cursor, ',')
+            gap_start = cursor
+            cursor = _skip_whitespace(text, cursor)
+        if removed:
+            edits.append((pos, cursor + 1, '[' + ','.join(kept_items) + tail + ']'))
+        return cursor + 1
+
+    meta_spans = _find_member_spans(text, _skip_whitespace(text, 0), key_path, META_KEYS, filter_array)
+    if not found:
+        raise ValueError(f"no array at '{array_path}'")
+
+    meta_updates: Dict[str, Any] = {}
+    if removed:
+        meta_updates = update_meta(text, meta_spans, key_path[-1], counts['kept'], edits, count_key, today)
+
+    written = False
+    if (removed or output is not None) and not dry_run:
+        write_atomic(Path(output or path), apply_edits(text, edits))
+        written = True
+
+    return FilterResult(counts['total'], counts['kept'], removed, meta_updates, written)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Remove (or keep only) the records of a JSON database that match field values',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Drop resin printers (bedType or technology based)
+  python filter_records.py printer-profiles.json --path printers --ignore-case \\
+      --match bedType=resin --match technology=sla --match technology=dlp --match technology=msla
+
+  # Keep only 24V hotend heaters, preview first
+  python filter_records.py heaters.json --path hotendHeaters --keep --match voltage=24 --dry-run
+        """
+    )
+    parser.add_argument('file', type=Path, help='JSON database to filter')
+    parser.add_argument('--path', required=True,
+                        help='Record array, as a key path from the root ($.printers, printers, a.b)')
+    parser.add_argument('--match', action='append', required=True, metavar='FIELD=VALUE',
+                        help='Match condition (repeat; same field = any of the values)')
+    parser.add_argument('--all', action='store_true',
+                        help='A record matches only if every field matches (default: any field)')
+    parser.add_argument('--ignore-case', action='store_true', help='Compare text values case-insensitively')
+    parser.add_argument('--keep', action='store_true',
+                        help='Keep only the matching records instead of removing them')
+    parser.add_argument('--output', type=Path,
+                        help='Write here instead of replacing the file (written even if nothing matched)')
+    parser.add_argument('--count-key', help='_meta field holding the record count (default: auto, '
+                                            'e.g. totalPrinters / printerCount)')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would be removed, write nothing')
+    args = parser.parse_args()
+
+    try:
+        matcher = RecordMatcher.from_args(args.match, args.all, args.ignore_case)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"📖 Filtering {args.file} ({args.path})")
+    print(f"🔍 {'Keeping only' if args.keep else 'Removing'} records where {matcher.describe()}")
+    try:
+        result = filter_file(args.file, args.path, matcher, keep_matching=args.keep,
+                             output=args.output, dry_run=args.dry_run, count_key=args.count_key)
+    except FileNotFoundError:
+        print(f"❌ Error: {args.file} not found!")
+        return 1
+    except ValueError as e:
+        print(f"❌ Error reading {args.file}: {e}")
+        return 1
+
+    for record in result.removed:
+        matched = ', '.join(f"{field}={value}" for field, value in record['matched'].items())
+        label = record['name'] or record['id'] or 'Unknown'
+        print(f"  ❌ {'Would remove' if args.dry_run else 'Removing'}: {label}"
+              f"{f' ({matched})' if matched else ''}")
+
+    print("\n" + "=" * 60)
+    print(f"Original count:     {result.total}")
+    print(f"Removed:            {len(result.removed)}")
+    print(f"Remaining:          {result.kept}")
+    print("=" * 60)
+    if result.meta_updates:
+        print(f"📝 Metadata: {', '.join(f'{key}={value}' for key, value in result.meta_updates.items())}")
+    if result.written:
+        print(f"✅ Saved: {args.output or args.file}"
+              f"{'' if result.removed else ' (nothing matched - unchanged copy)'}")
+    elif args.dry_run:
+        print("ℹ️  Dry run - nothing written")
+    else:
+        print("➖ Nothing matched - file unchanged")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,398 @@
+"""
+Merge Databases - find duplicates across V1/V2 database pairs and merge V1 into V2
+The V1 files (Extruders.json, marlin-boards.json) predate their V2 versions
+and mostly hold older copies of V2 records. For every V2 database this
+reports:
+
+  - V1 records with the same ID: identical, or their conflicting fields
+  - exact duplicates: records with the same normalized content under different IDs
+  - near duplicates: records whose IDs or names are nearly the same and that
+    aren't different editions of one product
+    (EXTRUDER_BMG_CLONE vs EXTRUDER_BMG_CLONE_TRIANGLELAB, but not
+    BOARD_RAMPS_14_EFB vs BOARD_RAMPS_14_EEB or BOARD_CREALITY_V425 vs V452)
+
+Near duplicates are found by blocking: every record is indexed under the
+rare tokens of its ID and name, and only records sharing a block are
+compared. Candidate pairs stay roughly linear in the record count instead
+of growing with all n*(n-1)/2 pairs.
+
+With --write, V1 records that are missing from V2 (no ID match and no near
+duplicate) are appended to the V2 file, and fields only V1 has are filled
+into the matching V2 records. V2 values win every conflict. Other records
+are copied through as their original text, and the record count and
+lastUpdated in _meta/_metadata are updated as filter_records.py does. V1
+records without an id are reported and never merged. After that the V1
+file can be deleted.
+
+Usage:
+    python merge_databases.py                       # report on every V2 database
+    python merge_databases.py Extruders-V2.json     # one database
+    python merge_databases.py --write --report merge-report.json
+"""
+
+import sys
+import json
+import re
+import hashlib
+import argparse
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from database_schemas import ENTITY_TYPES, split_ref
+from database_validator import DATA_DIR, is_separator
+from filter_records import (apply_edits, line_indent, meta_spans_of, record_spans, update_meta,
+                            write_atomic)
+
+DEFAULT_THRESHOLD = 0.85
+
+# Tokens in more records than this don't identify anything (BOARD, EXTRUDER, BTT)
+MAX_BLOCK_SIZE = 12
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Extra words that make a record another edition of the same product
+# (BOARD_BTT_OCTOPUS_V1_0 vs BOARD_BTT_OCTOPUS_PRO_V1_0)
+EDITION_WORDS = {'plus', 'pro', 'max', 'mini', 'micro', 'lite', 'turbo', 'ez', 'se', 'xs', 'dd',
+                 'wifi', 'clone', 'revo', 'hotend', 'bed', 'dual', 'direct', 'bowden'}
+
+# Misspelled words still count as the same word (long words only: GEN vs SGEN differ)
+MIN_FUZZY_WORD = 5
+FUZZY_WORD_RATIO = 0.8
+
+
+class MergeTarget(NamedTuple):
+    entity_type: str
+    file_name: str                  # marlin-boards-V2.json
+    collection: str                 # boards
+    v1_file_name: Optional[str]     # marlin-boards.json (None: nothing to merge, dedup only)
+
+
+class Entry(NamedTuple):
+    source: str                     # file name
+    position: int                   # index in the record array
+    record: Dict[str, Any]
+
+    @property
+    def label(self) -> str:
+        return f"{self.source}:{self.record.get('id', f'[{self.position}]')}"
+
+
+def merge_targets() -> List[MergeTarget]:
+    """Every V2 database, with its V1 file when one exists ('extruder' + 'extruder-v1')"""
+    targets = []
+    for entity_type, ref in ENTITY_TYPES.items():
+        file_name, collection = split_ref(ref)
+        if entity_type.endswith('-v1') or '-V2' not in file_name:
+            continue
+        v1_ref = ENTITY_TYPES.get(f"{entity_type}-v1")
+        targets.append(MergeTarget(entity_type, file_name, collection,
+                                   split_ref(v1_ref)[0] if v1_ref else None))
+    return targets
+
+
+def normalize(value: Any) -> Any:
+    """Comparison form: case/whitespace-insensitive text, 2.0 == 2, no _comment keys"""
+    if isinstance(value, str):
+        return ' '.join(value.casefold().split())
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, list):
+        return [normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items() if not key.startswith('_')}
+    return value
+
+
+def content_hash(record: Dict[str, Any], ignore: Iterable[str] = ()) -> str:
+    """SHA-256 of the normalized record (fields in ignore left out)"""
+    normalized = normalize({key: value for key, value in record.items() if key not in ignore})
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def tokens(record: Dict[str, Any]) -> Set[str]:
+    text = f"{record.get('id', '')} {record.get('name', '')}".lower()
+    return set(_TOKEN.findall(text))
+
+
+def words(text: str) -> List[str]:
+    """Normalized words of an ID or name, in order ('Rev A+' -> rev, a, plus)"""
+    return _TOKEN.findall(normalize(text).replace('+', ' plus '))
+
+
+def model_numbers(text_words: List[str]) -> List[str]:
+    """Words with a digit (v4, 2209, 100k), in order - V4.2.5 and V4.5.2 differ"""
+    return [word for word in text_words if any(char.isdigit() for char in word)]
+
+
+def is_variant(a: List[str], b: List[str]) -> bool:
+    """
+    True if two IDs/names name different products of one family rather than one
+    product written two ways: different model numbers, a word swapped for
+    another (EFB/EEB, LERDGE_K/S/X, GEN_L/SGEN_L) or an extra edition word
+    (REV_A vs REV_A_PLUS). The same letters split differently and misspelled
+    long words are not variants.
+    """
+    if ''.join(a) == ''.join(b):
+        return False
+    if model_numbers(a) != model_numbers(b):
+        return True
+    only_a = list((Counter(a) - Counter(b)).elements())
+    only_b = list((Counter(b) - Counter(a)).elements())
+    for word in list(only_a):
+        typo = next((other for other in only_b if min(len(word), len(other)) >= MIN_FUZZY_WORD
+                     and SequenceMatcher(None, word, other).ratio() >= FUZZY_WORD_RATIO), None)
+        if typo is not None:
+            only_a.remove(word)
+            only_b.remove(typo)
+    if only_a and only_b:
+        return True
+    return any(len(word) <= 2 or word in EDITION_WORDS for word in only_a + only_b)
+
+
+def similarity(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    """
+    Best of name and ID similarity (0..1). Records whose IDs or names mark
+    them as separate variants (Creality V4.2.2 / V4.2.7, RAMPS EFB / EEB) are 0.
+    """
+    for field in ('id', 'name'):
+        text_a, text_b = str(a.get(field) or ''), str(b.get(field) or '')
+        if text_a and text_b and is_variant(words(text_a), words(text_b)):
+            return 0.0
+    name_a, name_b = normalize(a.get('name', '')), normalize(b.get('name', ''))
+    name_score = SequenceMatcher(None, name_a, name_b).ratio() if name_a and name_b else 0.0
+    id_a, id_b = normalize(str(a.get('id', ''))), normalize(str(b.get('id', '')))
+    id_score = SequenceMatcher(None, id_a, id_b).ratio() if id_a and id_b else 0.0
+    return max(name_score, id_score)
+
+
+def candidate_pairs(entries: List[Entry]) -> Set[Tuple[int, int]]:
+    """Index pairs that share at least one block (a token held by few records)"""
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for index, entry in enumerate(entries):
+        for token in tokens(entry.record):
+            blocks[token].append(index)
+    pairs = set()
+    for members in blocks.values():
+        if 1 < len(members) <= MAX_BLOCK_SIZE:
+            pairs.update(combinations(members, 2))
+    return pairs
+
+
+def load_entries(path: Path, collection: str) -> List[Entry]:
+    with open(path, 'r', encoding='utf-8') as f:
+        records = json.load(f).get(collection, [])
+    return [Entry(path.name, position, record) for position, record in enumerate(records)
+            if isinstance(record, dict) and not is_separator(record)]
+
+
+def analyze(target: MergeTarget, data_dir: Path = DATA_DIR,
+            threshold: float = DEFAULT_THRESHOLD) -> Dict[str, Any]:
+    """Duplicate/conflict report of one V2 database and its V1 file"""
+    v2 = load_entries(data_dir / target.file_name, target.collection)
+    v1_path = data_dir / target.v1_file_name if target.v1_file_name else None
+    v1 = load_entries(v1_path, target.collection) if v1_path and v1_path.exists() else []
+    v2_by_id = {entry.record['id']: entry for entry in reversed(v2) if 'id' in entry.record}
+
+    report = {
+        'file': target.file_name,
+        'v1File': v1_path.name if v1 else None,
+        'records': len(v2),
+        'v1Records': len(v1),
+        'identical': [],
+        'conflicts': [],
+        'filled': [],
+        'v1Only': [],
+        'heldBack': [],
+        'noId': [],
+        'exactDuplicates': [],
+        'nearDuplicates': [],
+    }
+
+    # Same ID in both files: field-by-field comparison, V2 wins
+    matched_v1 = set()
+    for entry in v1:
+        other = v2_by_id.get(entry.record['id']) if 'id' in entry.record else None
+        if other is None:
+            continue
+        matched_v1.add(entry.position)
+        if content_hash(entry.record) == content_hash(other.record):
+            report['identical'].append(entry.record['id'])
+            continue
+        missing = [field for field in entry.record if field not in other.record
+                   and not field.startswith('_')]
+        if missing:
+            report['filled'].append({'id': entry.record['id'], 'fields': missing})
+        for field, value in entry.record.items():
+            if field in other.record and normalize(value) != normalize(other.record[field]):
+                report['conflicts'].append({'id': entry.record['id'], 'field': field,
+                                            'v1': value, 'v2': other.record[field]})
+
+    # Exact duplicates under different IDs
+    by_hash: Dict[str, List[Entry]] = defaultdict(list)
+    for entry in v2 + [entry for entry in v1 if entry.position not in matched_v1]:
+        by_hash[content_hash(entry.record, ignore=('id',))].append(entry)
+    report['exactDuplicates'] = [[entry.label for entry in group]
+                                 for group in by_hash.values() if len(group) > 1]
+
+    # Near duplicates, comparing only records that share a block
+    entries = v2 + [entry for entry in v1 if entry.position not in matched_v1]
+    pairs = candidate_pairs(entries)
+    near_v1 = set()
+    for i, j in sorted(pairs):
+        a, b = entries[i], entries[j]
+        if a.source == b.source and a.record.get('id') == b.record.get('id'):
+            continue  # duplicate IDs are reported by validate_all.py
+        score = similarity(a.record, b.record)
+        if score >= threshold:
+            report['nearDuplicates'].append({'a': a.label, 'b': b.label, 'score': round(score, 3)})
+            for entry in (a, b):
+                if entry.source != target.file_name:
+                    near_v1.add(entry.position)
+    report['nearDuplicates'].sort(key=lambda pair: -pair['score'])
+    report['comparisons'] = len(pairs)
+    report['allPairs'] = len(entries) * (len(entries) - 1) // 2
+
+    for entry in v1:
+        if entry.position in matched_v1:
+            continue
+        if 'id' not in entry.record:
+            report['noId'].append(entry.label)  # nothing to merge it by or report it as
+            continue
+        (report['heldBack'] if entry.position in near_v1 else report['v1Only']).append(entry.record['id'])
+    return report
+
+
+def format_value(value: Any, indent: str, unit: str) -> str:
+    """JSON in the style of the databases: objects expanded, scalar lists on one line"""
+    if isinstance(value, dict) and value:
+        inner = indent + unit
+        members = [f"{inner}{json.dumps(key, ensure_ascii=False)}: {format_value(item, inner, unit)}"
+                   for key, item in value.items()]
+        return '{\n' + ',\n'.join(members) + '\n' + indent + '}'
+    if isinstance(value, list) and any(isinstance(item, (dict, list)) for item in value):
+        inner = indent + unit
+        return '[\n' + ',\n'.join(inner + format_value(item, inner, unit) for item in value) + \
+            '\n' + indent + ']'
+    return json.dumps(value, ensure_ascii=False)
+
+
+def write_merge(target: MergeTarget, report: Dict[str, Any], data_dir: Path = DATA_DIR) -> bool:
+    """Append V1-only records and fill missing fields into the V2 file; True if it changed"""
+    if not report['v1Only'] and not report['filled']:
+        return False
+    v1_records = {entry.record['id']: entry.record
+                  for entry in load_entries(data_dir / report['v1File'], target.collection)
+                  if 'id' in entry.record}
+    path = data_dir / target.file_name
+    text = path.read_text(encoding='utf-8')
+    spans, closing = record_spans(text, target.collection)
+    records = [json.loads(text[start:end]) for start, end in spans]
+
+    # Records sit at depth 2 ({"boards": [ {...} ]}), so the indent unit is half their indent
+    item_indent = line_indent(text, spans[0][0]) if spans else '    '
+    unit = item_indent[:len(item_indent) // 2] or '  '
+    edits = []
+
+    # Missing fields go in as new members before the record's closing brace
+    fill = {item['id']: item['fields'] for item in report['filled']}
+    member_indent = item_indent + unit
+    for (start, end), record in zip(spans, records):
+        fields = fill.pop(record.get('id'), None) if isinstance(record, dict) else None
+        if fields:
+            insert_at = start + len(text[start:end - 1].rstrip())
+            members = ''.join(f",\n{member_indent}{json.dumps(field, ensure_ascii=False)}: "
+                              f"{format_value(v1_records[record['id']][field], member_indent, unit)}"
+                              for field in fields)
+            edits.append((insert_at, insert_at, members))
+
+    if report['v1Only']:
+        appended = ''.join(f",\n{item_indent}{format_value(v1_records[record_id], item_indent, unit)}"
+                           for record_id in report['v1Only'])
+        last_end = spans[-1][1] if spans else closing
+        edits.append((last_end, last_end, appended if spans else appended[1:]))
+
+    # Keep the _meta/_metadata record count and lastUpdated in step, as filter_records does
+    count = sum(isinstance(record, dict) and not is_separator(record) for record in records)
+    update_meta(text, meta_spans_of(text, target.collection), target.collection,
+                count + len(report['v1Only']), edits)
+
+    write_atomic(path, apply_edits(text, edits))
+    return True
+
+
+def print_report(report: Dict[str, Any], verbose: bool = False):
+    print(f"\n📄 {report['file']}: {report['records']} record(s)"
+          + (f" + {report['v1Records']} in {report['v1File']}" if report['v1File'] else ''))
+    print(f"   🔍 {report['comparisons']} candidate pair(s) compared "
+          f"(all pairs: {report['allPairs']})")
+    if report['v1File']:
+        print(f"   ✅ Identical in both files: {len(report['identical'])}")
+        conflicting = sorted({conflict['id'] for conflict in report['conflicts']})
+        print(f"   ⚠️  Conflicting: {len(conflicting)} record(s), {len(report['conflicts'])} field(s)"
+              " (V2 wins)")
+        for conflict in report['conflicts'] if verbose else []:
+            print(f"      {conflict['id']}.{conflict['field']}: "
+                  f"V1 {json.dumps(conflict['v1'], ensure_ascii=False)} → "
+                  f"V2 {json.dumps(conflict['v2'], ensure_ascii=False)}")
+        for item in report['filled']:
+            print(f"   ➕ {item['id']}: fields only in V1: {', '.join(item['fields'])}")
+        for record_id in report['v1Only']:
+            print(f"   ➕ Only in V1: {record_id}")
+        for record_id in report['heldBack']:
+            print(f"   ✋ Only in V1 but near-duplicates a V2 record (not merged): {record_id}")
+        for label in report['noId']:
+            print(f"   ⚠️  V1 record without an id (not merged): {label}")
+    for group in report['exactDuplicates']:
+        print(f"   ❌ Same content, different IDs: {', '.join(group)}")
+    for pair in report['nearDuplicates']:
+        print(f"   🔁 {pair['score']:.2f}  {pair['a']} ~ {pair['b']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find duplicates in the V1/V2 databases and merge V1 into V2')
+    parser.add_argument('files', nargs='*', help='V2 databases to check (default: all)')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR,
+                        help='Directory with the *.json databases (default: this script\'s folder)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Near-duplicate similarity, 0-1 (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--write', action='store_true',
+                        help='Merge V1-only records and fields into the V2 files')
+    parser.add_argument('--report', type=Path, help='Also write the report as JSON')
+    parser.add_argument('--verbose', '-v', action='store_true', help='List every conflicting field')
+    args = parser.parse_args()
+
+    targets = merge_targets()
+    if args.files:
+        names = {Path(name).name for name in args.files}
+        unknown = names - {target.file_name for target in targets}
+        if unknown:
+            print(f"❌ Not a V2 database: {', '.join(sorted(unknown))}")
+            return 1
+        targets = [target for target in targets if target.file_name in names]
+
+    reports = []
+    for target in targets:
+        if not (args.data_dir / target.file_name).exists():
+            print(f"➖ {target.file_name}: not found, skipped")
+            continue
+        report = analyze(target, args.data_dir, args.threshold)
+        print_report(report, args.verbose)
+        if args.write and report['v1File']:
+            merged = write_merge(target, report, args.data_dir)
+            print(f"   ✅ {'Merged into ' + target.file_name if merged else 'Nothing to merge'} - "
+                  + (f"review the records not merged before removing {report['v1File']}"
+                     if report['heldBack'] or report['noId'] else f"{report['v1File']} can be removed"))
+        reports.append(report)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 Report: {args.report}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,76 +1,118 @@
-import json
-import os
+"""
+Validate every JSON database in assets/data.
+
+Each file is parsed and checked against its schema (database_schemas.py):
+required keys, field types, unique IDs, and references into other databases
+(e.g. printer stockBoard -> marlin-boards-V2.json). Files are checked in
+parallel, and results are cached by content, so a re-run only re-checks the
+files that changed.
+
+Usage:
+    python validate_all.py
+    python validate_all.py --strict      # unresolved references are errors
+    python validate_all.py --verbose     # list every warning
+Exit code 1 if any file has errors (for CI).
+"""
+
+import sys
+import argparse
 from pathlib import Path
 
-# Get all JSON files
-json_files = sorted([f for f in os.listdir('.') if f.endswith('.json')])
-
-print("=" * 60)
-print("JSON FILE VALIDATION REPORT")
-print("=" * 60)
-
-valid_files = []
-invalid_files = []
-empty_files = []
-
-for filename in json_files:
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            
-            # Check if empty
-            if not content:
-                empty_files.append(filename)
-                print(f"❌ {filename:40} EMPTY FILE")
-                continue
-            
-            # Try to parse JSON
-            data = json.loads(content)
-            
-            # Check if it's actually empty JSON
-            if not data or (isinstance(data, dict) and not data):
-                empty_files.append(filename)
-                print(f"⚠️  {filename:40} EMPTY JSON")
-            else:
-                valid_files.append(filename)
-                
-                # Count elements
-                if isinstance(data, dict):
-                    keys = len(data.keys())
-                    print(f"✓  {filename:40} OK ({keys} keys)")
-                elif isinstance(data, list):
-                    items = len(data)
-                    print(f"✓  {filename:40} OK ({items} items)")
-                else:
-                    print(f"✓  {filename:40} OK")
-                    
-    except json.JSONDecodeError as e:
-        invalid_files.append((filename, str(e)))
-        print(f"❌ {filename:40} INVALID: {e}")
-    except Exception as e:
-        invalid_files.append((filename, str(e)))
-        print(f"❌ {filename:40} ERROR: {e}")
-
-print("\n" + "=" * 60)
-print("SUMMARY")
-print("=" * 60)
-print(f"Total files scanned: {len(json_files)}")
-print(f"✓ Valid files:       {len(valid_files)}")
-print(f"⚠️  Empty files:       {len(empty_files)}")
-print(f"❌ Invalid files:     {len(invalid_files)}")
-
-if empty_files:
-    print("\n⚠️  EMPTY FILES:")
-    for f in empty_files:
-        print(f"   - {f}")
-
-if invalid_files:
-    print("\n❌ INVALID FILES:")
-    for f, error in invalid_files:
-        print(f"   - {f}")
-        print(f"     Error: {error}")
-
-if len(valid_files) == len(json_files):
-    print("\n🎉 ALL FILES VALID!")
-else:
-    print(f"\n⚠️  {len(empty_files) + len(invalid_files)} files need attention")
+from database_validator import (
+    DATA_DIR, ERROR, WARNING, count_issues, database_files, validate_database
+)
+
+
+def print_issues(result, verbose: bool, max_warnings: int = 5):
+    errors = [issue for issue in result['issues'] if issue[0] == ERROR]
+    warnings = [issue for issue in result['issues'] if issue[0] == WARNING]
+    for _, where, message in errors:
+        print(f"      ❌ {where}: {message}")
+    shown = warnings if verbose else warnings[:max_warnings]
+    for _, where, message in shown:
+        print(f"      ⚠️  {where}: {message}")
+    if len(warnings) > len(shown):
+        print(f"      ... and {len(warnings) - len(shown)} more warning(s) (--verbose to list)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate the JSON databases in assets/data')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR,
+                        help='Directory with the *.json databases (default: this script\'s folder)')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='Worker processes for changed files (0 = one per CPU core)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Re-check every file, ignoring and not updating .validation-cache.json')
+    parser.add_argument('--strict', action='store_true',
+                        help='Treat unresolved cross-references as errors')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help='List every warning instead of the first few per file')
+    args = parser.parse_args()
+
+    json_files = database_files(args.data_dir)
+
+    print("=" * 60)
+    print("JSON FILE VALIDATION REPORT")
+    print("=" * 60)
+
+    results = validate_database(json_files, args.data_dir, args.jobs,
+                                use_cache=not args.no_cache, strict=args.strict)
+
+    valid_files = []
+    empty_files = []
+    invalid_files = []
+    warning_total = 0
+    for name, result in results.items():
+        errors = count_issues(result, ERROR)
+        warnings = count_issues(result, WARNING)
+        warning_total += warnings
+        checks = 'schema' if result.get('schema') else 'parse only'
+        cached = ', cached' if result['cached'] else ''
+
+        if result['status'] == 'empty':
+            empty_files.append(name)
+            print(f"⚠️  {name:40} EMPTY")
+        elif errors:
+            invalid_files.append(name)
+            print(f"❌ {name:40} {errors} error(s), {warnings} warning(s) ({checks}{cached})")
+        elif warnings:
+            valid_files.append(name)
+            print(f"⚠️  {name:40} OK ({result['summary']}), {warnings} warning(s) ({checks}{cached})")
+        else:
+            valid_files.append(name)
+            print(f"✓  {name:40} OK ({result['summary']}) ({checks}{cached})")
+        if result['issues']:
+            print_issues(result, args.verbose)
+
+    checked = sum(1 for result in results.values() if not result['cached'])
+
+    print("\n" + "=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+    print(f"Total files scanned: {len(json_files)} ({checked} checked, "
+          f"{len(json_files) - checked} unchanged from cache)")
+    print(f"✓ Valid files:       {len(valid_files)}")
+    print(f"⚠️  Empty files:       {len(empty_files)}")
+    print(f"❌ Invalid files:     {len(invalid_files)}")
+    print(f"⚠️  Warnings:          {warning_total}")
+
+    if empty_files:
+        print("\n⚠️  EMPTY FILES:")
+        for f in empty_files:
+            print(f"   - {f}")
+
+    if invalid_files:
+        print("\n❌ INVALID FILES:")
+        for f in invalid_files:
+            print(f"   - {f}")
+
+    if len(valid_files) == len(json_files):
+        print("\n🎉 ALL FILES VALID!")
+    else:
+        print(f"\n⚠️  {len(empty_files) + len(invalid_files)} files need attention")
+
+    return 1 if invalid_files or empty_files else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
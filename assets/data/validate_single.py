@@ -1,47 +1,56 @@
-import json
+"""
+Validate one JSON database (same checks as validate_all.py).
+
+Files it references are checked too (from cache when unchanged) so its
+cross-references can be resolved.
+
+Usage:
+    python validate_single.py <filename.json> [--strict] [--verbose]
+"""
+
 import sys
+import argparse
+from pathlib import Path
+
+from database_validator import DATA_DIR, ERROR, WARNING, count_issues, validate_database
+from validate_all import print_issues
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate one JSON database')
+    parser.add_argument('filename', type=Path, help='JSON file to validate')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR,
+                        help='Directory with the referenced databases (default: this script\'s folder)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Re-check the files, ignoring and not updating .validation-cache.json')
+    parser.add_argument('--strict', action='store_true',
+                        help='Treat unresolved cross-references as errors')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help='List every warning instead of the first few')
+    args = parser.parse_args()
+
+    filename = args.filename
+    if not filename.exists():
+        print(f"❌ {filename} - FILE NOT FOUND")
+        return 1
+
+    result = validate_database([filename], args.data_dir, jobs=1,
+                               use_cache=not args.no_cache, strict=args.strict)[filename.name]
+    errors = count_issues(result, ERROR)
+    warnings = count_issues(result, WARNING)
+
+    if result['status'] == 'empty':
+        print(f"⚠️  {filename} - EMPTY")
+    elif errors:
+        print(f"❌ {filename} - {errors} error(s), {warnings} warning(s)")
+    else:
+        print(f"✓ {filename} - OK ({result['summary']})"
+              f"{f', {warnings} warning(s)' if warnings else ''}")
+    if result['issues']:
+        print_issues(result, args.verbose)
+
+    return 1 if errors or result['status'] == 'empty' else 0
+
 
-if len(sys.argv) != 2:
-    print("Usage: python validate_single.py <filename.json>")
-    sys.exit(1)
-
-filename = sys.argv[1]
-
-try:
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-        
-        # Check if empty
-        if not content:
-            print(f"❌ {filename} - EMPTY FILE")
-            sys.exit(1)
-        
-        # Try to parse JSON
-        data = json.loads(content)
-        
-        # Check if it's actually empty JSON
-        if not data or (isinstance(data, dict) and not data):
-            print(f"⚠️  {filename} - EMPTY JSON")
-            sys.exit(0)
-        
-        # Count elements
-        if isinstance(data, dict):
-            keys = len(data.keys())
-            print(f"✓ {filename} - OK ({keys} keys)")
-        elif isinstance(data, list):
-            items = len(data)
-            print(f"✓ {filename} - OK ({items} items)")
-        else:
-            print(f"✓ {filename} - OK")
-        
-        sys.exit(0)
-                
-except json.JSONDecodeError as e:
-    print(f"❌ {filename} - INVALID JSON: {e}")
-    sys.exit(1)
-except FileNotFoundError:
-    print(f"❌ {filename} - FILE NOT FOUND")
-    sys.exit(1)
-except Exception as e:
-    print(f"❌ {filename} - ERROR: {e}")
-    sys.exit(1)
+if __name__ == '__main__':
+    sys.exit(main())
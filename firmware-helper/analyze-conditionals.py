@@ -5,14 +5,23 @@ Analyzes existing mapping files and adds conditional dependency metadata.
 
 Usage:
     python analyze-conditionals.py --mapping-dir assets/data/maps/marlin/2.1.x --config firmware-helper/example-ender5plus-config.h
+    
+    # Batch: every version in assets/data/maps against new configs/{firmware}/{version}/*.h
+    python analyze-conditionals.py --batch --jobs 0
 """
 
 import re
-import json
+import sys
 import argparse
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+from config_header import (
+    TOKEN_DEFINE, TOKEN_DIRECTIVE, TOKEN_DISABLED_DEFINE, ParsedHeader, load_header
+)
+from mapping_annotation import annotate_file, run_batch
+from preprocessor_expr import BranchTracker, try_compile_expression
+
 class ConditionalAnalyzer:
     """Analyze Configuration.h for conditional blocks and update mappings"""
     
@@ -20,36 +29,27 @@ class ConditionalAnalyzer:
         self.config_path = config_path
         self.conditional_map = {}  # Maps define name to conditional info
         self.conditional_stack = []
+        self.branch_tracker = BranchTracker()  # Compiled #if branches, for evaluation
+        self.branch_conditions = {}  # define name -> enclosing Branch tuple of each occurrence
         
-    def analyze(self):
-        """Parse config file and build conditional map"""
-        with open(self.config_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
+    def analyze(self, header: Optional[ParsedHeader] = None):
+        """Walk the parsed config header and build conditional map"""
+        if header is None:
+            header = load_header(self.config_path)
         
-        for line_num, line in enumerate(lines, 1):
-            stripped = line.strip()
-            
+        for token in header.lines:
             # Track preprocessor conditionals
-            if self._is_conditional_directive(stripped):
-                self._handle_conditional(stripped, line_num)
-            
-            # Track #define statements
-            define_match = re.match(r'^\s*#define\s+(\w+)', line)
-            if define_match:
-                define_name = define_match.group(1)
-                if self.conditional_stack:
-                    self.conditional_map[define_name] = [c for c in self.conditional_stack]
+            if token.kind == TOKEN_DIRECTIVE:
+                self._handle_conditional(token.text, token.line)
+                self.branch_tracker.handle(token.text)
             
-            # Track //#define (disabled) too
-            disabled_match = re.match(r'^\s*//\s*#define\s+(\w+)', line)
-            if disabled_match:
-                define_name = disabled_match.group(1)
+            # Track #define and //#define (disabled) statements
+            elif token.kind in (TOKEN_DEFINE, TOKEN_DISABLED_DEFINE):
                 if self.conditional_stack:
-                    self.conditional_map[define_name] = [c for c in self.conditional_stack]
-    
-    def _is_conditional_directive(self, line: str) -> bool:
-        """Check if line is a preprocessor conditional"""
-        return line.startswith(('#if ', '#ifdef ', '#ifndef ', '#elif ', '#else', '#endif'))
+                    self.conditional_map[token.name] = [c for c in self.conditional_stack]
+                # Every occurrence - a define set in several #if/#else branches
+                # only requires what all of them require
+                self.branch_conditions.setdefault(token.name, []).append(self.branch_tracker.snapshot())
     
     def _handle_conditional(self, line: str, line_num: int):
         """Handle preprocessor conditional directives"""
@@ -95,18 +95,38 @@ class ConditionalAnalyzer:
         if not condition_text:
             return None
         
-        # Extract all uppercase identifiers
-        identifiers = re.findall(r'\b[A-Z_][A-Z0-9_]*\b', condition_text)
-        
-        # Filter out C keywords
-        keywords = {'defined', 'ENABLED', 'DISABLED', 'ANY', 'ALL', 'NONE'}
-        dependencies = [id for id in identifiers if id not in keywords]
+        # Dependencies are the defines the compiled expression reads
+        expression = try_compile_expression(condition_text)
+        if expression is not None:
+            dependencies = expression.identifiers()
+        else:
+            # Unparseable - fall back to all uppercase identifiers
+            identifiers = re.findall(r'\b[A-Z_][A-Z0-9_]*\b', condition_text)
+            keywords = {'defined', 'ENABLED', 'DISABLED', 'ANY', 'ALL', 'NONE'}
+            dependencies = [id for id in identifiers if id not in keywords]
         
         return {
             'expression': condition_text,
             'dependencies': dependencies
         }
     
+    def get_required_defines(self, define_name: str) -> List[str]:
+        """
+        Defines that must ALL be enabled for the define to be set at all: the
+        ones every occurrence's #if blocks require, minus any that some
+        occurrence's blocks require to be off.
+        """
+        required = None
+        excluded = set()
+        for branches in self.branch_conditions.get(define_name, ()):
+            all_of = []
+            for branch in branches:
+                on, off = branch.required_defines()
+                all_of.extend(on)
+                excluded.update(off)
+            required = all_of if required is None else [name for name in required if name in all_of]
+        return [name for name in dict.fromkeys(required or []) if name not in excluded]
+    
     def get_conditional_info(self, define_name: str) -> Optional[Dict[str, Any]]:
         """Get conditional information for a define"""
         if define_name not in self.conditional_map:
@@ -144,7 +164,7 @@ class ConditionalAnalyzer:
         # Build result
         result = {
             'isConditional': True,
-            'conditionalDependencies': list(set(dependencies))
+            'conditionalDependencies': list(dict.fromkeys(dependencies))  # Dedupe, keep order
         }
         
         if expressions:
@@ -153,13 +173,8 @@ class ConditionalAnalyzer:
         return result
 
 
-def update_mapping_file(mapping_file: Path, analyzer: ConditionalAnalyzer):
-    """Update a single mapping file with conditional information"""
-    print(f"   Processing {mapping_file.name}...")
-    
-    with open(mapping_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
+def apply_conditional_info(data: Dict[str, Any], analyzer: ConditionalAnalyzer) -> int:
+    """Apply conditional information to an in-memory mapping dict, return fields updated"""
     updated_count = 0
     metadata_keys = {'$schema', 'version', 'firmware', 'configFile', 'generatedFrom', 'totalDefines'}
     
@@ -199,7 +214,9 @@ def update_mapping_file(mapping_file: Path, analyzer: ConditionalAnalyzer):
                 else:
                     field_data['conditionalOnNot'] = []
                 
-                field_data['conditionalOnAll'] = []  # For complex AND conditions
+                # AND requirements taken from the evaluated #if expressions
+                field_data['conditionalOnAll'] = [name for name in analyzer.get_required_defines(define_name)
+                                                  if name not in negative_deps]
                 
                 if cond_info.get('conditionalExpressions'):
                     field_data['conditionalExpression'] = cond_info['conditionalExpressions']
@@ -215,24 +232,48 @@ def update_mapping_file(mapping_file: Path, analyzer: ConditionalAnalyzer):
                 field_data['conditionalOnAll'] = []
                 field_data['conditionalExpression'] = []
     
-    # Write updated file
-    with open(mapping_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
+    return updated_count
+
+
+def update_mapping_file(mapping_file: Path, analyzer: ConditionalAnalyzer):
+    """Update a single mapping file with conditional information (rewritten only if it changed)"""
+    print(f"   Processing {mapping_file.name}...")
+    
+    updated_count, changed = annotate_file(mapping_file, [lambda data: apply_conditional_info(data, analyzer)])
     
-    print(f"      ✅ Updated {updated_count} fields")
+    if changed:
+        print(f"      ✅ Updated {updated_count} fields")
+    else:
+        print(f"      ➖ Unchanged")
 
 
 def main():
     parser = argparse.ArgumentParser(description='Analyze conditionals and update mapping files')
-    parser.add_argument('--mapping-dir', type=Path, required=True,
+    parser.add_argument('--mapping-dir', type=Path,
                        help='Directory containing mapping files')
-    parser.add_argument('--config', type=Path, required=True,
+    parser.add_argument('--config', type=Path,
                        help='Configuration.h file to analyze')
     parser.add_argument('--pattern', default='*-mapping-part*.json',
                        help='Glob pattern for mapping files')
     
+    # Batch mode: whole maps tree against the matching headers
+    parser.add_argument('--batch', action='store_true',
+                       help='Annotate every firmware/version in --maps-dir using headers from --scan-dir')
+    parser.add_argument('--maps-dir', type=Path, default=Path('assets/data/maps'),
+                       help='Mapping tree for --batch (default: assets/data/maps)')
+    parser.add_argument('--scan-dir', type=Path, default=Path('new configs'),
+                       help='Config headers for --batch, as {firmware}/{version}/*.h (default: new configs)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                       help='Parallel worker processes for --batch (0 = one per CPU core)')
+    
     args = parser.parse_args()
     
+    if args.batch:
+        return run_batch(args.maps_dir, args.scan_dir, ('conditionals',), args.jobs)
+    
+    if not args.mapping_dir or not args.config:
+        parser.error('--mapping-dir and --config are required (or use --batch)')
+    
     print(f"🔍 Analyzing conditionals in {args.config}...")
     analyzer = ConditionalAnalyzer(args.config)
     analyzer.analyze()
@@ -251,4 +292,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -9,152 +9,56 @@ Extracts from comments:
 - Ranges: // 0-255, // 1.0-10.0
 - Descriptions
 
+The patterns live in validation_rules.py (ordered rule table, one trigger scan
+per comment, results cached per comment text).
+
 Usage:
     python analyze-validation.py --mapping-dir assets/data/maps/marlin/2.1.x --config assets/data/marlin-configs/config/default/Configuration.h
+    
+    # Batch: every version in assets/data/maps against new configs/{firmware}/{version}/*.h
+    python analyze-validation.py --batch --jobs 0
 """
 
-import re
-import json
+import sys
 import argparse
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 
+from config_header import ParsedHeader, load_header
+from mapping_annotation import annotate_file, run_batch
+from validation_rules import ValidationRuleEngine, default_engine
+
 class ValidationAnalyzer:
     """Extract validation rules from Configuration.h comments"""
     
-    def __init__(self, config_path: Path):
+    def __init__(self, config_path: Path, engine: Optional[ValidationRuleEngine] = None):
         self.config_path = config_path
         self.validation_map = {}  # Maps define name to validation info
+        self.engine = engine or default_engine
         
-    def analyze(self):
-        """Parse config file and extract validation rules"""
-        with open(self.config_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
+    def analyze(self, header: Optional[ParsedHeader] = None):
+        """Extract validation rules from the trailing comments of #define and //#define lines"""
+        if header is None:
+            header = load_header(self.config_path)
         
-        for line_num, line in enumerate(lines, 1):
-            # Parse #define statements with inline comments
-            define_match = re.match(r'^\s*#define\s+(\w+)(?:\s+[^/]+)?\s*//\s*(.+)$', line)
-            if define_match:
-                define_name = define_match.group(1)
-                comment = define_match.group(2).strip()
-                validation = self._extract_validation(comment)
-                if validation:
-                    self.validation_map[define_name] = validation
-            
-            # Also check disabled defines
-            disabled_match = re.match(r'^\s*//\s*#define\s+(\w+)(?:\s+[^/]+)?\s*//\s*(.+)$', line)
-            if disabled_match:
-                define_name = disabled_match.group(1)
-                comment = disabled_match.group(2).strip()
-                validation = self._extract_validation(comment)
-                if validation:
-                    self.validation_map[define_name] = validation
+        for record in header.defines:
+            if not record.trailing_comment:
+                continue
+            validation = self._extract_validation(record.trailing_comment)
+            if validation:
+                self.validation_map[record.name] = validation
     
     def _extract_validation(self, comment: str) -> Optional[Dict[str, Any]]:
-        """Extract validation info from a comment"""
-        validation = {}
-        
-        # Extract allowed values: :['A', 'B', 'C'] or :[0, 1, 2, 3]
-        allowed_match = re.search(r':\s*\[([^\]]+)\]', comment)
-        if allowed_match:
-            allowed_str = allowed_match.group(1)
-            # Parse the list
-            allowed_values = []
-            # Handle quoted strings
-            for match in re.finditer(r"'([^']*)'|\"([^\"]*)\"|(-?\d+\.?\d*)", allowed_str):
-                if match.group(1):  # Single quote
-                    allowed_values.append(match.group(1))
-                elif match.group(2):  # Double quote
-                    allowed_values.append(match.group(2))
-                elif match.group(3):  # Number
-                    num_str = match.group(3)
-                    if '.' in num_str:
-                        allowed_values.append(float(num_str))
-                    else:
-                        allowed_values.append(int(num_str))
-            
-            if allowed_values:
-                validation['allowedValues'] = allowed_values
-        
-        # Extract unit: (mm), (°C), (mm/s), etc.
-        unit_match = re.search(r'\(([^)]+)\)', comment)
-        if unit_match:
-            unit = unit_match.group(1)
-            # Expanded unit detection - any reasonable unit pattern
-            unit_patterns = [
-                r'^[a-zA-Z°µ]+(/[a-zA-Z]+)?[²³]?$',  # mm, mm/s, mm/s², °C, µs
-                r'^\d+\s*[a-zA-Z]+$',  # 16bit, 8-bit
-                r'^%$',  # percentage
-                r'^steps/mm$',  # steps per mm
-            ]
-            if any(re.match(pattern, unit) for pattern in unit_patterns):
-                validation['unit'] = unit
-        
-        # Extract range: 0-255, 1.0-10.0, -100 to 100
-        range_match = re.search(r'(-?\d+\.?\d*)\s*[-–to]+\s*(-?\d+\.?\d*)', comment)
-        if range_match:
-            min_val = range_match.group(1)
-            max_val = range_match.group(2)
-            
-            if '.' in min_val or '.' in max_val:
-                validation['min'] = float(min_val)
-                validation['max'] = float(max_val)
-            else:
-                validation['min'] = int(min_val)
-                validation['max'] = int(max_val)
-        else:
-            # Check for "minimum X" or "at least X"
-            min_match = re.search(r'(?:minimum|min|at least|>=?)\s+(-?\d+\.?\d*)', comment, re.IGNORECASE)
-            if min_match:
-                min_val = min_match.group(1)
-                validation['min'] = float(min_val) if '.' in min_val else int(min_val)
-            
-            # Check for "maximum X" or "up to X"
-            max_match = re.search(r'(?:maximum|max|up to|<=?)\s+(-?\d+\.?\d*)', comment, re.IGNORECASE)
-            if max_match:
-                max_val = max_match.group(1)
-                validation['max'] = float(max_val) if '.' in max_val else int(max_val)
-        
-        # Check for deprecation warning
-        if re.search(r'\b(deprecated|obsolete|legacy)\b', comment, re.IGNORECASE):
-            validation['deprecated'] = True
-        
-        # Check for "requires" or "needs" dependencies
-        requires_match = re.search(r'(?:requires?|needs?)\s+(\w+)', comment, re.IGNORECASE)
-        if requires_match:
-            validation['requires'] = [requires_match.group(1)]
-        
-        # Extract description (everything before special markers)
-        description = comment
-        # Remove allowed values
-        description = re.sub(r':\s*\[[^\]]+\]', '', description)
-        # Remove units
-        description = re.sub(r'\([^)]+\)', '', description)
-        # Remove ranges
-        description = re.sub(r'-?\d+\.?\d*\s*[-–to]+\s*-?\d+\.?\d*', '', description)
-        # Remove deprecation markers
-        description = re.sub(r'\b(deprecated|obsolete|legacy)\b', '', description, flags=re.IGNORECASE)
-        # Clean up
-        description = description.strip()
-        description = re.sub(r'\s+', ' ', description)  # Collapse whitespace
-        
-        if description and len(description) > 5:
-            validation['description'] = description
-        
-        return validation if validation else None
+        """Extract validation info from a comment (see validation_rules.VALIDATION_RULES)"""
+        return self.engine.extract(comment)
     
     def get_validation_info(self, define_name: str) -> Optional[Dict[str, Any]]:
         """Get validation information for a define"""
         return self.validation_map.get(define_name)
 
 
-def update_mapping_file(mapping_file: Path, analyzer: ValidationAnalyzer):
-    """Update a single mapping file with validation information"""
-    print(f"   Processing {mapping_file.name}...")
-    
-    with open(mapping_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
+def apply_validation_info(data: Dict[str, Any], analyzer: ValidationAnalyzer) -> int:
+    """Apply validation information to an in-memory mapping dict, return fields updated"""
     updated_count = 0
     metadata_keys = {'$schema', 'version', 'firmware', 'configFile', 'generatedFrom', 'totalDefines'}
     
@@ -196,42 +100,80 @@ def update_mapping_file(mapping_file: Path, analyzer: ValidationAnalyzer):
                 if 'requires' in validation:
                     # Merge with existing requires if present
                     existing_requires = field_data.get('requires', [])
-                    combined = list(set(existing_requires + validation['requires']))
+                    combined = list(dict.fromkeys(existing_requires + validation['requires']))
                     field_data['requires'] = combined
                 
                 if 'description' in validation:
-                    # Add to notes if not already present
+                    # Add to notes if not already present (re-annotating must not stack it again)
                     if 'notes' in field_data:
-                        field_data['notes'] = f"{validation['description']}. {field_data['notes']}"
+                        notes = field_data['notes']
+                        if notes != validation['description'] and \
+                                not notes.startswith(f"{validation['description']}. "):
+                            field_data['notes'] = f"{validation['description']}. {notes}"
                     else:
                         field_data['notes'] = validation['description']
                 
                 updated_count += 1
     
-    # Write updated file
-    with open(mapping_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
+    return updated_count
+
+
+def update_mapping_file(mapping_file: Path, analyzer: ValidationAnalyzer):
+    """Update a single mapping file with validation information (rewritten only if it changed)"""
+    print(f"   Processing {mapping_file.name}...")
+    
+    updated_count, changed = annotate_file(mapping_file, [lambda data: apply_validation_info(data, analyzer)])
     
-    print(f"      ✅ Updated {updated_count} fields with validation")
+    if changed:
+        print(f"      ✅ Updated {updated_count} fields with validation")
+    else:
+        print(f"      ➖ Unchanged")
+
+
+def print_rule_stats(engine: ValidationRuleEngine):
+    """Per-rule hit counters of the rule engine"""
+    print(f"📊 {engine.comments} comments ({engine.cache_hits} from cache)")
+    for name, hits in engine.stats():
+        print(f"   {name:<15} {hits:>6}")
 
 
 def main():
     parser = argparse.ArgumentParser(description='Analyze validation rules and update mapping files')
-    parser.add_argument('--mapping-dir', type=Path, required=True,
+    parser.add_argument('--mapping-dir', type=Path,
                        help='Directory containing mapping files')
-    parser.add_argument('--config', type=Path, required=True,
+    parser.add_argument('--config', type=Path,
                        help='Configuration.h file to analyze')
     parser.add_argument('--pattern', default='*-mapping-part*.json',
                        help='Glob pattern for mapping files')
+    parser.add_argument('--rule-stats', action='store_true',
+                       help='Print how often each validation rule fired')
+    
+    # Batch mode: whole maps tree against the matching headers
+    parser.add_argument('--batch', action='store_true',
+                       help='Annotate every firmware/version in --maps-dir using headers from --scan-dir')
+    parser.add_argument('--maps-dir', type=Path, default=Path('assets/data/maps'),
+                       help='Mapping tree for --batch (default: assets/data/maps)')
+    parser.add_argument('--scan-dir', type=Path, default=Path('new configs'),
+                       help='Config headers for --batch, as {firmware}/{version}/*.h (default: new configs)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                       help='Parallel worker processes for --batch (0 = one per CPU core)')
     
     args = parser.parse_args()
     
+    if args.batch:
+        return run_batch(args.maps_dir, args.scan_dir, ('validation',), args.jobs)
+    
+    if not args.mapping_dir or not args.config:
+        parser.error('--mapping-dir and --config are required (or use --batch)')
+    
     print(f"🔍 Analyzing validation rules in {args.config}...")
     analyzer = ValidationAnalyzer(args.config)
     analyzer.analyze()
     
     validation_count = len(analyzer.validation_map)
     print(f"✅ Found validation rules for {validation_count} defines")
+    if args.rule_stats:
+        print_rule_stats(analyzer.engine)
     
     # Find mapping files
     mapping_files = sorted(args.mapping_dir.glob(args.pattern))
@@ -248,4 +190,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
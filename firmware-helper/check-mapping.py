@@ -1,36 +1,75 @@
 #!/usr/bin/env python3
-"""Check if USER_PRINTER_NAME has conditional mapping"""
+"""Check if USER_PRINTER_NAME has conditional mapping
+
+Usage:
+    python check-mapping.py [DEFINE] [--maps-dir assets/data/maps]
+"""
 import json
+import argparse
 from pathlib import Path
 
-mapping_file = Path('test-output/th3d/test/core/th3d-config-mapping-core.json')
+from define_index import DefineIndex, index_path_for
+
+parser = argparse.ArgumentParser(description='Show the core mapping of a define')
+parser.add_argument('define', nargs='?', default='USER_PRINTER_NAME',
+                    help='Define name (default: USER_PRINTER_NAME)')
+parser.add_argument('--maps-dir', type=Path, default=Path('assets/data/maps'),
+                    help='Mapping tree with define-index.json (default: assets/data/maps)')
+parser.add_argument('--mapping-file', type=Path,
+                    default=Path('test-output/th3d/test/core/th3d-config-mapping-core.json'),
+                    help='Core mapping file to scan when --maps-dir has no define index')
+args = parser.parse_args()
+
+DEFINE_NAME = args.define
+maps_dir = args.maps_dir
+mapping_file = args.mapping_file
+
+
+def print_field(category, field_name, field_data):
+    print(f"✅ FOUND in category: {category}")
+    print(f"   Field name: {field_name}")
+    print(f"   mapsFrom: {field_data.get('mapsFrom', [])}")
+    print(f"   conditionalOn: {field_data.get('conditionalOn', 'NOT SET')}")
+    print(f"   conditionalOnNot: {field_data.get('conditionalOnNot', 'NOT SET')}")
+    print(f"   isConditional: {field_data.get('isConditional', False)}")
+    print(f"   uiFieldId: {field_data.get('uiFieldId', 'NOT SET')}")
+    print(f"\n   Full field data:")
+    print(f"   {json.dumps(field_data, indent=6)}")
 
-with open(mapping_file) as f:
-    data = json.load(f)
 
-print("\n=== Searching for USER_PRINTER_NAME ===\n")
+print(f"\n=== Searching for {DEFINE_NAME} ===\n")
 
 found = False
-for category, fields in data.items():
-    if not isinstance(fields, dict):
-        continue
-    
-    for field_name, field_data in fields.items():
-        if not isinstance(field_data, dict):
+index = DefineIndex.load_if_exists(maps_dir)
+if index is not None:
+    # Index lookup: only open the core files that actually map the define
+    loaded = {}
+    for hit in index.lookup(DEFINE_NAME):
+        if not hit['file'].startswith('core/'):
             continue
-        
-        maps_from = field_data.get('mapsFrom', [])
-        if 'USER_PRINTER_NAME' in maps_from:
-            found = True
-            print(f"✅ FOUND in category: {category}")
-            print(f"   Field name: {field_name}")
-            print(f"   mapsFrom: {maps_from}")
-            print(f"   conditionalOn: {field_data.get('conditionalOn', 'NOT SET')}")
-            print(f"   conditionalOnNot: {field_data.get('conditionalOnNot', 'NOT SET')}")
-            print(f"   isConditional: {field_data.get('isConditional', False)}")
-            print(f"   uiFieldId: {field_data.get('uiFieldId', 'NOT SET')}")
-            print(f"\n   Full field data:")
-            print(f"   {json.dumps(field_data, indent=6)}")
+        path = maps_dir / hit['firmware'] / hit['version'] / hit['file']
+        if path not in loaded:
+            with open(path) as f:
+                loaded[path] = json.load(f)
+        found = True
+        print(f"📄 {hit['firmware']}/{hit['version']}/{hit['file']}")
+        print_field(hit['category'], hit['fieldKey'], loaded[path][hit['category']][hit['fieldKey']])
+else:
+    print(f"➖ No define index at {index_path_for(maps_dir)} - scanning {mapping_file}\n")
+    with open(mapping_file) as f:
+        data = json.load(f)
+
+    for category, fields in data.items():
+        if not isinstance(fields, dict):
+            continue
+
+        for field_name, field_data in fields.items():
+            if not isinstance(field_data, dict):
+                continue
+
+            if DEFINE_NAME in field_data.get('mapsFrom', []):
+                found = True
+                print_field(category, field_name, field_data)
 
 if not found:
-    print("❌ USER_PRINTER_NAME not found in core mapping")
+    print(f"❌ {DEFINE_NAME} not found in core mapping")
@@ -1,31 +1,45 @@
 #!/usr/bin/env python3
 """
-TH3D Configuration Field Mapping Checker
-Analyzes TH3D config files and compares to mapping files to find missing mappings.
+Mapping Coverage Checker
+Finds every firmware/version in the maps directory, pairs each generated
+full/ mapping with the config header it came from, and reports how many of
+the header's enabled #defines are mapped: per file, per category and per
+version. Coverage is |enabled ∩ mapped| / |enabled|, computed with set
+operations over the define index (define-index.json).
+
+Headers are read from new configs/{firmware}/{version}/ (the --scan layout).
+If a version isn't there, the header path stored in the mapping
+(generatedFrom) is used instead.
+
+Usage:
+    python firmware-helper/check-missing-mappings.py
+    python firmware-helper/check-missing-mappings.py --firmware th3d --show 0
+    python firmware-helper/check-missing-mappings.py --maps-dir test-output --scan-dir "new configs"
 """
 
 import re
+import sys
 import json
+import argparse
 from pathlib import Path
-from collections import defaultdict
-
-# Configuration
-CONFIG_FILES = [
-    "Test files\\th3d\\Configuration.h",
-    "Test files\\th3d\\Configuration_adv.h",
-    "Test files\\th3d\\Configuration_backend.h",
-    "Test files\\th3d\\Configuration_speed.h"
-]
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-MAPPING_FILES = [
-    "assets/data/maps/th3d/th3d-config-mapping.json",
-    "assets/data/maps/th3d/th3d-config-adv-mapping-part1.json",
-    "assets/data/maps/th3d/th3d-config-adv-mapping-part2.json",
-    "assets/data/maps/th3d/th3d-config-adv-mapping-part3.json",
-    "assets/data/maps/th3d/th3d-config-adv-mapping-part4.json",
-    "assets/data/maps/th3d/th3d-config-backend-mapping.json",
-    "assets/data/maps/th3d/th3d-config-speed-mapping.json"
-]
+from config_header import load_header
+from define_classifier import KeywordClassifier
+from define_index import DefineIndex, index_path_for, load_version_bundle, update_define_index
+from mapping_annotation import load_helper_module
+from mapping_bundle import MappingBundle
+
+MAPS_DIR = Path("assets/data/maps")
+SCAN_DIR = Path("new configs")
+REPORT_FILE = Path("firmware-helper/mapping-coverage-report.txt")
+JSON_REPORT_FILE = Path("firmware-helper/mapping-coverage-report.json")
+
+# Consolidated mapping of one header inside the index: full/{firmware}-config{suffix}-mapping-full.json
+FULL_DOCUMENT_RE = re.compile(r'full/(?P<firmware>.+)-config(?P<suffix>(?:-[a-z]+)?)-mapping-full\.json$')
+
+# Upper-case config option names (excludes function-like macros and mixed case)
+CONFIG_NAME_RE = re.compile(r'[A-Z_][A-Z0-9_]*$')
 
 # Critical defines that must be mapped (for validation)
 CRITICAL_DEFINES = [
@@ -41,210 +55,245 @@ CRITICAL_DEFINES = [
 ]
 
 def extract_defines_from_config(filepath):
-    """Extract all #define statements from a config file."""
+    """Extract all enabled #define names from a config file."""
     defines = set()
-    
+
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        # Match #define statements (not inside comments)
-        # Pattern: #define NAME [value]
-        pattern = r'^\s*#define\s+([A-Z_][A-Z0-9_]*)'
-        
-        for line in content.split('\n'):
-            # Skip commented lines
-            if line.strip().startswith('//'):
+        header = load_header(Path(filepath))
+
+        for record in header.enabled_defines():
+            define_name = record.name
+            # Config option names only; skip internal Marlin macros and include guards
+            if not CONFIG_NAME_RE.match(define_name):
                 continue
-                
-            match = re.search(pattern, line)
-            if match:
-                define_name = match.group(1)
-                # Skip internal Marlin macros and include guards
-                if not define_name.startswith('_') and not define_name.endswith('_H'):
-                    defines.add(define_name)
-    
+            if not define_name.startswith('_') and not define_name.endswith('_H'):
+                defines.add(define_name)
+
     except FileNotFoundError:
         print(f"❌ File not found: {filepath}")
     except Exception as e:
         print(f"❌ Error reading {filepath}: {e}")
-    
+
     return defines
 
-def extract_mapsFrom_fields(mapping_data, parent_key=''):
-    """Recursively extract all 'mapsFrom' fields from mapping JSON."""
-    mapped_fields = set()
-    
-    if isinstance(mapping_data, dict):
-        for key, value in mapping_data.items():
-            if key == 'mapsFrom' and isinstance(value, list):
-                for field in value:
-                    # Remove array indexing [0], [1], etc.
-                    clean_field = re.sub(r'\[\d+\]', '', field)
-                    mapped_fields.add(clean_field)
-            else:
-                mapped_fields.update(extract_mapsFrom_fields(value, parent_key + '.' + key if parent_key else key))
-    
-    return mapped_fields
-
-def load_mapped_fields():
-    """Load all mapped fields from mapping JSON files."""
-    all_mapped = set()
-    
-    for mapping_file in MAPPING_FILES:
-        try:
-            with open(mapping_file, 'r', encoding='utf-8') as f:
-                mapping_data = json.load(f)
-                mapped = extract_mapsFrom_fields(mapping_data)
-                all_mapped.update(mapped)
-                print(f"✅ Loaded {len(mapped)} mappings from {Path(mapping_file).name}")
-        except FileNotFoundError:
-            print(f"⚠️  Mapping file not found: {mapping_file}")
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON error in {mapping_file}: {e}")
-        except Exception as e:
-            print(f"❌ Error loading {mapping_file}: {e}")
-    
-    return all_mapped
+# Define categories for coverage and unmapped lists (order matters - first match wins)
+UNMAPPED_CATEGORY_PATTERNS = {
+    'thermal': ['temp', 'thermal', 'pid', 'heat', 'cool'],
+    'motion': ['feed', 'accel', 'jerk', 'step', 'max_pos', 'min_pos'],
+    'hardware': ['board', 'pin', 'driver', 'motor', 'serial'],
+    'safety': ['protection', 'safety', 'endstop', 'watchdog'],
+    'features': ['enable', 'disable', 'support', 'feature'],
+    'display': ['lcd', 'display', 'screen', 'menu'],
+    'communication': ['baud', 'serial', 'usb', 'buffer'],
+}
+
+UNMAPPED_CLASSIFIER = KeywordClassifier(UNMAPPED_CATEGORY_PATTERNS, default='other',
+                                        ignore_case=True)
 
 def categorize_unmapped(defines, mapped_fields):
     """Categorize unmapped defines by type."""
-    categories = {
-        'thermal': [],
-        'motion': [],
-        'hardware': [],
-        'safety': [],
-        'features': [],
-        'display': [],
-        'communication': [],
-        'other': []
-    }
-    
+    categories = {category: [] for category in UNMAPPED_CATEGORY_PATTERNS}
+    categories['other'] = []
+
     for define in defines:
         if define in mapped_fields:
             continue
-            
-        define_lower = define.lower()
-        
-        if any(x in define_lower for x in ['temp', 'thermal', 'pid', 'heat', 'cool']):
-            categories['thermal'].append(define)
-        elif any(x in define_lower for x in ['feed', 'accel', 'jerk', 'step', 'max_pos', 'min_pos']):
-            categories['motion'].append(define)
-        elif any(x in define_lower for x in ['board', 'pin', 'driver', 'motor', 'serial']):
-            categories['hardware'].append(define)
-        elif any(x in define_lower for x in ['protection', 'safety', 'endstop', 'watchdog']):
-            categories['safety'].append(define)
-        elif any(x in define_lower for x in ['enable', 'disable', 'support', 'feature']):
-            categories['features'].append(define)
-        elif any(x in define_lower for x in ['lcd', 'display', 'screen', 'menu']):
-            categories['display'].append(define)
-        elif any(x in define_lower for x in ['baud', 'serial', 'usb', 'buffer']):
-            categories['communication'].append(define)
-        else:
-            categories['other'].append(define)
-    
+        categories[UNMAPPED_CLASSIFIER.classify(define)].append(define)
+
     return categories
 
+def coverage_stats(defines: Set[str], mapped: Set[str]) -> Dict[str, Any]:
+    """Coverage of a header's enabled defines by a set of mapped defines"""
+    covered = len(defines & mapped)
+    return {
+        'defines': len(defines),
+        'mapped': covered,
+        'unmapped': len(defines) - covered,
+        'coverage': round(covered / len(defines) * 100, 1) if defines else None,
+        # Mapped, but disabled (//#define) or absent in the header
+        'mappedNotEnabled': len(mapped - defines),
+    }
+
+def format_coverage(stats: Dict[str, Any]) -> str:
+    pct = 'n/a' if stats['coverage'] is None else f"{stats['coverage']:.1f}%"
+    return f"{stats['mapped']}/{stats['defines']} ({pct})"
+
+def load_define_index(maps_dir: Path) -> Optional[DefineIndex]:
+    """The define index of maps_dir, built (and saved) first if there is none"""
+    index = DefineIndex.load_if_exists(maps_dir)
+    if index is None and maps_dir.is_dir():
+        print(f"🔧 No define index yet, building {index_path_for(maps_dir)}...")
+        update_define_index(maps_dir, [])
+        index = DefineIndex.load_if_exists(maps_dir)
+    return index
+
+def find_version_headers(scan_dir: Path, firmware: str, version: str) -> Dict[str, Path]:
+    """Output suffix ('', -adv, -backend, -speed) -> header in scan_dir/{firmware}/{version}/"""
+    mappings = load_helper_module('create-comprehensive-mappings.py')
+    return {mappings.config_output_suffix(path): path
+            for path in sorted((scan_dir / firmware / version).glob('*.h'))}
+
+def header_from_mapping(bundle: Optional[MappingBundle], document: str) -> Optional[Path]:
+    """Header a mapping document was generated from (its generatedFrom metadata), if it still exists"""
+    if bundle is None or document not in bundle.document_names:
+        return None
+    generated_from = bundle.metadata(document).get('generatedFrom')
+    if not generated_from:
+        return None
+    path = Path(generated_from.replace('\\', '/'))  # mappings generated on Windows
+    return path if path.is_file() else None
+
+def analyze_version(maps_dir: Path, scan_dir: Path, firmware: str, version: str,
+                    documents: Dict[str, Set[str]]) -> Dict[str, Any]:
+    """Coverage report of one firmware/version (documents: full/ document -> mapped defines)"""
+    headers = find_version_headers(scan_dir, firmware, version)
+    bundle = None  # only loaded when a header isn't in scan_dir
+    files = []
+    all_defines: Set[str] = set()
+    all_mapped: Set[str] = set()
+
+    for document, mapped in sorted(documents.items()):
+        all_mapped |= mapped
+        suffix = FULL_DOCUMENT_RE.match(document).group('suffix')
+        header = headers.get(suffix)
+        if header is None:
+            bundle = bundle or load_version_bundle(maps_dir / firmware / version, firmware, version)
+            header = header_from_mapping(bundle, document)
+        if header is None:
+            files.append({'file': document, 'config': None})
+            continue
+
+        defines = extract_defines_from_config(header)
+        all_defines |= defines
+        files.append({'file': document, 'config': str(header), **coverage_stats(defines, mapped)})
+
+    categories = {}
+    for category, names in UNMAPPED_CLASSIFIER.classify_all(sorted(all_defines)).items():
+        stats = coverage_stats(set(names), all_mapped)
+        del stats['mappedNotEnabled']  # not meaningful per category
+        categories[category] = stats
+    ordered = list(UNMAPPED_CATEGORY_PATTERNS) + ['other']
+    categories = {category: categories[category] for category in ordered if category in categories}
+
+    unmapped = categorize_unmapped(all_defines, all_mapped)
+    return {
+        'firmware': firmware,
+        'version': version,
+        'summary': coverage_stats(all_defines, all_mapped),
+        'files': files,
+        'categories': categories,
+        'missingCritical': [define for define in CRITICAL_DEFINES if define not in all_mapped],
+        'unmapped': {category: sorted(names) for category, names in unmapped.items() if names},
+    }
+
+def analyze_coverage(maps_dir: Path, scan_dir: Path, firmware: Optional[str] = None,
+                     version: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Coverage reports of every (matching) firmware/version in the define index"""
+    index = load_define_index(maps_dir)
+    if index is None:
+        return []
+
+    # Mapped defines of every full/ document, from one pass over the index
+    versions: Dict[Tuple[str, str], Dict[str, Set[str]]] = {}
+    for (source_firmware, source_version, document), mapped in index.defines_by_source().items():
+        if firmware and source_firmware != firmware:
+            continue
+        if version and source_version != version:
+            continue
+        if FULL_DOCUMENT_RE.match(document):
+            versions.setdefault((source_firmware, source_version), {})[document] = mapped
+
+    return [analyze_version(maps_dir, scan_dir, source_firmware, source_version, documents)
+            for (source_firmware, source_version), documents in sorted(versions.items())]
+
+def print_version_report(report: Dict[str, Any], show: int):
+    print(f"\n📂 {report['firmware']}/{report['version']}: {format_coverage(report['summary'])} "
+          f"enabled defines mapped")
+    for entry in report['files']:
+        name = Path(entry['file']).name
+        if entry['config'] is None:
+            print(f"   ⚠️  {name}: no config header found, skipped")
+        else:
+            print(f"   📄 {name} ← {Path(entry['config']).name}: {format_coverage(entry)}"
+                  f", {entry['mappedNotEnabled']} mapped but not enabled")
+    if not report['summary']['defines']:
+        return
+
+    print(f"   📦 By category:")
+    for category, stats in report['categories'].items():
+        print(f"      {category:<14} {format_coverage(stats)}")
+
+    if report['missingCritical']:
+        print(f"   ❌ CRITICAL not mapped: {', '.join(report['missingCritical'])}")
+    else:
+        print(f"   ✅ All critical fields are mapped")
+
+    if show:
+        for category, names in report['unmapped'].items():
+            print(f"\n   📦 Unmapped {category.upper()} ({len(names)}):")
+            for define in names[:show]:
+                print(f"      - {define}")
+            if len(names) > show:
+                print(f"      ... and {len(names) - show} more")
+
+def write_text_report(reports: List[Dict[str, Any]], path: Path):
+    lines = ["Configuration Field Mapping Coverage Report", "=" * 80, ""]
+    for report in reports:
+        summary = report['summary']
+        if not summary['defines']:
+            lines += [f"{report['firmware']}/{report['version']}: no config headers found", ""]
+            continue
+        lines += [f"{report['firmware']}/{report['version']}", "-" * 80,
+                  f"Total defines: {summary['defines']}",
+                  f"Mapped: {summary['mapped']}",
+                  f"Unmapped: {summary['unmapped']}",
+                  f"Coverage: {format_coverage(summary)}", ""]
+        for entry in report['files']:
+            if entry['config'] is not None:
+                lines.append(f"  {entry['file']}: {format_coverage(entry)}")
+        lines.append("")
+        for category, stats in report['categories'].items():
+            lines.append(f"  {category:<14} {format_coverage(stats)}")
+        if report['missingCritical']:
+            lines.append(f"\nCritical not mapped: {', '.join(report['missingCritical'])}")
+        lines += ["", "UNMAPPED DEFINES:"]
+        lines += sorted(name for names in report['unmapped'].values() for name in names)
+        lines.append("")
+    path.write_text('\n'.join(lines), encoding='utf-8')
+
 def main():
+    parser = argparse.ArgumentParser(description='Report mapping coverage of config #defines for every firmware/version')
+    parser.add_argument('--maps-dir', type=Path, default=MAPS_DIR,
+                        help=f'Mapping tree with define-index.json (default: {MAPS_DIR})')
+    parser.add_argument('--scan-dir', type=Path, default=SCAN_DIR,
+                        help=f'Config headers as {{firmware}}/{{version}}/*.h (default: {SCAN_DIR})')
+    parser.add_argument('--firmware', help='Only check this firmware (marlin/th3d)')
+    parser.add_argument('--version', help='Only check this firmware version')
+    parser.add_argument('--report', type=Path, default=REPORT_FILE,
+                        help=f'Text report path (default: {REPORT_FILE})')
+    parser.add_argument('--json-report', type=Path, default=JSON_REPORT_FILE,
+                        help=f'JSON report path (default: {JSON_REPORT_FILE})')
+    parser.add_argument('--show', type=int, default=10,
+                        help='Unmapped defines listed per category on the console (0 = none)')
+    args = parser.parse_args()
+
     print("=" * 80)
-    print("TH3D Configuration Field Mapping Checker")
-    print("=" * 80)
-    print()
-    
-    # Step 1: Extract defines from config files
-    print("📂 Step 1: Extracting #define statements from config files...")
-    print()
-    all_defines = set()
-    defines_by_file = {}
-    
-    for config_file in CONFIG_FILES:
-        defines = extract_defines_from_config(config_file)
-        defines_by_file[config_file] = defines
-        all_defines.update(defines)
-        print(f"  ✅ {Path(config_file).name}: {len(defines)} defines found")
-    
-    print(f"\n  📊 Total unique defines: {len(all_defines)}")
-    print()
-    
-    # Step 2: Load mapped fields
-    print("🗺️  Step 2: Loading mapped fields from JSON files...")
-    print()
-    mapped_fields = load_mapped_fields()
-    print(f"\n  📊 Total mapped fields: {len(mapped_fields)}")
-    print()
-    
-    # Step 3: Find unmapped defines
-    print("🔍 Step 3: Finding unmapped defines...")
-    print()
-    unmapped = all_defines - mapped_fields
-    if len(all_defines) > 0:
-        print(f"  📊 Unmapped defines: {len(unmapped)} / {len(all_defines)} ({len(unmapped)/len(all_defines)*100:.1f}%)")
-    else:
-        print(f"  📊 Unmapped defines: {len(unmapped)} (no defines found in config files)")
-    print()
-    
-    # Step 4: Check critical defines
-    print("⚠️  Step 4: Checking critical defines...")
-    print()
-    missing_critical = []
-    for critical in CRITICAL_DEFINES:
-        if critical not in mapped_fields:
-            missing_critical.append(critical)
-            print(f"  ❌ CRITICAL: {critical} is NOT mapped!")
-        else:
-            print(f"  ✅ {critical} is mapped")
-    print()
-    
-    # Step 5: Categorize unmapped defines
-    if unmapped:
-        print("📋 Step 5: Categorizing unmapped defines...")
-        print()
-        categories = categorize_unmapped(unmapped, mapped_fields)
-        
-        for category, defines in categories.items():
-            if defines:
-                print(f"\n  📦 {category.upper()} ({len(defines)}):")
-                for define in sorted(defines)[:10]:  # Show first 10
-                    print(f"     - {define}")
-                if len(defines) > 10:
-                    print(f"     ... and {len(defines) - 10} more")
-    
-    # Step 6: Generate report
-    print("\n" + "=" * 80)
-    print("📊 SUMMARY REPORT")
+    print("Configuration Field Mapping Coverage")
     print("=" * 80)
-    print(f"Total defines in config files: {len(all_defines)}")
-    print(f"Total mapped in JSON files: {len(mapped_fields)}")
-    print(f"Unmapped defines: {len(unmapped)}")
-    if len(all_defines) > 0:
-        print(f"Mapping coverage: {(len(mapped_fields)/len(all_defines)*100):.1f}%")
-    else:
-        print(f"Mapping coverage: N/A (no defines found in config files)")
-    
-    if missing_critical:
-        print(f"\n⚠️  CRITICAL MISSING: {len(missing_critical)} critical fields not mapped:")
-        for field in missing_critical:
-            print(f"   - {field}")
-    else:
-        print("\n✅ All critical fields are mapped!")
-    
-    # Save detailed report
-    report_file = "firmware-helper/mapping-coverage-report.txt"
-    with open(report_file, 'w', encoding='utf-8') as f:
-        f.write("TH3D Configuration Field Mapping Coverage Report\n")
-        f.write("=" * 80 + "\n\n")
-        f.write(f"Total defines: {len(all_defines)}\n")
-        f.write(f"Mapped: {len(mapped_fields)}\n")
-        f.write(f"Unmapped: {len(unmapped)}\n")
-        f.write(f"Coverage: {(len(mapped_fields)/len(all_defines)*100):.1f}%\n\n")
-        
-        f.write("UNMAPPED DEFINES:\n")
-        f.write("-" * 80 + "\n")
-        for define in sorted(unmapped):
-            f.write(f"{define}\n")
-    
-    print(f"\n💾 Detailed report saved to: {report_file}")
-    print()
+
+    reports = analyze_coverage(args.maps_dir, args.scan_dir, args.firmware, args.version)
+    if not reports:
+        print(f"❌ No mapped firmware versions found in {args.maps_dir}/")
+        return 1
+
+    for report in reports:
+        print_version_report(report, args.show)
+
+    write_text_report(reports, args.report)
+    args.json_report.write_text(json.dumps({'mapsDir': str(args.maps_dir), 'versions': reports},
+                                           indent=2), encoding='utf-8')
+    print(f"\n💾 Reports saved to: {args.report} and {args.json_report}")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
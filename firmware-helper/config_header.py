@@ -0,0 +1,287 @@
+"""
+Config Header Model - shared Configuration.h parser
+Parses a Marlin/TH3D config header once into an immutable model that every
+tool consumes, instead of each tool running its own slightly different regexes:
+
+    create-comprehensive-mappings.py  ConfigParser, EffectiveConfigResolver
+    analyze-conditionals.py           ConditionalAnalyzer
+    analyze-validation.py             ValidationAnalyzer
+    check-missing-mappings.py         extract_defines_from_config
+
+The model holds every line classified exactly once (HeaderLine) plus one
+DefineRecord per #define / //#define with its value, preceding comment block,
+trailing comment and the enclosing #if chain.
+
+Parsed models are cached on disk (firmware-helper/.header-cache/) by header
+path and SHA-256 of the header bytes, so repeated tool runs on the same headers
+skip parsing, and in memory so the tools of one pipeline run share a single
+parse. Both keep only the current content of each path.
+"""
+
+import os
+import re
+import pickle
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Bump when the model layout or tokenizer rules change (invalidates the disk cache)
+MODEL_VERSION = 1
+
+CACHE_DIR = Path(__file__).resolve().parent / '.header-cache'
+
+# Line kinds
+TOKEN_BLANK = 'blank'
+TOKEN_COMMENT = 'comment'
+TOKEN_DIRECTIVE = 'directive'
+TOKEN_DEFINE = 'define'
+TOKEN_DISABLED_DEFINE = 'disabled_define'
+TOKEN_DISABLED_OTHER = 'disabled_other'  # //#if, //#include, ... (ignored)
+TOKEN_CODE = 'code'
+
+CONDITIONAL_PREFIXES = ('#if ', '#ifdef ', '#ifndef ', '#elif ', '#else', '#endif')
+
+# Applied to the code part of a line (trailing // comment already split off)
+DEFINE_BODY_RE = re.compile(r'#define\s+(\w+)(?:\s+(.+?))?\s*$')
+
+
+class HeaderLine(NamedTuple):
+    """One source line, classified once"""
+    kind: str
+    line: int
+    text: str  # stripped line
+    name: Optional[str] = None  # define name (define / disabled_define)
+    value: Optional[str] = None  # define value, None for bare flags
+    comment: Optional[str] = None  # trailing // comment (define / disabled_define)
+
+
+class DefineRecord(NamedTuple):
+    """A #define or //#define occurrence"""
+    name: str
+    value: Optional[str]
+    disabled: bool
+    line: int
+    comment: Optional[str]  # preceding // comment block, joined with spaces
+    trailing_comment: Optional[str]
+    conditions: Tuple[Tuple[str, ...], ...]  # open #if chains, outermost first
+
+
+class ParsedHeader(NamedTuple):
+    """Immutable parse of one config header"""
+    path: str
+    sha256: str
+    lines: Tuple[HeaderLine, ...]
+    defines: Tuple[DefineRecord, ...]
+
+    def enabled_defines(self) -> List[DefineRecord]:
+        return [record for record in self.defines if not record.disabled]
+
+    def disabled_defines(self) -> List[DefineRecord]:
+        return [record for record in self.defines if record.disabled]
+
+
+def split_trailing_comment(text: str) -> Tuple[str, Optional[str]]:
+    """Split 'code // comment' at the first // outside a string literal"""
+    index = text.find('//')
+    if index < 0:
+        return text, None
+    if '"' in text[:index] or "'" in text[:index]:
+        quote = None
+        index = -1
+        i = 0
+        while i < len(text) - 1:
+            char = text[i]
+            if quote:
+                if char == '\\':
+                    i += 1
+                elif char == quote:
+                    quote = None
+            elif char in ('"', "'"):
+                quote = char
+            elif char == '/' and text[i + 1] == '/':
+                index = i
+                break
+            i += 1
+        if index < 0:
+            return text, None
+    return text[:index].rstrip(), text[index + 2:].strip()
+
+
+def _define_line(kind: str, line_num: int, stripped: str, body: str) -> Optional[HeaderLine]:
+    code, comment = split_trailing_comment(body)
+    match = DEFINE_BODY_RE.match(code)
+    if not match:
+        return None
+    value = match.group(2).strip() if match.group(2) else None
+    return HeaderLine(kind, line_num, stripped, match.group(1), value, comment)
+
+
+def tokenize_lines(lines: Iterable[str]) -> Iterator[HeaderLine]:
+    """
+    Classify each line exactly once.
+    Dispatches on the first characters so each line runs at most one regex.
+    """
+    for line_num, line in enumerate(lines, 1):
+        stripped = line.strip()
+
+        if not stripped:
+            yield HeaderLine(TOKEN_BLANK, line_num, stripped)
+            continue
+
+        first = stripped[0]
+        if first == '/' and stripped.startswith('//'):
+            if stripped.startswith('//#'):
+                body = stripped[2:].lstrip()
+                token = _define_line(TOKEN_DISABLED_DEFINE, line_num, stripped, body) \
+                    if body.startswith('#define') else None
+                yield token or HeaderLine(TOKEN_DISABLED_OTHER, line_num, stripped)
+            else:
+                yield HeaderLine(TOKEN_COMMENT, line_num, stripped)
+        elif first == '#':
+            if stripped.startswith(CONDITIONAL_PREFIXES):
+                yield HeaderLine(TOKEN_DIRECTIVE, line_num, stripped)
+            else:
+                token = _define_line(TOKEN_DEFINE, line_num, stripped, stripped) \
+                    if stripped.startswith('#define') else None
+                yield token or HeaderLine(TOKEN_CODE, line_num, stripped)
+        else:
+            yield HeaderLine(TOKEN_CODE, line_num, stripped)
+
+
+def build_define_records(header_lines: Iterable[HeaderLine]) -> List[DefineRecord]:
+    """Attach preceding comments and the open #if chains to every define"""
+    records = []
+    current_comment = []
+    chains: List[Tuple[str, ...]] = []
+
+    for token in header_lines:
+        kind = token.kind
+        if kind == TOKEN_COMMENT:
+            current_comment.append(token.text[2:].strip())
+        elif kind in (TOKEN_DEFINE, TOKEN_DISABLED_DEFINE):
+            records.append(DefineRecord(
+                token.name, token.value, kind == TOKEN_DISABLED_DEFINE, token.line,
+                ' '.join(current_comment) if current_comment else None,
+                token.comment, tuple(chains)
+            ))
+            current_comment = []
+        elif kind == TOKEN_DIRECTIVE:
+            text = token.text
+            if text.startswith('#endif'):
+                if chains:
+                    chains.pop()
+            elif text.startswith(('#else', '#elif ')):
+                if chains:
+                    chains[-1] = chains[-1] + (text,)
+            else:
+                chains.append((text,))
+            current_comment = []
+        elif kind == TOKEN_CODE:
+            current_comment = []
+
+    return records
+
+
+def split_source_lines(text: str) -> List[str]:
+    """Split like iterating a text-mode file (universal newlines, no phantom last line)"""
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+def parse_header_text(text: str, path: Any = '', sha256: str = '') -> ParsedHeader:
+    """Parse header source text (no caching)"""
+    header_lines = tuple(tokenize_lines(split_source_lines(text)))
+    return ParsedHeader(str(path), sha256, header_lines, tuple(build_define_records(header_lines)))
+
+
+# ---------------------------------------------------------------------------
+# Caching
+# ---------------------------------------------------------------------------
+
+# One model per header path; a new content hash replaces the old model, so
+# a long --watch session holds only the current version of each header
+_memory_cache: Dict[str, ParsedHeader] = {}
+
+
+def _path_key(config_path: Any) -> str:
+    """Stable cache key for a header path ('' for text with no path)"""
+    path = str(config_path)
+    return os.path.abspath(path) if path else ''
+
+
+def _cache_prefix(path_key: str) -> str:
+    return hashlib.sha256(path_key.encode('utf-8', errors='surrogateescape')).hexdigest()[:16]
+
+
+def _cache_file(path_key: str, sha256: str) -> Path:
+    return CACHE_DIR / f"{_cache_prefix(path_key)}-{sha256}.pickle"
+
+
+def _read_disk_cache(path_key: str, sha256: str) -> Optional[ParsedHeader]:
+    # Pickle rather than JSON: rebuilding the tuples from JSON is barely faster
+    # than re-parsing. The cache directory is local and written only by us.
+    try:
+        with open(_cache_file(path_key, sha256), 'rb') as f:
+            version, header = pickle.load(f)
+    except (OSError, EOFError, ValueError, TypeError, AttributeError, pickle.UnpicklingError):
+        return None
+    if version != MODEL_VERSION or not isinstance(header, ParsedHeader):
+        return None
+    return header
+
+
+def _write_disk_cache(path_key: str, header: ParsedHeader):
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_file = _cache_file(path_key, header.sha256)
+        temp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temp_file, 'wb') as f:
+            pickle.dump((MODEL_VERSION, header), f, protocol=pickle.HIGHEST_PROTOCOL)
+        temp_file.replace(cache_file)  # atomic, safe with parallel --jobs workers
+        _prune_disk_cache(path_key, cache_file)
+    except OSError:
+        pass  # Read-only checkout etc. - caching is best effort
+
+
+def _prune_disk_cache(path_key: str, current: Path):
+    """Remove this path's pickles for older content (and unprefixed ones from before per-path keys)"""
+    prefix = f"{_cache_prefix(path_key)}-"
+    for cache_file in CACHE_DIR.glob('*.pickle'):
+        if cache_file != current and (cache_file.name.startswith(prefix) or '-' not in cache_file.name):
+            try:
+                cache_file.unlink()
+            except OSError:
+                pass  # Removed by a parallel worker
+
+
+def load_header(config_path: Path, use_cache: bool = True) -> ParsedHeader:
+    """Parse a header file, reusing the in-memory / on-disk model when its content is unchanged"""
+    with open(config_path, 'rb') as f:
+        raw = f.read()
+    return _cached_parse(raw, config_path, use_cache)
+
+
+def load_header_lines(lines: Iterable[str], config_path: Any = '', use_cache: bool = True) -> ParsedHeader:
+    """Same as load_header for lines already read into memory"""
+    return _cached_parse(''.join(lines).encode('utf-8', errors='surrogateescape'), config_path, use_cache)
+
+
+def _cached_parse(raw: bytes, config_path: Any, use_cache: bool) -> ParsedHeader:
+    sha256 = hashlib.sha256(raw).hexdigest()
+    path_key = _path_key(config_path)
+    header = _memory_cache.get(path_key)
+    if header is not None and header.sha256 != sha256:
+        header = None
+    if header is None and use_cache:
+        header = _read_disk_cache(path_key, sha256)
+    if header is None:
+        header = parse_header_text(raw.decode('utf-8', errors='ignore'), config_path, sha256)
+        if use_cache:
+            _write_disk_cache(path_key, header)
+    _memory_cache[path_key] = header
+
+    if header.path != str(config_path):
+        header = header._replace(path=str(config_path))
+    return header
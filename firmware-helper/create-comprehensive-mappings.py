@@ -7,12 +7,42 @@ Usage:
     python create-comprehensive-mappings.py [--marlin-version 2.1.x] [--config-path path/to/config.h]
 """
 
+import io
+import os
 import re
 import json
+import hashlib
 import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout, redirect_stderr
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
-from collections import defaultdict
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Callable
+
+from config_header import (
+    TOKEN_BLANK, TOKEN_CODE, TOKEN_COMMENT, TOKEN_DEFINE, TOKEN_DIRECTIVE,
+    TOKEN_DISABLED_DEFINE, ParsedHeader, load_header, load_header_lines
+)
+from define_classifier import KeywordClassifier
+from mapping_bundle import write_bundle
+from mapping_writer import stream_mapping_outputs
+from define_index import update_define_index
+from field_registry import fields_for
+import pipeline_profile
+from preprocessor_expr import (
+    EVALUATION_ERRORS, directive_expression, fold_constant,
+    strip_directive_comment, try_compile_expression
+)
+
+# Bump when the structure or content of generated mapping files changes,
+# so build manifests from older generators are invalidated
+GENERATOR_VERSION = '2.4'
+
+# (is core, uiFieldId) of a field that maps from no define
+NOT_TAGGED = (False, None)
+
+CONDITION_IDENTIFIER_RE = re.compile(r'\b[A-Z_][A-Z0-9_]*\b')
+
 
 class ConfigParser:
     """Parse Marlin Configuration.h files and extract all #defines"""
@@ -27,40 +57,30 @@ class ConfigParser:
         
     def parse(self) -> Dict[str, Any]:
         """Parse the configuration file and extract all defines"""
-        with open(self.config_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-        
+        return self.parse_header(load_header(self.config_path))
+    
+    def parse_lines(self, lines: Iterable[str]) -> Dict[str, Any]:
+        """Parse config lines already read into memory"""
+        return self.parse_header(load_header_lines(lines, self.config_path))
+    
+    def parse_header(self, header: ParsedHeader) -> Dict[str, Any]:
+        """Extract defines from the shared parsed-header model (single pass)"""
         current_comment = []
         previous_define = None  # Track previous define for adjacency detection
         previous_line_was_blank = False
         
-        for line_num, line in enumerate(lines, 1):
-            line = line.rstrip()
-            stripped = line.strip()
-            
-            # Track blank lines
-            if not stripped:
-                previous_line_was_blank = True
-                continue
-            
-            # Track preprocessor conditionals
-            if self._is_conditional_directive(stripped):
-                self._handle_conditional(stripped, line_num)
-                previous_define = None
-                previous_line_was_blank = False
-            
+        for kind, line_num, stripped, name, value, _ in header.lines:
             # Collect comments
-            if stripped.startswith('//') and not stripped.startswith('//#'):
+            if kind == TOKEN_COMMENT:
                 current_comment.append(stripped[2:].strip())
                 previous_line_was_blank = False
-                continue
+            
+            # Track blank lines
+            elif kind == TOKEN_BLANK:
+                previous_line_was_blank = True
             
             # Parse #define statements
-            define_match = re.match(r'^\s*#define\s+(\w+)(?:\s+(.+?))?(?:\s*//.*)?$', line)
-            if define_match:
-                name = define_match.group(1)
-                value = define_match.group(2).strip() if define_match.group(2) else None
-                
+            elif kind == TOKEN_DEFINE:
                 self.defines[name] = value
                 self.line_numbers[name] = line_num
                 if current_comment:
@@ -84,14 +104,9 @@ class ConfigParser:
                 previous_define = name
                 previous_line_was_blank = False
                 current_comment = []
-                continue
             
             # Parse //#define (disabled) statements
-            disabled_match = re.match(r'^\s*//\s*#define\s+(\w+)(?:\s+(.+?))?(?:\s*//.*)?$', line)
-            if disabled_match:
-                name = disabled_match.group(1)
-                value = disabled_match.group(2).strip() if disabled_match.group(2) else None
-                
+            elif kind == TOKEN_DISABLED_DEFINE:
                 self.defines[name] = {
                     'value': value,
                     'disabled': True
@@ -105,18 +120,20 @@ class ConfigParser:
                     self.conditionals[name] = [cond for cond in self.conditional_stack]
                 
                 current_comment = []
-                continue
+            
+            # Track preprocessor conditionals
+            elif kind == TOKEN_DIRECTIVE:
+                self._handle_conditional(stripped, line_num)
+                previous_define = None
+                previous_line_was_blank = False
+                current_comment = []
             
             # Clear comments if not a define
-            if stripped and not stripped.startswith('//'):
+            elif kind == TOKEN_CODE:
                 current_comment = []
         
         return self.defines
     
-    def _is_conditional_directive(self, line: str) -> bool:
-        """Check if line is a preprocessor conditional directive"""
-        return line.startswith(('#if ', '#ifdef ', '#ifndef ', '#elif ', '#else', '#endif'))
-    
     def _handle_conditional(self, line: str, line_num: int):
         """Handle preprocessor conditional directives"""
         # #endif - pop from stack
@@ -167,13 +184,16 @@ class ConfigParser:
         if not condition_text:
             return None
         
-        # Parse complex conditions (defined(), &&, ||, !)
-        # For now, extract all identifiers as potential dependencies
-        identifiers = re.findall(r'\b[A-Z_][A-Z0-9_]*\b', condition_text)
-        
-        # Filter out common C keywords
-        keywords = {'defined', 'ENABLED', 'DISABLED', 'ANY', 'ALL', 'NONE'}
-        dependencies = [id for id in identifiers if id not in keywords]
+        # Dependencies are the defines the compiled expression reads
+        # (macro names like ENABLED/EITHER/PIN_EXISTS are not dependencies)
+        expression = try_compile_expression(condition_text)
+        if expression is not None:
+            dependencies = expression.identifiers()
+        else:
+            # Unparseable - fall back to every identifier as a potential dependency
+            identifiers = CONDITION_IDENTIFIER_RE.findall(condition_text)
+            keywords = {'defined', 'ENABLED', 'DISABLED', 'ANY', 'ALL', 'NONE'}
+            dependencies = [id for id in identifiers if id not in keywords]
         
         return {
             'expression': condition_text,
@@ -234,7 +254,7 @@ class ConfigParser:
                             else:
                                 dependencies.extend(cond['condition']['dependencies'])
             
-            info['conditionalDependencies'] = list(set(dependencies))  # Remove duplicates
+            info['conditionalDependencies'] = list(dict.fromkeys(dependencies))  # Remove duplicates, keep order
         
         return info
     
@@ -276,6 +296,235 @@ class ConfigParser:
         return 'define'
 
 
+# Companion headers that follow Configuration.h, in MarlinConfig include order
+# (TH3D's Configuration.h #includes _backend and _speed at the end)
+EFFECTIVE_COMPANION_SUFFIXES = ('_backend', '_speed', '_adv')
+
+
+class EffectiveConfigResolver:
+    """
+    Preprocess a config header set in include order, evaluating #if blocks
+    against the defines seen so far, and keep only the defines in effect.
+    Derived flags from Marlin's Conditionals_*.h (HAS_*, IS_*) are not
+    available here and evaluate as undefined.
+    """
+    
+    def __init__(self):
+        self.defines = {}  # name -> raw value (None for bare flags)
+        self.sources = {}  # name -> (file name, line number)
+        self.files = []  # headers in the order they were processed
+        self.unparsed_conditions = 0  # #if/#elif expressions that couldn't be parsed or evaluated
+        self._processed = set()
+    
+    def resolve(self, config_paths: Iterable[Path]) -> Dict[str, Any]:
+        """Process headers in order (already-#included headers are skipped)"""
+        for config_path in config_paths:
+            self.process_file(config_path)
+        return self.defines
+    
+    def process_file(self, config_path: Path):
+        resolved_path = config_path.resolve()
+        if resolved_path in self._processed:
+            return
+        self._processed.add(resolved_path)
+        self.files.append(config_path)
+        
+        # Frames: [enclosing block active, a branch already taken, this branch active]
+        frames = []
+        active = True
+        
+        for kind, line_num, stripped, name, value, _ in load_header(config_path).lines:
+            if kind == TOKEN_DIRECTIVE:
+                active = self._handle_directive(stripped, frames, active)
+            
+            elif not active:
+                continue
+            
+            elif kind == TOKEN_DEFINE:
+                self.defines[name] = value
+                self.sources[name] = (config_path.name, line_num)
+            
+            elif kind == TOKEN_CODE:
+                if stripped.startswith('#undef'):
+                    words = stripped.split()
+                    if len(words) > 1:
+                        self.defines.pop(words[1], None)
+                        self.sources.pop(words[1], None)
+                elif stripped.startswith('#include'):
+                    include_match = re.match(r'#include\s+"([^"]+)"', stripped)
+                    if include_match:
+                        include_path = config_path.parent / include_match.group(1)
+                        if include_path.exists():
+                            self.process_file(include_path)
+    
+    def _handle_directive(self, line: str, frames: List[List[bool]], active: bool) -> bool:
+        """Update the block stack for a conditional directive, return the new active state"""
+        if line.startswith('#endif'):
+            if frames:
+                return frames.pop()[0]
+            return active
+        
+        if line.startswith(('#else', '#elif ')):
+            if not frames:
+                return active
+            frame = frames[-1]
+            enclosing, taken = frame[0], frame[1]
+            if line.startswith('#else'):
+                frame[2] = enclosing and not taken
+            else:
+                frame[2] = enclosing and not taken and self._evaluate(line[6:])
+            frame[1] = taken or frame[2]
+            return frame[2]
+        
+        if line.startswith('#ifdef '):
+            test = active and self._is_defined(line[7:])
+        elif line.startswith('#ifndef '):
+            test = active and not self._is_defined(line[8:])
+        else:
+            test = active and self._evaluate(line[4:])
+        frames.append([active, test, test])
+        return test
+    
+    def _is_defined(self, text: str) -> bool:
+        words = strip_directive_comment(text).split()
+        return bool(words) and words[0] in self.defines
+    
+    def _evaluate(self, text: str) -> bool:
+        expression = directive_expression(text)
+        if expression is not None:
+            try:
+                return bool(expression.evaluate(self.defines))
+            except EVALUATION_ERRORS:
+                pass  # e.g. a negative shift count - as unknown as an unparseable condition
+        self.unparsed_conditions += 1
+        return False
+    
+    def resolved_value(self, name: str) -> Any:
+        """JSON value for a define: true for bare flags, numbers where the value evaluates to one"""
+        raw = self.defines[name]
+        if raw is None or not raw.strip():
+            return True
+        value = fold_constant(raw, self.defines)
+        return raw if value is None else value
+    
+    def to_json(self, firmware: str, version: str) -> Dict[str, Any]:
+        """Effective-config document: only the defines in effect, with resolved values"""
+        defines = {}
+        for name in self.defines:
+            file_name, line_num = self.sources[name]
+            value = self.resolved_value(name)
+            entry = {'value': value, 'file': file_name, 'line': line_num}
+            raw = (self.defines[name] or '').strip()
+            # Keep the source text unless the value reads back as it: folded from
+            # other defines, octal (02010201), hex, suffixed (1.5f, 100UL), ...
+            if raw and not isinstance(value, str) and raw != str(value):
+                entry['rawValue'] = raw
+            defines[name] = entry
+        
+        return {
+            '$schema': f'{firmware.capitalize()} Effective Configuration',
+            'version': version,
+            'firmware': firmware,
+            'configFiles': [path.name for path in self.files],
+            'generatedFrom': [str(path) for path in self.files],
+            'totalDefines': len(defines),
+            'defines': defines
+        }
+
+
+def effective_config_headers(config_path: Path) -> List[Path]:
+    """Main header followed by its existing companions (Configuration_adv.h, ...)"""
+    headers = [config_path]
+    for suffix in EFFECTIVE_COMPANION_SUFFIXES:
+        companion = config_path.with_name(f"{config_path.stem}{suffix}{config_path.suffix}")
+        if companion.exists():
+            headers.append(companion)
+    return headers
+
+
+def effective_config_path_for(firmware: str, version: str, output_dir: Path) -> Path:
+    return output_dir / firmware / version / f"{firmware}-config-effective.json"
+
+
+def write_effective_config(config_path: Path, firmware: str, version: str, output_dir: Path) -> Path:
+    """Resolve a main header plus companions and write the effective-config JSON"""
+    headers = effective_config_headers(config_path)
+    print(f"\n{'='*60}")
+    print(f"🧮 Resolving effective config for {firmware} {version}...")
+    for header in headers:
+        print(f"   • {header.name}")
+    
+    resolver = EffectiveConfigResolver()
+    resolver.resolve(headers)
+    document = resolver.to_json(firmware, version)
+    
+    output_path = effective_config_path_for(firmware, version, output_dir)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    changed = write_json_if_changed(output_path, document)
+    
+    print(f"✅ {document['totalDefines']} defines in effect (from {len(resolver.files)} header(s))")
+    if resolver.unparsed_conditions:
+        print(f"⚠️  {resolver.unparsed_conditions} conditional(s) could not be parsed or evaluated and were treated as false")
+    print(f"   {'✅' if changed else '➖'} {output_path}{'' if changed else ' (unchanged)'}")
+    return output_path
+
+
+# Define category patterns (order matters!)
+CATEGORY_PATTERNS = {
+    'basic': [
+        'CONFIGURATION_H_VERSION', 'CUSTOM_MACHINE_NAME', 'MACHINE_UUID',
+        'STRING_CONFIG_H_AUTHOR', 'SHOW_BOOTSCREEN', 'SHOW_CUSTOM_BOOTSCREEN',
+        'BAUDRATE', 'SERIAL_PORT', 'MOTHERBOARD', 'EXTRUDERS',
+        'DEFAULT_NOMINAL_FILAMENT_DIA'
+    ],
+    'hardware': [
+        'DRIVER_TYPE', 'BOARD_', 'TEMP_SENSOR', 'HEATER_',
+        'DISPLAY', 'LCD', 'CONTROLLER'
+    ],
+    'temperature': [
+        'TEMP', 'PID', 'HEATER', 'THERMAL_PROTECTION',
+        'PREHEAT', 'EXTRUDE_MINTEMP', 'BED_'
+    ],
+    'geometry': [
+        'BED_SIZE', 'MIN_POS', 'MAX_POS', 'TRAVEL_LIMITS',
+        'BED_CENTER', 'MANUAL_'
+    ],
+    'motion': [
+        'AXIS_STEPS', 'FEEDRATE', 'ACCELERATION', 'JERK',
+        'JUNCTION_DEVIATION', 'S_CURVE', 'LIN_ADVANCE'
+    ],
+    'endstops': [
+        'ENDSTOP', 'HOME_', 'USE_XMIN', 'USE_XMAX',
+        'HOMING_FEEDRATE', 'VALIDATE_HOMING'
+    ],
+    'probe': [
+        'PROBE', 'BLTOUCH', 'FIX_MOUNTED', 'NOZZLE_TO_PROBE',
+        'PROBE_OFFSET', 'Z_MIN_PROBE', 'MULTIPLE_PROBING'
+    ],
+    'bedLeveling': [
+        'BED_LEVELING', 'MESH_', 'AUTO_BED_LEVELING', 'GRID_MAX_POINTS',
+        'RESTORE_LEVELING', 'ENABLE_LEVELING_FADE', 'Z_SAFE_HOMING'
+    ],
+    'safety': [
+        'THERMAL_PROTECTION', 'PREVENT_', 'EXTRUDE_MAXLENGTH',
+        'SOFTWARE_ENDSTOPS', 'MIN_SOFTWARE', 'MAX_SOFTWARE',
+        'POWER_LOSS_RECOVERY'
+    ],
+    'features': [
+        'EEPROM', 'SDSUPPORT', 'SD_', 'EMERGENCY_PARSER',
+        'HOST_ACTION', 'PRINTCOUNTER', 'NOZZLE_PARK'
+    ],
+    'advanced': [
+        'ARC_SUPPORT', 'BEZIER', 'JUNCTION', 'INPUT_SHAPING',
+        'ADAPTIVE_', 'FILAMENT_RUNOUT', 'ADVANCED_PAUSE'
+    ]
+}
+
+# Shared across all configs processed in this interpreter, so classifications
+# of define names seen in earlier configs are reused
+CATEGORY_CLASSIFIER = KeywordClassifier(CATEGORY_PATTERNS, default='other')
+
+
 class MappingBuilder:
     """Build comprehensive mapping files from parsed configuration"""
     
@@ -285,78 +534,8 @@ class MappingBuilder:
         self.categories = self._categorize_defines()
         
     def _categorize_defines(self) -> Dict[str, List[str]]:
-        """Categorize defines into logical groups"""
-        categories = defaultdict(list)
-        
-        # Define category patterns (order matters!)
-        patterns = {
-            'basic': [
-                'CONFIGURATION_H_VERSION', 'CUSTOM_MACHINE_NAME', 'MACHINE_UUID',
-                'STRING_CONFIG_H_AUTHOR', 'SHOW_BOOTSCREEN', 'SHOW_CUSTOM_BOOTSCREEN',
-                'BAUDRATE', 'SERIAL_PORT', 'MOTHERBOARD', 'EXTRUDERS',
-                'DEFAULT_NOMINAL_FILAMENT_DIA'
-            ],
-            'hardware': [
-                'DRIVER_TYPE', 'BOARD_', 'TEMP_SENSOR', 'HEATER_',
-                'DISPLAY', 'LCD', 'CONTROLLER'
-            ],
-            'temperature': [
-                'TEMP', 'PID', 'HEATER', 'THERMAL_PROTECTION',
-                'PREHEAT', 'EXTRUDE_MINTEMP', 'BED_'
-            ],
-            'geometry': [
-                'BED_SIZE', 'MIN_POS', 'MAX_POS', 'TRAVEL_LIMITS',
-                'BED_CENTER', 'MANUAL_'
-            ],
-            'motion': [
-                'AXIS_STEPS', 'FEEDRATE', 'ACCELERATION', 'JERK',
-                'JUNCTION_DEVIATION', 'S_CURVE', 'LIN_ADVANCE'
-            ],
-            'endstops': [
-                'ENDSTOP', 'HOME_', 'USE_XMIN', 'USE_XMAX',
-                'HOMING_FEEDRATE', 'VALIDATE_HOMING'
-            ],
-            'probe': [
-                'PROBE', 'BLTOUCH', 'FIX_MOUNTED', 'NOZZLE_TO_PROBE',
-                'PROBE_OFFSET', 'Z_MIN_PROBE', 'MULTIPLE_PROBING'
-            ],
-            'bedLeveling': [
-                'BED_LEVELING', 'MESH_', 'AUTO_BED_LEVELING', 'GRID_MAX_POINTS',
-                'RESTORE_LEVELING', 'ENABLE_LEVELING_FADE', 'Z_SAFE_HOMING'
-            ],
-            'safety': [
-                'THERMAL_PROTECTION', 'PREVENT_', 'EXTRUDE_MAXLENGTH',
-                'SOFTWARE_ENDSTOPS', 'MIN_SOFTWARE', 'MAX_SOFTWARE',
-                'POWER_LOSS_RECOVERY'
-            ],
-            'features': [
-                'EEPROM', 'SDSUPPORT', 'SD_', 'EMERGENCY_PARSER',
-                'HOST_ACTION', 'PRINTCOUNTER', 'NOZZLE_PARK'
-            ],
-            'advanced': [
-                'ARC_SUPPORT', 'BEZIER', 'JUNCTION', 'INPUT_SHAPING',
-                'ADAPTIVE_', 'FILAMENT_RUNOUT', 'ADVANCED_PAUSE'
-            ]
-        }
-        
-        # Categorize each define
-        for define_name in self.parser.defines.keys():
-            categorized = False
-            
-            for category, keywords in patterns.items():
-                for keyword in keywords:
-                    if keyword in define_name:
-                        categories[category].append(define_name)
-                        categorized = True
-                        break
-                if categorized:
-                    break
-            
-            # Uncategorized goes to 'other'
-            if not categorized:
-                categories['other'].append(define_name)
-        
-        return dict(categories)
+        """Categorize defines into logical groups (first matching category wins)"""
+        return CATEGORY_CLASSIFIER.classify_all(self.parser.defines.keys())
     
     def build_mapping(self, category: str) -> Dict[str, Any]:
         """Build mapping for a specific category"""
@@ -452,13 +631,33 @@ class MappingBuilder:
         return all_mappings
     
     def split_by_line_count(self, mapping: Dict, max_lines: int = 900) -> List[Tuple[str, Dict]]:
-        """Split mapping into multiple parts if too large"""
+        """
+        Split mapping into multiple parts if too large.
+        Each field's indent=2 line cost is computed once (json_line_count) and
+        fields are packed into parts in a single pass - nothing is serialized.
+        """
         parts = []
         current_part = {}
         current_lines = 50  # Header overhead
         part_num = 1
         
+        def add_block(key: str, fields: Dict, field_lines: int):
+            nonlocal current_part, current_lines, part_num
+            # {"key": {...fields...}} -> outer braces + key line + closing brace
+            block_lines = 4 + field_lines if fields else 3
+            
+            if current_lines + block_lines > max_lines and current_part:
+                parts.append((f'-part{part_num}', current_part))
+                current_part = {}
+                current_lines = 50
+                part_num += 1
+            
+            current_part[key] = fields
+            current_lines += block_lines
+        
         for category, fields in mapping.items():
+            field_costs = [json_line_count(value) for value in fields.values()]
+            
             # If category has too many fields, split it
             if len(fields) > 50:  # Large category
                 # Split large category into chunks
@@ -466,30 +665,11 @@ class MappingBuilder:
                 chunk_size = 30
                 for i in range(0, len(field_items), chunk_size):
                     chunk = dict(field_items[i:i+chunk_size])
-                    chunk_json = json.dumps({f"{category}_{i//chunk_size + 1}": chunk}, indent=2)
-                    chunk_lines = len(chunk_json.split('\n'))
-                    
-                    if current_lines + chunk_lines > max_lines and current_part:
-                        parts.append((f'-part{part_num}', dict(current_part)))
-                        current_part = {}
-                        current_lines = 50
-                        part_num += 1
-                    
-                    current_part[f"{category}_{i//chunk_size + 1}"] = chunk
-                    current_lines += chunk_lines
+                    add_block(f"{category}_{i//chunk_size + 1}", chunk,
+                              sum(field_costs[i:i+chunk_size]))
             else:
                 # Small category - add as-is
-                category_json = json.dumps({category: fields}, indent=2)
-                category_lines = len(category_json.split('\n'))
-                
-                if current_lines + category_lines > max_lines and current_part:
-                    parts.append((f'-part{part_num}', dict(current_part)))
-                    current_part = {}
-                    current_lines = 50
-                    part_num += 1
-                
-                current_part[category] = fields
-                current_lines += category_lines
+                add_block(category, fields, sum(field_costs))
         
         # Add final part
         if current_part:
@@ -498,6 +678,19 @@ class MappingBuilder:
         return parts if parts else [('', mapping)]
 
 
+def json_line_count(value: Any) -> int:
+    """Number of lines json.dumps(value, indent=2) produces, without serializing"""
+    if isinstance(value, dict):
+        if not value:
+            return 1
+        return 2 + sum(json_line_count(child) for child in value.values())
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return 1
+        return 2 + sum(json_line_count(child) for child in value)
+    return 1
+
+
 def load_ui_metadata(analysis_file: Path) -> Dict[str, Dict[str, Any]]:
     """Load UI metadata from TAB_FIELD_ANALYSIS.md"""
     # TODO: Implement parsing of TAB_FIELD_ANALYSIS.md
@@ -533,42 +726,250 @@ def scan_config_directory(base_dir: Path = Path('new configs')) -> List[Tuple[st
             for config_file in version_dir.glob('*.h'):
                 config_files.append((firmware_type, version, config_file))
     
-    return config_files
+    # Stable order so scan output (and --jobs logs) are deterministic
+    return sorted(config_files, key=lambda item: (item[0], item[1], item[2].name))
+
+
+def resolve_job_count(requested: int, job_total: int) -> int:
+    """Number of worker processes for --jobs (0 = one per CPU core)"""
+    if requested <= 0:
+        requested = os.cpu_count() or 1
+    return max(1, min(requested, job_total))
+
+
+def run_scan_jobs(worker: Callable[[tuple], Tuple[bool, str]], jobs: List[tuple],
+                  max_workers: int) -> List[Tuple[tuple, bool]]:
+    """
+    Fan jobs out over a process pool. worker(job) returns (ok, captured_log).
+    Each job's log is printed whole and in job order, so progress output from
+    parallel jobs is never interleaved. Returns [(job, ok), ...] in job order.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for job, (ok, log) in zip(jobs, executor.map(worker, jobs)):
+            print(log, end='', flush=True)
+            results.append((job, ok))
+    return results
+
+
+def print_scan_summary(results: List[Tuple[tuple, bool]], output_dir: Path):
+    """Print aggregated per-config results of a scan"""
+    failed = [job for job, ok in results if not ok]
+    print(f"\n{'='*60}")
+    print(f"📊 Scan Summary")
+    for job, ok in results:
+        config_path, firmware, version = job[0], job[1], job[2]
+        print(f"   {'✅' if ok else '❌'} {firmware}/{version}/{config_path.name}")
+    print(f"\n   Succeeded: {len(results) - len(failed)}/{len(results)}")
+    if failed:
+        print(f"   Failed: {len(failed)}")
+    print(f"   Output: {output_dir}/")
+
+
+def write_version_bundles(versions: Iterable[Tuple[str, str]], output_dir: Path):
+    """Rebuild the compact mapping bundle of each processed firmware/version, then the define index"""
+    versions = list(dict.fromkeys(versions))
+    print(f"\n📦 Writing mapping bundles...")
+    for firmware, version in versions:
+        with pipeline_profile.stage('bundle', f"{firmware}/{version}") as counts:
+            bundle_path = write_bundle(output_dir / firmware / version, firmware, version)
+            if bundle_path is None:
+                print(f"   ⚠️  No full/ mappings for {firmware}/{version}, bundle skipped")
+            else:
+                counts.add(records=1)
+                counts.add_files([bundle_path])
+    with pipeline_profile.stage('define index') as counts:
+        index_path = update_define_index(output_dir, versions)
+        counts.add(records=len(versions))
+        counts.add_files([index_path])
+
+
+def process_scan_job(job: tuple) -> Tuple[bool, str]:
+    """Pool worker: run process_single_config for one scan job, capturing its output"""
+    config_path, firmware, version, output_dir, max_lines, skip_organization, force = job
+    buffer = io.StringIO()
+    ok = True
+    with redirect_stdout(buffer), redirect_stderr(buffer):
+        try:
+            process_single_config(config_path, firmware, version,
+                                  output_dir, max_lines, skip_organization, force=force)
+        except Exception as e:
+            print(f"\n❌ Error processing {config_path}: {e}")
+            traceback.print_exc()
+            ok = False
+    return ok, buffer.getvalue()
+
+
+def config_output_suffix(config_path: Path) -> str:
+    """File name suffix (-adv, -backend, -speed) for a config header's mapping outputs"""
+    source_name = config_path.stem.replace('example-', '').replace('example-th3d-ender5plus-', '')
+    if '_adv' in source_name:
+        return '-adv'
+    elif '_backend' in source_name:
+        return '-backend'
+    elif '_speed' in source_name:
+        return '-speed'
+    return ''
+
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def build_manifest_key(config_path: Path, max_lines: int, skip_organization: bool,
+                       stage_names: Optional[List[str]] = None,
+                       firmware: Optional[str] = None) -> Dict[str, Any]:
+    """Everything that determines a config's mapping outputs"""
+    try:
+        registry_hash = fields_for(firmware).sha256
+    except Exception:
+        registry_hash = None
+    
+    return {
+        'inputSha256': hashlib.sha256(config_path.read_bytes()).hexdigest(),
+        'generatorVersion': GENERATOR_VERSION,
+        'maxLines': max_lines,
+        'skipOrganization': skip_organization,
+        'fieldRegistrySha256': registry_hash,
+        'stages': list(stage_names or []),
+    }
+
+
+def manifest_path_for(config_path: Path, firmware: str, version: str, output_dir: Path) -> Path:
+    """Build manifest location for a config (one per config, safe for --jobs)"""
+    return output_dir / firmware / version / f"{firmware}-config{config_output_suffix(config_path)}-manifest.json"
+
+
+def load_manifest(manifest_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def is_config_up_to_date(config_path: Path, firmware: str, version: str, output_dir: Path,
+                         max_lines: int, skip_organization: bool = False,
+                         stage_names: Optional[List[str]] = None) -> bool:
+    """True if the manifest matches the current inputs and all recorded outputs exist"""
+    key = build_manifest_key(config_path, max_lines, skip_organization, stage_names, firmware)
+    return manifest_is_current(manifest_path_for(config_path, firmware, version, output_dir), key)
+
+
+def manifest_is_current(manifest_path: Path, key: Dict[str, Any]) -> bool:
+    manifest = load_manifest(manifest_path)
+    if not manifest or manifest.get('key') != key:
+        return False
+    
+    output_base = manifest_path.parent
+    return all((output_base / name).exists() for name in manifest.get('outputs', []))
+
+
+def write_json_if_changed(path: Path, data: Any) -> bool:
+    """Write data as indent=2 JSON only if the file content differs; returns True if written"""
+    text = json.dumps(data, indent=2)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return True
+
+
+def save_manifest(manifest_path: Path, key: Dict[str, Any], outputs: List[Path]):
+    """Record the build key and outputs; remove outputs the previous build made but this one didn't"""
+    output_base = manifest_path.parent
+    names = [output.relative_to(output_base).as_posix() for output in outputs]
+    
+    previous = load_manifest(manifest_path) or {}
+    for stale in set(previous.get('outputs', [])) - set(names):
+        stale_path = output_base / stale
+        if stale_path.exists():
+            stale_path.unlink()
+            print(f"   🗑️  Removed stale {stale}")
+    
+    write_json_if_changed(manifest_path, {'key': key, 'outputs': names})
+
+
+def record_completed_stages(config_path: Path, firmware: str, version: str, output_dir: Path,
+                            max_lines: int, stage_names: List[str], skip_organization: bool = False):
+    """
+    Re-key the manifest pass 1 saved so it also covers passes run afterwards in
+    other processes. Call only once every one of those passes has succeeded -
+    until then the manifest does not match their key and the config is rebuilt.
+    """
+    manifest_path = manifest_path_for(config_path, firmware, version, output_dir)
+    manifest = load_manifest(manifest_path)
+    if manifest is None:
+        return
+    key = build_manifest_key(config_path, max_lines, skip_organization, stage_names, firmware)
+    write_json_if_changed(manifest_path, {'key': key, 'outputs': manifest.get('outputs', [])})
 
 
 def process_single_config(config_path: Path, firmware: str, version: str, 
-                         output_dir: Path, max_lines: int, skip_organization: bool = False):
-    """Process a single configuration file and generate mappings with organized structure"""
+                         output_dir: Path, max_lines: int, skip_organization: bool = False,
+                         header: Optional[ParsedHeader] = None,
+                         stages: Optional[List[Tuple[str, Callable[[Dict], int]]]] = None,
+                         force: bool = False):
+    """
+    Process a single configuration file and generate mappings with organized structure.
+    
+    header: already-loaded config_header model of config_path (shared with other passes)
+    stages: (description, fn) passes applied to each in-memory part before anything
+            is written; fn mutates the part dict and returns the number of fields updated
+    force: regenerate even if the build manifest says outputs are up to date
+    """
+    stage_names = [description for description, _ in stages or []]
+    manifest_key = build_manifest_key(config_path, max_lines, skip_organization, stage_names, firmware)
+    manifest_path = manifest_path_for(config_path, firmware, version, output_dir)
+    
+    if not force and manifest_is_current(manifest_path, manifest_key):
+        print(f"\n⏭️  Unchanged: {config_path.name} ({firmware} {version}) - outputs up to date")
+        return
+    
     print(f"\n{'='*60}")
     print(f"🔧 Parsing {config_path.name}...")
     print(f"   Firmware: {firmware}")
     print(f"   Version: {version}")
     
     config_parser = ConfigParser(config_path)
-    defines = config_parser.parse()
+    with pipeline_profile.stage('parse', config_path) as counts:
+        defines = config_parser.parse() if header is None else config_parser.parse_header(header)
+        counts.add(records=len(defines))
     print(f"✅ Found {len(defines)} #define statements")
     
     print(f"\n📊 Building comprehensive mappings...")
     ui_metadata = load_ui_metadata(Path('assets/js/profile-renderer/TAB_FIELD_ANALYSIS.md'))
-    builder = MappingBuilder(config_parser, ui_metadata)
-    all_mappings = builder.build_all_mappings()
+    with pipeline_profile.stage('categorize', config_path) as counts:
+        builder = MappingBuilder(config_parser, ui_metadata)
+        counts.add(records=len(defines))
+    with pipeline_profile.stage('build', config_path) as counts:
+        all_mappings = builder.build_all_mappings()
+        counts.add(records=sum(len(fields) for fields in all_mappings.values()))
     
     print(f"✅ Created {len(all_mappings)} category mappings:")
     for category, fields in all_mappings.items():
         print(f"   • {category}: {len(fields)} fields")
     
     print(f"\n✂️  Splitting into parts (<{max_lines} lines each)...")
-    parts = builder.split_by_line_count(all_mappings, max_lines)
+    with pipeline_profile.stage('split', config_path) as counts:
+        parts = builder.split_by_line_count(all_mappings, max_lines)
+        counts.add(records=len(parts))
     
-    # Extract source filename for naming
-    source_name = config_path.stem.replace('example-', '').replace('example-th3d-ender5plus-', '')
-    config_suffix = ''
-    if '_adv' in source_name:
-        config_suffix = '-adv'
-    elif '_backend' in source_name:
-        config_suffix = '-backend'
-    elif '_speed' in source_name:
-        config_suffix = '-speed'
+    # In-process passes (conditionals, validation) run on the in-memory parts
+    # before anything is written.
+    for description, stage in stages or []:
+        print(f"\n🔗 {description}...")
+        updated = sum(stage(mapping_data) for _, mapping_data in parts)
+        print(f"   ✅ Updated {updated} fields")
+    
+    config_suffix = config_output_suffix(config_path)
+    part_names = [f"{firmware}-config{config_suffix}-mapping{part_suffix}.json"
+                  for part_suffix, _ in parts]
     
     # Metadata for output files
     metadata = {
@@ -586,18 +987,13 @@ def process_single_config(config_path: Path, firmware: str, version: str,
         output_base.mkdir(parents=True, exist_ok=True)
         
         print(f"\n💾 Saving {len(parts)} mapping file(s) to {output_base}/...")
-        for part_suffix, mapping_data in parts:
-            filename = f"{firmware}-config{config_suffix}-mapping{part_suffix}.json"
-            output_path = output_base / filename
-            
-            output_data = {**metadata, **mapping_data}
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, indent=2)
-            
-            lines = len(open(output_path).readlines())
-            print(f"   ✅ {filename} ({lines} lines)")
+        with pipeline_profile.stage('write', config_path) as counts:
+            written = stream_mapping_outputs(parts, metadata, [output_base / name for name in part_names])
+            counts.add(records=len(defines))
+            counts.add_files(path for path, _, _ in written['parts'])
+        print_part_results(written['parts'])
         
+        save_manifest(manifest_path, manifest_key, [path for path, _, _ in written['parts']])
         print(f"✨ Complete! Generated mappings for {firmware} {version}")
         print(f"📁 Output location: {output_base}/")
         return
@@ -612,76 +1008,63 @@ def process_single_config(config_path: Path, firmware: str, version: str,
     full_dir.mkdir(parents=True, exist_ok=True)
     core_dir.mkdir(parents=True, exist_ok=True)
     
-    # Step 1: Save part files to full/ directory
-    print(f"\n💾 Step 1: Saving {len(parts)} part file(s) to full/...")
-    for part_suffix, mapping_data in parts:
-        filename = f"{firmware}-config{config_suffix}-mapping{part_suffix}.json"
-        output_path = full_dir / filename
-        
-        output_data = {**metadata, **mapping_data}
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2)
-        
-        lines = len(open(output_path).readlines())
-        print(f"   ✅ {filename} ({lines} lines)")
-    
-    # Step 2: Create consolidated full mapping
-    print(f"\n📦 Step 2: Creating consolidated full mapping...")
-    consolidated_full = consolidate_parts(parts, metadata)
     full_filename = f"{firmware}-config{config_suffix}-mapping-full.json"
-    full_path = full_dir / full_filename
-    
-    with open(full_path, 'w', encoding='utf-8') as f:
-        json.dump(consolidated_full, f, indent=2)
-    
-    print(f"   ✅ {full_filename} ({consolidated_full.get('totalDefines', 0)} defines)")
+    core_filename = f"{firmware}-config{config_suffix}-mapping-core.json"
     
-    # Step 3: Split into core and full versions
-    print(f"\n🎯 Step 3: Splitting core fields from full mapping...")
+    # Core field selection and UI field ids (field-registry.json), applied while streaming
+    print(f"\n🎯 Loading core field definitions...")
     try:
-        core_fields = load_core_fields()
-        print(f"   ✅ Loaded {len(core_fields)} core field definitions")
+        registry_fields = fields_for(firmware)
+        print(f"   ✅ Loaded {len(registry_fields.core_fields)} core field definitions, "
+              f"{len(registry_fields.ui_fields)} UI field mappings")
     except Exception as e:
-        print(f"   ⚠️  Warning: Could not load CORE_FIELDS: {e}")
+        registry_fields = None
+        print(f"   ⚠️  Warning: Could not load field registry: {e}")
         print(f"   ⏭️  Skipping core/full split")
-        return
     
-    core_mapping, full_mapping = split_into_core_and_full(consolidated_full, core_fields)
-    core_count = core_mapping.get('coreDefines', 0)
-    print(f"   ✅ Extracted {core_count} core fields")
+    # Core flag + uiFieldId of every field, resolved in one pass over all parts
+    # (passes 4 and 5 - core split and UI field ids - are applied while writing)
+    with pipeline_profile.stage('core split + ui tagging', config_path) as counts:
+        tags = registry_fields.tag_fields(
+            field for _, part in parts for fields in part.values() for field in fields.values()
+        ) if registry_fields is not None else {}
+        counts.add(records=len(tags))
     
-    # Save updated full mapping (with fullDefines count)
-    with open(full_path, 'w', encoding='utf-8') as f:
-        json.dump(full_mapping, f, indent=2)
-    print(f"   ✅ Updated {full_filename} with fullDefines metadata")
+    # One pass writes the part files, the consolidated full file and the core
+    # file; each field is serialized once and never copied into merged dicts
+    print(f"\n💾 Writing {len(parts)} part file(s) + {full_filename} to full/"
+          f"{f' and {core_filename} to core/' if registry_fields is not None else ''}...")
+    with pipeline_profile.stage('write', config_path) as counts:
+        written = stream_mapping_outputs(
+            parts, metadata, [full_dir / name for name in part_names],
+            full_path=full_dir / full_filename,
+            core_path=core_dir / core_filename if registry_fields is not None else None,
+            is_core=(lambda field: tags.get(id(field), NOT_TAGGED)[0]) if registry_fields is not None else None,
+            ui_field_id=lambda field: tags.get(id(field), NOT_TAGGED)[1],
+        )
+        counts.add(records=len(defines) + written['coreDefines'])
+        counts.add_files([path for path, _, _ in written['parts']] + [written['full'][0]]
+                         + ([written['core'][0]] if 'core' in written else []))
+    print_part_results(written['parts'])
     
-    # Step 4: Save core mapping
-    print(f"\n💎 Step 4: Saving core mapping to core/...")
-    core_filename = f"{firmware}-config{config_suffix}-mapping-core.json"
-    core_path = core_dir / core_filename
+    outputs = [path for path, _, _ in written['parts']]
+    full_path, full_changed = written['full']
+    outputs.append(full_path)
+    print(f"   {'✅' if full_changed else '➖'} {full_filename} ({len(defines)} defines"
+          f"{'' if full_changed else ', unchanged'})")
     
-    with open(core_path, 'w', encoding='utf-8') as f:
-        json.dump(core_mapping, f, indent=2)
+    core_count = written['coreDefines']
+    ui_count = written['uiFields']
+    if 'core' in written:
+        core_path, core_changed = written['core']
+        outputs.append(core_path)
+        print(f"   {'✅' if core_changed else '➖'} core/{core_filename} ({core_count} core defines, "
+              f"{ui_count} UI mappings{'' if core_changed else ', unchanged'})")
     
-    print(f"   ✅ {core_filename} ({core_count} core defines)")
+    save_manifest(manifest_path, manifest_key, outputs)
     
-    # Step 5: Add UI field mappings to core files
-    print(f"\n🎨 Step 5: Adding UI field mappings to core file...")
-    try:
-        ui_mappings = load_ui_mappings()
-        print(f"   ✅ Loaded {len(ui_mappings)} UI field mappings")
-        
-        ui_count = add_ui_mappings_to_core(core_mapping, ui_mappings)
-        
-        # Save updated core mapping with UI fields
-        with open(core_path, 'w', encoding='utf-8') as f:
-            json.dump(core_mapping, f, indent=2)
-        
-        print(f"   ✅ Added {ui_count} UI field mappings to core file")
-    except Exception as e:
-        print(f"   ⚠️  Warning: Could not add UI mappings: {e}")
-        print(f"   ℹ️  Core file saved without UI mappings")
+    if registry_fields is None:
+        return
     
     # Final summary
     print(f"\n{'='*60}")
@@ -692,118 +1075,16 @@ def process_single_config(config_path: Path, firmware: str, version: str,
     print(f"   │   ├── {len(parts)} part file(s)")
     print(f"   │   └── {full_filename} ({len(defines)} total defines)")
     print(f"   └── core/")
-    print(f"       └── {core_filename} ({core_count} core defines, {ui_count if 'ui_count' in locals() else 0} UI mappings)")
+    print(f"       └── {core_filename} ({core_count} core defines, {ui_count} UI mappings)")
     print(f"{'='*60}")
 
 
-# Load CORE_FIELDS from split-core-mappings.py
-def load_core_fields() -> set:
-    """Load CORE_FIELDS set from split-core-mappings.py"""
-    from importlib import util
-    spec = util.spec_from_file_location("split_core_mappings", 
-                                        Path(__file__).parent / "split-core-mappings.py")
-    module = util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module.CORE_FIELDS
-
-
-# Load UI_FIELD_MAPPINGS from add-ui-mappings.py
-def load_ui_mappings() -> Dict[str, str]:
-    """Load UI_FIELD_MAPPINGS from add-ui-mappings.py"""
-    from importlib import util
-    spec = util.spec_from_file_location("add_ui_mappings",
-                                        Path(__file__).parent / "add-ui-mappings.py")
-    module = util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module.UI_FIELD_MAPPINGS
-
-
-def split_into_core_and_full(full_mapping: Dict, core_fields: set) -> Tuple[Dict, Dict]:
-    """Split mapping into core (essential) and full (complete) versions"""
-    core_mapping = {}
-    full_mapping_copy = {}
-    
-    metadata_keys = {'$schema', 'version', 'firmware', 'configFile', 'generatedFrom', 'totalDefines'}
-    
-    for key, value in full_mapping.items():
-        if key in metadata_keys:
-            core_mapping[key] = value
-            full_mapping_copy[key] = value
-            continue
-        
-        if not isinstance(value, dict):
-            continue
-        
-        # Check each field in this category
-        core_category = {}
-        full_category = {}
-        
-        for field_name, field_data in value.items():
-            if not isinstance(field_data, dict):
-                continue
-            
-            # Check if any of the mapsFrom defines are in core fields
-            maps_from = field_data.get('mapsFrom', [])
-            is_core = any(define in core_fields for define in maps_from)
-            
-            full_category[field_name] = field_data
-            if is_core:
-                core_category[field_name] = field_data
-        
-        if full_category:
-            full_mapping_copy[key] = full_category
-        if core_category:
-            core_mapping[key] = core_category
-    
-    # Add core field count (only count dict categories, exclude metadata)
-    core_count = sum(len(cat) for key, cat in core_mapping.items()
-                    if isinstance(cat, dict) and key not in metadata_keys)
-    core_mapping['coreDefines'] = core_count
-    full_mapping_copy['fullDefines'] = full_mapping_copy['totalDefines']
-    
-    return core_mapping, full_mapping_copy
-
-
-def add_ui_mappings_to_core(core_mapping: Dict, ui_mappings: Dict[str, str]) -> int:
-    """Add uiFieldId properties to core mapping fields"""
-    updated_count = 0
-    metadata_keys = {'$schema', 'version', 'firmware', 'configFile', 'generatedFrom', 
-                     'totalDefines', 'coreDefines', 'fullDefines'}
-    
-    for category_name, category_fields in core_mapping.items():
-        if category_name in metadata_keys or not isinstance(category_fields, dict):
-            continue
-        
-        for field_name, field_data in category_fields.items():
-            if not isinstance(field_data, dict):
-                continue
-            
-            maps_from = field_data.get('mapsFrom', [])
-            if not maps_from:
-                continue
-            
-            define_name = maps_from[0]
-            if define_name in ui_mappings:
-                field_data['uiFieldId'] = ui_mappings[define_name]
-                updated_count += 1
-    
-    return updated_count
-
-
-def consolidate_parts(parts: List[Tuple[str, Dict]], metadata: Dict) -> Dict:
-    """Consolidate part files into single full mapping"""
-    consolidated = dict(metadata)
-    
-    for _, part_data in parts:
-        for category, fields in part_data.items():
-            if category in consolidated:
-                # Merge with existing category
-                if isinstance(consolidated[category], dict) and isinstance(fields, dict):
-                    consolidated[category].update(fields)
-            else:
-                consolidated[category] = fields
-    
-    return consolidated
+def print_part_results(part_results: List[Tuple[Path, bool, int]]):
+    for path, changed, lines in part_results:
+        if changed:
+            print(f"   ✅ {path.name} ({lines} lines)")
+        else:
+            print(f"   ➖ {path.name} (unchanged)")
 
 
 def main():
@@ -818,15 +1099,28 @@ Examples:
   # Scan specific firmware/version
   python create-comprehensive-mappings.py --scan --firmware marlin --version 2.1.x
   
+  # Scan using 4 parallel worker processes
+  python create-comprehensive-mappings.py --scan --jobs 4
+  
   # Process single config file (manual mode)
   python create-comprehensive-mappings.py --config path/to/Configuration.h --version 2.1.x --firmware marlin
   
+  # Write only the defines in effect (Configuration.h + _adv/_backend/_speed resolved together)
+  python create-comprehensive-mappings.py --scan --effective
+  
+  # Time every stage of every config (writes mapping-profile.json)
+  python create-comprehensive-mappings.py --scan --force --profile
+  
 Automated Workflow:
+  - Skips configs whose build manifest matches (header SHA-256, generator
+    version, --max-lines, core/UI field sets); use --force to rebuild
+  - Only rewrites output files whose content changed
   - Creates full/ and core/ subdirectories
   - Generates part files in full/
   - Creates consolidated -full.json files
   - Splits core fields into core/ directory
   - Adds UI field mappings to core files
+  - Packs each firmware/version into {firmware}-mapping-bundle.json
         """
     )
     
@@ -851,8 +1145,28 @@ Automated Workflow:
                        help='Maximum lines per mapping file')
     parser.add_argument('--skip-organization', action='store_true',
                        help='Skip automatic core/full organization (legacy mode)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                       help='Parallel worker processes in scan mode (0 = one per CPU core)')
+    parser.add_argument('--force', action='store_true',
+                       help='Regenerate even if the build manifest shows the config is unchanged')
+    parser.add_argument('--effective', action='store_true',
+                       help='Write {firmware}-config-effective.json with only the defines in effect '
+                            '(evaluates #if blocks across Configuration.h and its companion headers)')
+    pipeline_profile.add_arguments(parser)
     
     args = parser.parse_args()
+    pipeline_profile.resolve_arguments(args)
+    
+    if args.profile:
+        pipeline_profile.enable(not args.no_trace_memory, cprofile=args.cprofile is not None)
+    try:
+        run_generator(args, parser)
+    finally:
+        pipeline_profile.finish(args.profile_report, args.cprofile)
+
+
+def run_generator(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    """Scan or manual mode of main() (split out so --profile can wrap it)"""
     
     # SCAN MODE: Auto-discover and process config files
     if args.scan:
@@ -884,17 +1198,44 @@ Automated Workflow:
         for firmware, version, path in config_files:
             print(f"   • {firmware}/{version}/{path.name}")
         
-        # Process each config file
-        for firmware, version, config_path in config_files:
-            try:
-                process_single_config(config_path, firmware, version, 
-                                     args.output_dir, args.max_lines, args.skip_organization)
-            except Exception as e:
-                print(f"\n❌ Error processing {config_path}: {e}")
-                import traceback
-                traceback.print_exc()
-                continue
+        if args.effective:
+            # Companion headers are pulled in by their main Configuration.h
+            for firmware, version, config_path in config_files:
+                if config_output_suffix(config_path) == '':
+                    write_effective_config(config_path, firmware, version, args.output_dir)
+            return
+        
+        jobs = [(config_path, firmware, version, args.output_dir, args.max_lines,
+                 args.skip_organization, args.force)
+                for firmware, version, config_path in config_files]
+        workers = resolve_job_count(args.jobs, len(jobs))
+        if workers > 1 and args.profile:
+            # Stage records live in this process; parallel workers would also skew the timings
+            print(f"⏱️  --profile: processing serially instead of with {workers} jobs")
+            workers = 1
         
+        if workers > 1:
+            # Parallel: each config is independent and writes its own firmware/version tree
+            print(f"\n⚡ Processing with {workers} parallel jobs...")
+            results = run_scan_jobs(process_scan_job, jobs, workers)
+        else:
+            # Process each config file
+            results = []
+            for job in jobs:
+                config_path, firmware, version = job[0], job[1], job[2]
+                try:
+                    process_single_config(config_path, firmware, version, 
+                                         args.output_dir, args.max_lines, args.skip_organization,
+                                         force=args.force)
+                    results.append((job, True))
+                except Exception as e:
+                    print(f"\n❌ Error processing {config_path}: {e}")
+                    traceback.print_exc()
+                    results.append((job, False))
+        
+        print_scan_summary(results, args.output_dir)
+        if not args.skip_organization:
+            write_version_bundles(((f, v) for f, v, _ in config_files), args.output_dir)
         print(f"\n{'='*60}")
         print(f"🎉 All done! Processed {len(config_files)} configuration file(s)")
         
@@ -916,9 +1257,16 @@ Automated Workflow:
             print("   Options: marlin or th3d")
             return
         
+        if args.effective:
+            write_effective_config(args.config, args.firmware, args.version, args.output_dir)
+            return
+        
         # Process single config file
         process_single_config(args.config, args.firmware, args.version,
-                             args.output_dir, args.max_lines, args.skip_organization)
+                             args.output_dir, args.max_lines, args.skip_organization,
+                             force=args.force)
+        if not args.skip_organization:
+            write_version_bundles([(args.firmware, args.version)], args.output_dir)
 
 
 if __name__ == '__main__':
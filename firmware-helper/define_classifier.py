@@ -0,0 +1,63 @@
+"""
+Keyword Classifier - shared define categorization
+Assigns #define names to categories by keyword substring, first category wins.
+
+Used by create-comprehensive-mappings.py (MappingBuilder) and
+check-missing-mappings.py (categorize_unmapped).
+
+Each category's keywords are compiled into one alternation regex, so a name
+is scanned once per category instead of once per keyword. Results are
+memoized on the classifier instance, so a shared instance reuses them across
+every config in a scan.
+"""
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+
+class KeywordClassifier:
+    """First-match-wins substring classifier with a precompiled matcher"""
+
+    def __init__(self, patterns: Dict[str, List[str]], default: str = 'other',
+                 ignore_case: bool = False):
+        """
+        patterns: ordered {category: [keywords]} - earlier categories (and earlier
+                  keywords within a category) take priority, like the nested loop
+        default: category for names that match no keyword
+        ignore_case: compare lower-cased names against lower-cased keywords
+        """
+        self.default = default
+        self.ignore_case = ignore_case
+        self.categories = list(patterns.keys())
+        self._cache: Dict[str, str] = {}
+
+        # One matcher per category, checked in priority order like the nested loop
+        self._matchers: List[Tuple[str, re.Pattern]] = []
+        for category, keywords in patterns.items():
+            if ignore_case:
+                keywords = [keyword.lower() for keyword in keywords]
+            if keywords:
+                pattern = re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+                self._matchers.append((category, pattern))
+
+    def classify(self, name: str) -> str:
+        """Return the category for a single define name"""
+        category = self._cache.get(name)
+        if category is None:
+            category = self._classify(name)
+            self._cache[name] = category
+        return category
+
+    def _classify(self, name: str) -> str:
+        text = name.lower() if self.ignore_case else name
+        for category, pattern in self._matchers:
+            if pattern.search(text):
+                return category
+        return self.default
+
+    def classify_all(self, names: Iterable[str]) -> Dict[str, List[str]]:
+        """Group names by category (categories in first-seen order, names in input order)"""
+        groups: Dict[str, List[str]] = {}
+        for name in names:
+            groups.setdefault(self.classify(name), []).append(name)
+        return groups
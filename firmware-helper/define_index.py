@@ -0,0 +1,269 @@
+"""
+Define Index - where every #define is mapped, across all generated maps
+Maps each define name to every field that lists it in mapsFrom, over all
+firmware/version directories:
+
+    define -> [(firmware, version, file, category, fieldKey, uiFieldId), ...]
+
+The index is written to {maps_dir}/define-index.json by the mapping pipeline
+(after the per-version bundles), so tools can answer "where is X mapped"
+with one dict lookup instead of loading every mapping JSON.
+
+Usage:
+    python firmware-helper/define_index.py USER_PRINTER_NAME
+    python firmware-helper/define_index.py USER_PRINTER_NAME --firmware th3d
+    python firmware-helper/define_index.py --rebuild
+"""
+
+import json
+import argparse
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from mapping_bundle import MappingBundle, build_bundle, bundle_file_name, iter_version_dirs
+
+INDEX_FILE_NAME = 'define-index.json'
+INDEX_FORMAT_VERSION = 1
+
+# Row layout in the index file: [source id, category, fieldKey, uiFieldId, position]
+# Sources are [firmware, version, file] so each is stored once; position is the
+# define's place in the field's mapsFrom list (0 = the field's primary define).
+
+
+def index_path_for(maps_dir: Path) -> Path:
+    return maps_dir / INDEX_FILE_NAME
+
+
+def clean_define_name(name: str) -> str:
+    """Drop array indexing from a mapsFrom entry (DEFAULT_MAX_FEEDRATE[0] -> DEFAULT_MAX_FEEDRATE)"""
+    return name.partition('[')[0]
+
+
+class DefineIndex:
+    """In-memory define index (load from disk, query, update per version, save)"""
+
+    def __init__(self, sources: Optional[List[List[str]]] = None,
+                 defines: Optional[Dict[str, List[List[Any]]]] = None):
+        self.sources = sources or []
+        self.defines = defines or {}
+
+    @classmethod
+    def load(cls, path: Path) -> 'DefineIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('formatVersion') != INDEX_FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported define index format {data.get('formatVersion')}")
+        return cls(data['sources'], data['defines'])
+
+    @classmethod
+    def load_if_exists(cls, maps_dir: Path) -> Optional['DefineIndex']:
+        path = index_path_for(maps_dir)
+        try:
+            return cls.load(path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path: Path) -> bool:
+        """Write the index (compact JSON); returns False if the file was already identical"""
+        content = json.dumps({
+            'formatVersion': INDEX_FORMAT_VERSION,
+            'sources': self.sources,
+            'defines': dict(sorted(self.defines.items())),
+        }, separators=(',', ':'), ensure_ascii=False)
+        if path.exists() and path.read_text(encoding='utf-8') == content:
+            return False
+        path.write_text(content, encoding='utf-8')
+        return True
+
+    def lookup(self, define: str, firmware: Optional[str] = None,
+               version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Every mapped location of a define, optionally narrowed to a firmware/version"""
+        results = []
+        for source_id, category, field_key, ui_field_id, _ in self.defines.get(define, []):
+            source_firmware, source_version, file_name = self.sources[source_id]
+            if firmware and source_firmware != firmware:
+                continue
+            if version and source_version != version:
+                continue
+            results.append({
+                'firmware': source_firmware,
+                'version': source_version,
+                'file': file_name,
+                'category': category,
+                'fieldKey': field_key,
+                'uiFieldId': ui_field_id,
+            })
+        return results
+
+    def mapped_defines(self, firmware: Optional[str] = None,
+                       version: Optional[str] = None) -> set:
+        """Names of all defines mapped somewhere (optionally within a firmware/version)"""
+        if not firmware and not version:
+            return set(self.defines)
+        wanted = {i for i, (fw, ver, _) in enumerate(self.sources)
+                  if (not firmware or fw == firmware) and (not version or ver == version)}
+        return {name for name, rows in self.defines.items()
+                if any(row[0] in wanted for row in rows)}
+
+    def defines_by_source(self) -> Dict[Tuple[str, str, str], set]:
+        """(firmware, version, file) -> names of the defines mapped in that file, in one pass"""
+        by_source = [set() for _ in self.sources]
+        for name, rows in self.defines.items():
+            for row in rows:
+                by_source[row[0]].add(name)
+        return {tuple(source): defines for source, defines in zip(self.sources, by_source)}
+
+    def ui_fields(self, firmware: str, version: str, folder: str = 'core') -> Dict[str, Dict[str, Any]]:
+        """uiFieldId -> {defineName, category, fieldName, file} for one firmware/version's mapping folder"""
+        sources = {i for i, (fw, ver, file_name) in enumerate(self.sources)
+                   if fw == firmware and ver == version and file_name.startswith(f"{folder}/")}
+        ui_fields = {}
+        for name, rows in self.defines.items():
+            for source_id, category, field_key, ui_field_id, position in rows:
+                if ui_field_id and position == 0 and source_id in sources:
+                    file_name = self.sources[source_id][2]
+                    ui_fields[ui_field_id] = {
+                        'defineName': name,
+                        'category': category,
+                        'fieldName': field_key,
+                        'file': Path(file_name).name,
+                    }
+        return ui_fields
+
+    def versions(self) -> set:
+        """(firmware, version) of every indexed source"""
+        return {(fw, ver) for fw, ver, _ in self.sources}
+
+    def drop_version(self, firmware: str, version: str):
+        """Remove every row of a firmware/version"""
+        stale = {i for i, (fw, ver, _) in enumerate(self.sources) if fw == firmware and ver == version}
+        if stale:
+            self._drop_sources(stale)
+
+    def replace_version(self, firmware: str, version: str, bundle: MappingBundle):
+        """Drop a firmware/version's rows and re-add them from its bundle"""
+        self.drop_version(firmware, version)
+
+        source_ids: Dict[str, int] = {}
+        seen = set()
+        for define in bundle.defines():
+            name = clean_define_name(define)
+            for hit in bundle.lookup(define):
+                source_id = source_ids.get(hit['document'])
+                if source_id is None:
+                    source_id = len(self.sources)
+                    self.sources.append([firmware, version, hit['document']])
+                    source_ids[hit['document']] = source_id
+                # DEFAULT_MAX_FEEDRATE[0..3] all map the same field - keep it once
+                key = (name, source_id, hit['category'], hit['fieldKey'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                field = hit['field']
+                self.defines.setdefault(name, []).append([
+                    source_id, hit['category'], hit['fieldKey'], field.get('uiFieldId'),
+                    field['mapsFrom'].index(define)])
+
+    def _drop_sources(self, stale: set):
+        """Remove rows of the given sources and renumber the remaining sources"""
+        remap = {}
+        kept = []
+        for old_id, source in enumerate(self.sources):
+            if old_id not in stale:
+                remap[old_id] = len(kept)
+                kept.append(source)
+        self.sources = kept
+
+        defines = {}
+        for name, rows in self.defines.items():
+            rows = [[remap[row[0]]] + row[1:] for row in rows if row[0] in remap]
+            if rows:
+                defines[name] = rows
+        self.defines = defines
+
+
+def load_version_bundle(version_dir: Path, firmware: str, version: str) -> Optional[MappingBundle]:
+    """A version's bundle from disk, or built in memory when the file is missing"""
+    bundle_path = version_dir / bundle_file_name(firmware)
+    if bundle_path.exists():
+        return MappingBundle.load(bundle_path)
+    data = build_bundle(version_dir, firmware, version)
+    return MappingBundle(data) if data else None
+
+
+def update_define_index(maps_dir: Path, versions: Iterable[Tuple[str, str]]) -> Path:
+    """
+    Refresh the index entries of the given firmware/versions (rebuilding it if
+    missing). Versions whose directory or mappings are gone are dropped.
+    """
+    present = [(firmware, version) for firmware, version, _ in iter_version_dirs(maps_dir)]
+    index = DefineIndex.load_if_exists(maps_dir)
+    if index is None:
+        index = DefineIndex()
+        versions = present
+
+    for firmware, version in index.versions() - set(present):
+        index.drop_version(firmware, version)
+    for firmware, version in dict.fromkeys(versions):
+        bundle = load_version_bundle(maps_dir / firmware / version, firmware, version)
+        if bundle is not None:
+            index.replace_version(firmware, version, bundle)
+        else:
+            index.drop_version(firmware, version)
+
+    index_path = index_path_for(maps_dir)
+    changed = index.save(index_path)
+    status = '✅' if changed else '➖'
+    print(f"   {status} {index_path.name}: {len(index.defines)} defines across "
+          f"{len(index.versions())} firmware version(s)"
+          f"{'' if changed else ' (unchanged)'}")
+    return index_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query or rebuild the define -> mapping location index')
+    parser.add_argument('define', nargs='?', help='Define name to look up')
+    parser.add_argument('--maps-dir', type=Path, default=Path('assets/data/maps'),
+                        help='Mapping output directory (default: assets/data/maps)')
+    parser.add_argument('--firmware', help='Only show this firmware (marlin/th3d)')
+    parser.add_argument('--version', help='Only show this firmware version')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Rebuild the index from every firmware/version under --maps-dir')
+    parser.add_argument('--json', action='store_true', help='Print lookup results as JSON')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        index_path_for(args.maps_dir).unlink(missing_ok=True)
+        print(f"🔧 Rebuilding {index_path_for(args.maps_dir)}...")
+        update_define_index(args.maps_dir, [])
+        if not args.define:
+            return 0
+
+    if not args.define:
+        parser.print_help()
+        return 1
+
+    index = DefineIndex.load_if_exists(args.maps_dir)
+    if index is None:
+        print(f"❌ No define index at {index_path_for(args.maps_dir)} - run with --rebuild")
+        return 1
+
+    hits = index.lookup(args.define, args.firmware, args.version)
+    if args.json:
+        print(json.dumps(hits, indent=2))
+        return 0 if hits else 1
+
+    if not hits:
+        print(f"❌ {args.define} is not mapped")
+        return 1
+
+    print(f"✅ {args.define}: {len(hits)} mapping(s)")
+    for hit in hits:
+        ui = f"  → {hit['uiFieldId']}" if hit['uiFieldId'] else ''
+        print(f"   {hit['firmware']}/{hit['version']}/{hit['file']}: "
+              f"{hit['category']}.{hit['fieldKey']}{ui}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
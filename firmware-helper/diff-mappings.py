@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Mapping Diff - what changed between two firmware releases, by define name
+Compares two generated mapping trees (a version folder with full/ and core/)
+or two raw header sets (a folder of Configuration*.h, or a single .h) and
+reports added, removed and renamed defines plus changed defaults, types and
+conditional dependencies.
+
+Each side is reduced once to a signature per define:
+
+    name -> (value, type, conditional dependencies, file)
+
+Trees are read from their mapping bundle (one file per version), headers
+through the generator's own ConfigParser, so both sources describe a define
+the same way. The diff itself is then plain set/dict work.
+
+Usage:
+    python firmware-helper/diff-mappings.py assets/data/maps/marlin/2.0.8.3 assets/data/maps/marlin/2.1.2.6
+    python firmware-helper/diff-mappings.py "old configs/marlin" "new configs/marlin" --output diff.json
+    python firmware-helper/diff-mappings.py old/Configuration_adv.h new/Configuration_adv.h --json
+"""
+
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from define_index import load_version_bundle
+from mapping_annotation import load_helper_module
+
+
+# Report sections, in output order
+CHANGE_KINDS = ('added', 'removed', 'renamed', 'changedDefault', 'changedType', 'changedConditions')
+
+
+class DefineSignature(NamedTuple):
+    """What the diff compares for one define"""
+    value: Optional[str]
+    type: str
+    conditions: Tuple[str, ...]  # sorted, '!NAME' for negative dependencies
+    file: str  # config header (header sets) or full/ mapping document (trees) holding the define
+
+    @property
+    def content_key(self) -> Tuple[Any, ...]:
+        """Everything except where the define lives - used to pair renames"""
+        return (self.value, self.type, self.conditions)
+
+
+class Snapshot(NamedTuple):
+    """All define signatures of one side, plus where each define is mapped"""
+    source: str
+    signatures: Dict[str, DefineSignature]
+    locations: Dict[str, List[Tuple[str, str]]]  # define -> [(full/ document, category)]
+    version_dir: Optional[Path]
+
+
+def _conditions(positive, negative) -> Tuple[str, ...]:
+    return tuple(sorted(list(positive or []) + [f"!{name}" for name in negative or []]))
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def snapshot_from_tree(version_dir: Path) -> Snapshot:
+    """Signatures from a generated mapping tree (via its bundle)"""
+    firmware, version = version_dir.parent.name, version_dir.name
+    bundle = load_version_bundle(version_dir, firmware, version)
+    if bundle is None:
+        raise ValueError(f"{version_dir}: no full/ mappings found")
+
+    signatures = {}
+    locations = {}
+    for define in bundle.defines():
+        hits = [hit for hit in bundle.lookup(define) if hit['document'].startswith('full/')]
+        if not hits:
+            continue
+        name = define.partition('[')[0]
+        locations.setdefault(name, []).extend((hit['document'], hit['category']) for hit in hits)
+        if name in signatures:
+            continue
+        # fileLocation is always Configuration.h in generated maps, so the
+        # full/ document is what tells Configuration.h and _adv defines apart
+        hit = min(hits, key=lambda h: (h['document'], h['field'].get('lineNumber') or 0))
+        field = hit['field']
+        examples = field.get('examples') or [None]
+        signatures[name] = DefineSignature(
+            examples[0], field.get('type', ''),
+            _conditions(field.get('conditionalOn'), field.get('conditionalOnNot')),
+            hit['document']
+        )
+    return Snapshot(str(version_dir), signatures, locations, version_dir)
+
+
+def snapshot_from_headers(paths: List[Path], source: str) -> Snapshot:
+    """Signatures from raw config headers, described exactly as the generator would map them"""
+    parser_class = load_helper_module('create-comprehensive-mappings.py').ConfigParser
+    signatures = {}
+    for path in paths:
+        parser = parser_class(path)
+        parser.parse()
+        for name in parser.defines:
+            if name in signatures:
+                continue
+            info = parser.get_define_info(name)
+            dependencies = info.get('conditionalDependencies') or []
+            signatures[name] = DefineSignature(
+                info['value'] or None, info['type'],
+                _conditions([d for d in dependencies if not d.startswith('!')],
+                            [d[1:] for d in dependencies if d.startswith('!')]),
+                path.name
+            )
+    return Snapshot(source, signatures, {}, None)
+
+
+def load_snapshot(path: Path) -> Snapshot:
+    """Mapping tree, folder of Configuration*.h, or a single header"""
+    if path.is_file():
+        return snapshot_from_headers([path], str(path))
+    if (path / 'full').is_dir():
+        return snapshot_from_tree(path)
+    headers = sorted(path.glob('Configuration*.h'))
+    if headers:
+        # Configuration.h first, then its companions (_adv, _backend, _speed)
+        headers.sort(key=lambda p: (p.name != 'Configuration.h', p.name))
+        return snapshot_from_headers(headers, str(path))
+    raise ValueError(f"{path}: not a mapping tree (full/) or a folder of Configuration*.h")
+
+
+# ---------------------------------------------------------------------------
+# Diff
+# ---------------------------------------------------------------------------
+
+def pair_renames(removed: List[str], added: List[str], old: Dict[str, DefineSignature],
+                 new: Dict[str, DefineSignature]) -> List[Tuple[str, str]]:
+    """
+    Pair a removed and an added define when their value, type and conditions
+    match and no other removed/added define has the same content. Bare flags
+    without conditions all look alike, so they are never paired.
+    """
+    def unique_by_content(names, signatures):
+        seen: Dict[Tuple[Any, ...], Optional[str]] = {}
+        for name in names:
+            key = signatures[name].content_key
+            seen[key] = None if key in seen else name
+        return {key: name for key, name in seen.items() if name is not None}
+
+    old_by_content = unique_by_content(removed, old)
+    new_by_content = unique_by_content(added, new)
+    pairs = []
+    for key, old_name in old_by_content.items():
+        new_name = new_by_content.get(key)
+        if new_name and (key[0] is not None or key[2]):
+            pairs.append((old_name, new_name))
+    return sorted(pairs)
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Dict[str, Any]:
+    """Machine-readable diff of two snapshots"""
+    old_sigs, new_sigs = old.signatures, new.signatures
+    old_names, new_names = old_sigs.keys(), new_sigs.keys()
+
+    removed = sorted(old_names - new_names)
+    added = sorted(new_names - old_names)
+    renames = pair_renames(removed, added, old_sigs, new_sigs)
+    renamed_old = {a for a, _ in renames}
+    renamed_new = {b for _, b in renames}
+
+    changes: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in CHANGE_KINDS}
+    changes['added'] = [{'name': name, 'file': new_sigs[name].file, 'value': new_sigs[name].value,
+                         'type': new_sigs[name].type}
+                        for name in added if name not in renamed_new]
+    changes['removed'] = [{'name': name, 'file': old_sigs[name].file, 'value': old_sigs[name].value,
+                           'type': old_sigs[name].type}
+                          for name in removed if name not in renamed_old]
+    changes['renamed'] = [{'from': a, 'to': b, 'file': new_sigs[b].file} for a, b in renames]
+
+    for name in sorted(old_names & new_names):
+        before, after = old_sigs[name], new_sigs[name]
+        if before == after:
+            continue
+        if before.value != after.value:
+            changes['changedDefault'].append({'name': name, 'file': after.file,
+                                              'from': before.value, 'to': after.value})
+        if before.type != after.type:
+            changes['changedType'].append({'name': name, 'file': after.file,
+                                           'from': before.type, 'to': after.type})
+        if before.conditions != after.conditions:
+            changes['changedConditions'].append({
+                'name': name, 'file': after.file,
+                'added': sorted(set(after.conditions) - set(before.conditions)),
+                'removed': sorted(set(before.conditions) - set(after.conditions)),
+            })
+
+    return {
+        'from': old.source,
+        'to': new.source,
+        'summary': {
+            'fromDefines': len(old_sigs),
+            'toDefines': len(new_sigs),
+            'unchanged': len(old_names & new_names) - len({
+                entry['name'] for kind in ('changedDefault', 'changedType', 'changedConditions')
+                for entry in changes[kind]}),
+            **{kind: len(entries) for kind, entries in changes.items()},
+        },
+        **changes,
+        'affectedFiles': affected_files(new, changes),
+    }
+
+
+def changed_define_names(changes: Dict[str, List[Dict[str, Any]]]) -> set:
+    """Define names on the new side whose mapping output differs"""
+    names = {entry['name'] for kind in ('added', 'changedDefault', 'changedType', 'changedConditions')
+             for entry in changes[kind]}
+    names.update(entry['to'] for entry in changes['renamed'])
+    return names
+
+
+def affected_files(new: Snapshot, changes: Dict[str, List[Dict[str, Any]]]) -> List[str]:
+    """
+    Mapping part files (new tree) or config headers holding a changed define.
+    Removed defines are listed by their old header / full/ document, since they
+    have no new location.
+    """
+    files = {entry['file'] for entry in changes['removed'] if entry['file']}
+    names = changed_define_names(changes)
+    if new.version_dir is None:
+        files.update(new.signatures[name].file for name in names)
+        return sorted(files)
+
+    # Categories -> part files, reading only the parts of affected documents
+    wanted: Dict[str, set] = {}
+    for name in names:
+        for document, category in new.locations.get(name, []):
+            wanted.setdefault(document, set()).add(category)
+    for document, categories in wanted.items():
+        stem = Path(document).name[:-len('-full.json')]
+        for part in sorted((new.version_dir / 'full').glob(f'{stem}-part*.json')):
+            with open(part, 'r', encoding='utf-8') as f:
+                if categories & json.load(f).keys():
+                    files.add(f"full/{part.name}")
+        files.add(document)
+    return sorted(files)
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def print_summary(report: Dict[str, Any], limit: int = 15):
+    summary = report['summary']
+    print(f"🔍 {report['from']}  →  {report['to']}")
+    print(f"   {summary['fromDefines']} → {summary['toDefines']} defines, "
+          f"{summary['unchanged']} unchanged")
+
+    labels = {
+        'added': '➕ Added',
+        'removed': '➖ Removed',
+        'renamed': '🔀 Renamed',
+        'changedDefault': '✏️  Changed default',
+        'changedType': '🔤 Changed type',
+        'changedConditions': '🔗 Changed conditions',
+    }
+    for kind in CHANGE_KINDS:
+        entries = report[kind]
+        if not entries:
+            continue
+        print(f"\n{labels[kind]}: {len(entries)}")
+        for entry in entries[:limit]:
+            if kind == 'renamed':
+                print(f"   {entry['from']} → {entry['to']}")
+            elif kind in ('changedDefault', 'changedType'):
+                print(f"   {entry['name']}: {entry['from']} → {entry['to']}")
+            elif kind == 'changedConditions':
+                delta = [f"+{d}" for d in entry['added']] + [f"-{d}" for d in entry['removed']]
+                print(f"   {entry['name']}: {' '.join(delta)}")
+            else:
+                print(f"   {entry['name']} ({entry['file']})")
+        if len(entries) > limit:
+            print(f"   ... and {len(entries) - limit} more")
+
+    if report['affectedFiles']:
+        print(f"\n📄 Affected files ({len(report['affectedFiles'])}):")
+        for name in report['affectedFiles']:
+            print(f"   {name}")
+    else:
+        print(f"\n✅ No mapping changes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff two mapping trees or header sets by define name')
+    parser.add_argument('old', type=Path, help='Old mapping version folder, config folder or header')
+    parser.add_argument('new', type=Path, help='New mapping version folder, config folder or header')
+    parser.add_argument('--output', type=Path, help='Write the JSON report to this file')
+    parser.add_argument('--json', action='store_true', help='Print the JSON report instead of a summary')
+    parser.add_argument('--limit', type=int, default=15, help='Entries shown per section (default: 15)')
+    args = parser.parse_args()
+
+    try:
+        started = time.perf_counter()
+        old, new = load_snapshot(args.old), load_snapshot(args.new)
+        loaded = time.perf_counter()
+        report = diff_snapshots(old, new)
+        finished = time.perf_counter()
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 0
+
+    print_summary(report, args.limit)
+    print(f"\n⏱️  Loaded in {(loaded - started) * 1000:.0f} ms, diffed in {(finished - loaded) * 1000:.1f} ms")
+    if args.output:
+        print(f"💾 Report written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,145 @@
+"""
+Field Registry - core field set and UI field ids, shared by every mapping pass
+Loads field-registry.json once per process into frozen lookup tables:
+
+    coreFields          defines whose fields are copied to core/ mappings
+    uiFieldMappings     define -> UI field id ("tab{N}_{fieldId}") added to core fields
+    firmwareOverrides   per-firmware additions/removals (e.g. TH3D's USER_PRINTER_NAME)
+
+Used by:
+    create-comprehensive-mappings.py  core split + uiFieldId while streaming outputs
+    split-core-mappings.py            standalone core/full split
+    add-ui-mappings.py                standalone uiFieldId tagging
+
+Usage:
+    python firmware-helper/field_registry.py                    # summary
+    python firmware-helper/field_registry.py --firmware th3d --ui
+"""
+
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, NamedTuple, Optional, Tuple
+
+REGISTRY_PATH = Path(__file__).parent / 'field-registry.json'
+REGISTRY_VERSION = 1
+
+
+class FirmwareFields(NamedTuple):
+    """Resolved registry view for one firmware (shared frozen tables)"""
+    firmware: str
+    core_fields: FrozenSet[str]
+    ui_fields: Mapping[str, str]
+    sha256: str
+
+    def is_core(self, field: Dict[str, Any]) -> bool:
+        """A field is core if any define it maps from is in the core set"""
+        return not self.core_fields.isdisjoint(field.get('mapsFrom', ()))
+
+    def ui_field_id(self, field: Dict[str, Any]) -> Optional[str]:
+        """UI field id for a field (from its primary define)"""
+        maps_from = field.get('mapsFrom')
+        return self.ui_fields.get(maps_from[0]) if maps_from else None
+
+    def tag_fields(self, fields: Iterable[Dict[str, Any]]) -> Dict[int, Tuple[bool, Optional[str]]]:
+        """
+        Core flag and UI field id of many fields in one pass, keyed by id(field).
+        Every define of every field is resolved with a single set intersection.
+        """
+        fields = [field for field in fields if isinstance(field, dict) and field.get('mapsFrom')]
+        core_hits = self.core_fields.intersection(
+            define for field in fields for define in field['mapsFrom'])
+        ui_get = self.ui_fields.get
+        return {id(field): (not core_hits.isdisjoint(field['mapsFrom']), ui_get(field['mapsFrom'][0]))
+                for field in fields}
+
+
+class FieldRegistry:
+    """The parsed registry file; per-firmware views are built once and cached"""
+
+    def __init__(self, data: Dict[str, Any], source: Optional[Path] = None):
+        version = data.get('registryVersion')
+        if version != REGISTRY_VERSION:
+            raise ValueError(f"{source or 'field registry'}: unsupported registryVersion {version!r}")
+        self.source = source
+        self.core_fields = frozenset(define for group in data.get('coreFields', {}).values() for define in group)
+        ui_fields: Dict[str, str] = {}
+        for group in data.get('uiFieldMappings', {}).values():
+            ui_fields.update(group)
+        self.ui_fields = MappingProxyType(ui_fields)
+        self.overrides: Dict[str, Dict[str, Any]] = data.get('firmwareOverrides', {})
+        self._views: Dict[str, FirmwareFields] = {}
+
+    @classmethod
+    def load(cls, path: Path = REGISTRY_PATH) -> 'FieldRegistry':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), path)
+
+    def for_firmware(self, firmware: Optional[str]) -> FirmwareFields:
+        """Shared tables plus the firmware's overrides (unknown firmware: shared tables only)"""
+        key = (firmware or '').lower()
+        if key not in self._views:
+            override = self.overrides.get(key, {})
+            core = override.get('coreFields', {})
+            core_fields = (self.core_fields | frozenset(core.get('add', []))) - frozenset(core.get('remove', []))
+
+            ui_fields = dict(self.ui_fields)
+            for define, ui_id in override.get('uiFieldMappings', {}).items():
+                if ui_id is None:  # null removes a shared mapping
+                    ui_fields.pop(define, None)
+                else:
+                    ui_fields[define] = ui_id
+
+            digest = hashlib.sha256(json.dumps(
+                {'core': sorted(core_fields), 'ui': ui_fields}, sort_keys=True).encode('utf-8')).hexdigest()
+            self._views[key] = FirmwareFields(key, core_fields, MappingProxyType(ui_fields), digest)
+        return self._views[key]
+
+
+_registry: Optional[FieldRegistry] = None
+
+
+def get_registry() -> FieldRegistry:
+    """The process-wide registry (loaded on first use)"""
+    global _registry
+    if _registry is None:
+        _registry = FieldRegistry.load()
+    return _registry
+
+
+def fields_for(firmware: Optional[str]) -> FirmwareFields:
+    """Shortcut for get_registry().for_firmware(firmware)"""
+    return get_registry().for_firmware(firmware)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the core field / UI mapping registry')
+    parser.add_argument('--firmware', help='Resolve overrides for this firmware (e.g. th3d)')
+    parser.add_argument('--core', action='store_true', help='List core defines')
+    parser.add_argument('--ui', action='store_true', help='List define -> UI field id mappings')
+    args = parser.parse_args()
+
+    try:
+        registry = get_registry()
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not load {REGISTRY_PATH.name}: {e}")
+        return 1
+
+    view = registry.for_firmware(args.firmware)
+    print(f"📋 {REGISTRY_PATH.name} ({view.firmware or 'shared'}): "
+          f"{len(view.core_fields)} core defines, {len(view.ui_fields)} UI mappings")
+    print(f"   Overrides for: {', '.join(sorted(registry.overrides)) or 'none'}")
+    if args.core:
+        for define in sorted(view.core_fields):
+            print(f"   {define}")
+    if args.ui:
+        for define, ui_id in sorted(view.ui_fields.items()):
+            print(f"   {define:<45} → {ui_id}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
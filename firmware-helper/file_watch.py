@@ -0,0 +1,127 @@
+"""
+File Watch - change detection for the --watch modes
+Keeps a (mtime, size) snapshot of a set of files and reports which ones were
+added, changed or removed since the last check.
+
+When the watchdog package is installed (pip install watchdog), file system
+notifications (inotify, FSEvents, ReadDirectoryChangesW) wake the watcher as
+soon as a file is saved. Without it the watcher polls. Both modes only
+report changes found by comparing snapshots, so they give the same results;
+a stat() per file per poll is negligible for the few hundred files involved.
+
+Used by:
+    validate-ui-mappings.py --watch
+    process-all-mappings.py --scan --watch
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler  # optional: pip install watchdog
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# Defaults for wait(): a save is picked up within about interval + settle
+DEFAULT_INTERVAL = 0.25
+DEFAULT_SETTLE = 0.1
+
+
+class _WakeHandler(FileSystemEventHandler):
+    """watchdog handler that only signals 'something happened'"""
+
+    def __init__(self, event: threading.Event):
+        super().__init__()
+        self.event = event
+
+    def on_any_event(self, event):
+        self.event.set()
+
+
+class FileWatcher:
+    """Snapshot-and-compare watcher over the files returned by collect()"""
+
+    def __init__(self, collect: Callable[[], Iterable[Path]], roots: Iterable[Path] = ()):
+        """
+        collect: returns the files to watch (called on every check, so new files are picked up)
+        roots: directories watched recursively for notifications (new files in
+               new subfolders); the folders of the collected files are always watched
+        """
+        self.collect = collect
+        self.snapshot = self._scan()
+        self._changed = threading.Event()
+        self._observer = None
+        self._watched: Set[Path] = set()
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.daemon = True
+            for root in roots:
+                self._watch(Path(root), recursive=True)
+            self._watch_folders()
+            self._observer.start()
+
+    @property
+    def mode(self) -> str:
+        return 'notify' if self._observer is not None else 'poll'
+
+    def _watch(self, folder: Path, recursive: bool = False):
+        if folder in self._watched or not folder.is_dir():
+            return
+        try:
+            self._observer.schedule(_WakeHandler(self._changed), str(folder), recursive=recursive)
+            self._watched.add(folder)
+        except OSError:
+            pass  # out of inotify watches etc. - polling still catches the change
+
+    def _watch_folders(self):
+        for folder in {path.parent for path in self.snapshot}:
+            self._watch(folder)
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for path in self.collect():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # removed between listing and stat
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self) -> List[Path]:
+        """Files added, changed or removed since the previous check (sorted)"""
+        current = self._scan()
+        changed = {path for path, stamp in current.items() if self.snapshot.get(path) != stamp}
+        changed.update(path for path in self.snapshot if path not in current)
+        self.snapshot = current
+        if self._observer is not None and changed:
+            self._watch_folders()
+        return sorted(changed)
+
+    def wait(self, interval: float = DEFAULT_INTERVAL, settle: float = DEFAULT_SETTLE) -> List[Path]:
+        """
+        Block until something changes and return the changed files.
+        interval: seconds between polls (with notifications: the fallback check)
+        settle: extra delay after the first change so an editor's save burst
+        (temp file, rename, touch) is reported as one batch
+        """
+        while True:
+            if self._observer is not None:
+                self._changed.wait(interval)
+                self._changed.clear()
+            else:
+                time.sleep(interval)
+            changed = self.poll()
+            if changed:
+                time.sleep(settle)
+                return sorted(set(changed) | set(self.poll()))
+
+    def close(self):
+        """Stop the notification thread (no-op when polling)"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
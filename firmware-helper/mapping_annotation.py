@@ -0,0 +1,183 @@
+"""
+Mapping Annotation - batch re-annotation of a generated mapping tree
+Applies the conditional (pass 2) and validation (pass 3) annotations to every
+mapping file of every firmware/version under a maps directory, using the
+matching config headers from the scan directory:
+
+    new configs/{firmware}/{version}/Configuration*.h
+    assets/data/maps/{firmware}/{version}/{full,core}/*.json
+
+Each header is parsed once and both analyzers run on that parse; every part,
+full and core file of the header is annotated in memory and written back only
+if its content changed. Versions are processed in parallel with --jobs.
+
+Used by:
+    analyze-conditionals.py --batch
+    analyze-validation.py --batch
+    process-all-mappings.py --annotate   (both passes in one run)
+"""
+
+import io
+import json
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+from importlib import util
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config_header import load_header
+import pipeline_profile
+
+HELPER_DIR = Path(__file__).parent
+
+# Pass name -> (script, analyzer class, apply function(data, analyzer) -> fields updated)
+ANNOTATION_PASSES = {
+    'conditionals': ('analyze-conditionals.py', 'ConditionalAnalyzer', 'apply_conditional_info'),
+    'validation': ('analyze-validation.py', 'ValidationAnalyzer', 'apply_validation_info'),
+}
+
+# Pass name -> profile stage prefix (same stage names as process-all-mappings.py)
+PASS_STAGES = {'conditionals': 'conditional', 'validation': 'validation'}
+
+_helper_modules: Dict[str, object] = {}
+
+
+def load_helper_module(filename: str):
+    """Load (once) a sibling firmware-helper script as a module"""
+    if filename not in _helper_modules:
+        module_name = filename[:-3].replace('-', '_')
+        spec = util.spec_from_file_location(module_name, HELPER_DIR / filename)
+        module = util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _helper_modules[filename] = module
+    return _helper_modules[filename]
+
+
+def annotate_file(mapping_file: Path, appliers: Iterable[Callable[[Dict], int]]) -> Tuple[int, bool]:
+    """Apply annotations to one mapping file; returns (fields updated, file rewritten)"""
+    with pipeline_profile.stage('read mappings', mapping_file) as counts:
+        with open(mapping_file, 'r', encoding='utf-8') as f:
+            text = f.read()
+        data = json.loads(text)
+        counts.add(records=1)
+    updated = sum(apply(data) for apply in appliers)
+
+    with pipeline_profile.stage('write', mapping_file) as counts:
+        new_text = json.dumps(data, indent=2)
+        if new_text == text:
+            return updated, False
+        with open(mapping_file, 'w', encoding='utf-8') as f:
+            f.write(new_text)
+        counts.add(records=1, bytes_written=len(new_text.encode('utf-8')))
+    return updated, True
+
+
+def header_mapping_files(version_dir: Path, firmware: str, suffix: str) -> List[Path]:
+    """Every mapping file generated from one header (legacy layout, full/ parts + consolidated, core/)"""
+    stem = f"{firmware}-config{suffix}-mapping"
+    files = []
+    for folder in (version_dir, version_dir / 'full', version_dir / 'core'):
+        files.extend(sorted(folder.glob(f'{stem}*.json')))
+    return files
+
+
+def build_appliers(config_path: Path, passes: Iterable[str]) -> List[Callable[[Dict], int]]:
+    """Analyze a header once (shared parse) and return the apply function of each pass"""
+    with pipeline_profile.stage('load header', config_path) as counts:
+        header = load_header(config_path)
+        counts.add(records=len(header.lines))
+    appliers = []
+    for name in passes:
+        script, class_name, apply_name = ANNOTATION_PASSES[name]
+        module = load_helper_module(script)
+        analyzer = getattr(module, class_name)(config_path)
+        with pipeline_profile.stage(f"{PASS_STAGES[name]} analysis", config_path) as counts:
+            analyzer.analyze(header)
+            counts.add(records=len(header.defines))
+        apply = getattr(module, apply_name)
+        appliers.append(pipeline_profile.timed(
+            f"{PASS_STAGES[name]} pass",
+            lambda data, apply=apply, analyzer=analyzer: apply(data, analyzer), config_path))
+    return appliers
+
+
+def annotate_version(version_dir: Path, firmware: str, headers: List[Tuple[Path, str]],
+                     passes: Tuple[str, ...]) -> int:
+    """Annotate all mapping files of one firmware/version; returns number of files rewritten"""
+    changed_files = 0
+    for config_path, suffix in headers:
+        files = header_mapping_files(version_dir, firmware, suffix)
+        if not files:
+            print(f"   ⚠️  No mapping files for {config_path.name}, skipped")
+            continue
+
+        appliers = build_appliers(config_path, passes)
+        print(f"   🔍 {config_path.name} → {len(files)} file(s)")
+        for mapping_file in files:
+            updated, changed = annotate_file(mapping_file, appliers)
+            if changed:
+                changed_files += 1
+                print(f"      ✅ {mapping_file.relative_to(version_dir).as_posix()} ({updated} fields)")
+    return changed_files
+
+
+def annotate_version_job(job: tuple) -> Tuple[bool, str]:
+    """Pool worker: annotate one firmware/version, capturing its output"""
+    firmware, version, version_dir, headers, passes = job
+    buffer = io.StringIO()
+    ok = True
+    with redirect_stdout(buffer), redirect_stderr(buffer):
+        print(f"\n📂 {firmware}/{version}")
+        try:
+            changed = annotate_version(version_dir, firmware, headers, passes)
+            print(f"   {'✅' if changed else '➖'} {changed} file(s) rewritten"
+                  f"{'' if changed else ' - already up to date'}")
+        except Exception as e:
+            print(f"   ❌ Error annotating {firmware}/{version}: {e}")
+            traceback.print_exc()
+            ok = False
+    return ok, buffer.getvalue()
+
+
+def run_batch(maps_dir: Path, scan_dir: Path, passes: Tuple[str, ...], jobs: int = 1,
+              firmware: Optional[str] = None, version: Optional[str] = None) -> int:
+    """Annotate every firmware/version under maps_dir that has headers in scan_dir; returns exit code"""
+    mappings = load_helper_module('create-comprehensive-mappings.py')
+
+    grouped: Dict[Tuple[str, str], List[Tuple[Path, str]]] = {}
+    for config_firmware, config_version, config_path in mappings.scan_config_directory(scan_dir):
+        if firmware and config_firmware != firmware:
+            continue
+        if version and config_version != version:
+            continue
+        grouped.setdefault((config_firmware, config_version), []).append(
+            (config_path, mappings.config_output_suffix(config_path)))
+
+    batch = []
+    for (config_firmware, config_version), headers in grouped.items():
+        version_dir = maps_dir / config_firmware / config_version
+        if version_dir.is_dir():
+            batch.append((config_firmware, config_version, version_dir, headers, passes))
+        else:
+            print(f"⚠️  No mappings for {config_firmware}/{config_version} in {maps_dir}/, skipped")
+
+    if not batch:
+        print(f"❌ No mapping versions in {maps_dir}/ with headers in {scan_dir}/")
+        return 1
+
+    workers = mappings.resolve_job_count(jobs, len(batch))
+    print(f"📝 Annotating {len(batch)} firmware version(s) ({', '.join(passes)})"
+          f"{f' with {workers} parallel jobs' if workers > 1 else ''}...")
+    if workers > 1:
+        results = mappings.run_scan_jobs(annotate_version_job, batch, workers)
+    else:
+        results = []
+        for job in batch:
+            ok, log = annotate_version_job(job)
+            print(log, end='', flush=True)
+            results.append((job, ok))
+
+    failed = [job for job, ok in results if not ok]
+    mappings.write_version_bundles([(job[0], job[1]) for job, ok in results if ok], maps_dir)
+    print(f"\n✨ Annotated {len(results) - len(failed)}/{len(results)} firmware version(s)")
+    return 1 if failed else 0
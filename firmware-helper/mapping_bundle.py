@@ -0,0 +1,339 @@
+"""
+Mapping Bundle - compact columnar form of a firmware/version's mapping files
+Packs every full/*-mapping-full.json and core/*-mapping-core.json of one
+firmware/version into a single minified {firmware}-mapping-bundle.json:
+
+- strings are interned once (type names, fileLocation, category keys, ...)
+- each category stores its fields column by column, plus the key order
+  ("shape") of every field so documents round-trip exactly
+- an index maps each define name to the fields that map it
+
+MappingBundle reads a bundle and only materializes a category's field dicts
+when that category is first asked for.
+
+Usage:
+    python firmware-helper/mapping_bundle.py --maps-dir assets/data/maps
+    python firmware-helper/mapping_bundle.py --maps-dir assets/data/maps --lookup USER_PRINTER_NAME
+"""
+
+import json
+import argparse
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+BUNDLE_FORMAT = 'mapping-bundle'
+BUNDLE_FORMAT_VERSION = 1
+
+# Top-level keys of a mapping file that are metadata, not categories
+METADATA_KEYS = {'$schema', 'version', 'firmware', 'configFile', 'generatedFrom',
+                 'totalDefines', 'coreDefines', 'fullDefines'}
+
+# Column encodings
+COLUMN_STRING = 's'  # string id per row
+COLUMN_STRING_LIST = 'l'  # list of string ids per row
+COLUMN_VALUE = 'v'  # raw JSON value per row
+
+
+def bundle_file_name(firmware: str) -> str:
+    return f"{firmware}-mapping-bundle.json"
+
+
+def bundle_source_files(version_dir: Path) -> List[Path]:
+    """Consolidated mapping files that go into a version's bundle"""
+    return sorted(version_dir.glob('full/*-mapping-full.json')) + \
+        sorted(version_dir.glob('core/*-mapping-core.json'))
+
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+class BundleWriter:
+    """Accumulates mapping documents and encodes them columnarly"""
+
+    def __init__(self, firmware: str, version: str):
+        self.firmware = firmware
+        self.version = version
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self.documents: List[Dict[str, Any]] = []
+        self.categories: List[Dict[str, Any]] = []
+        self.index: Dict[str, List[List[int]]] = {}
+
+    def intern(self, text: str) -> int:
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self._string_ids[text] = string_id
+            self.strings.append(text)
+        return string_id
+
+    def add_document(self, name: str, mapping: Dict[str, Any]):
+        """Add one mapping file (metadata + categories) under a bundle-relative name"""
+        document_id = len(self.documents)
+        metadata = {}
+        category_ids = []
+        for key, value in mapping.items():
+            if key in METADATA_KEYS or not isinstance(value, dict):
+                metadata[key] = value
+            else:
+                category_ids.append(self._add_category(document_id, key, value))
+        self.documents.append({'name': name, 'metadata': metadata, 'categories': category_ids,
+                               'order': list(mapping.keys())})
+
+    def _add_category(self, document_id: int, name: str, fields: Dict[str, Any]) -> int:
+        category_id = len(self.categories)
+        keys = list(fields.keys())
+
+        shapes: List[Tuple[str, ...]] = []
+        shape_ids: Dict[Tuple[str, ...], int] = {}
+        row_shapes = []
+        column_names: Dict[str, None] = {}
+        for field_key in keys:
+            field = fields[field_key]
+            shape = tuple(field.keys()) if isinstance(field, dict) else ()
+            if shape not in shape_ids:
+                shape_ids[shape] = len(shapes)
+                shapes.append(shape)
+            row_shapes.append(shape_ids[shape])
+            column_names.update(dict.fromkeys(shape))
+
+        columns = []
+        for column in column_names:
+            present = [fields[k][column] for k in keys
+                       if isinstance(fields[k], dict) and column in fields[k]]
+            encoding = _column_encoding(present)
+            values = []
+            for field_key in keys:
+                field = fields[field_key]
+                if not isinstance(field, dict) or column not in field:
+                    values.append(None)
+                elif encoding == COLUMN_STRING:
+                    values.append(self.intern(field[column]))
+                elif encoding == COLUMN_STRING_LIST:
+                    values.append([self.intern(item) for item in field[column]])
+                else:
+                    values.append(field[column])
+            columns.append([self.intern(column), encoding, values])
+
+        # Non-dict entries (shouldn't happen in generated maps) are kept verbatim
+        extras = {k: fields[k] for k in keys if not isinstance(fields[k], dict)}
+
+        for row, field_key in enumerate(keys):
+            field = fields[field_key]
+            if isinstance(field, dict):
+                for define in field.get('mapsFrom') or []:
+                    if isinstance(define, str):
+                        self.index.setdefault(define, []).append([document_id, category_id, row])
+
+        category = {
+            'name': self.intern(name),
+            'keys': [self.intern(k) for k in keys],
+            'shapes': [[self.intern(c) for c in shape] for shape in shapes],
+            'rowShapes': row_shapes,
+            'columns': columns,
+        }
+        if extras:
+            category['extras'] = extras
+        self.categories.append(category)
+        return category_id
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'format': BUNDLE_FORMAT,
+            'formatVersion': BUNDLE_FORMAT_VERSION,
+            'firmware': self.firmware,
+            'version': self.version,
+            'strings': self.strings,
+            'documents': self.documents,
+            'categories': self.categories,
+            'index': self.index,
+        }
+
+
+def _column_encoding(values: List[Any]) -> str:
+    if values and all(isinstance(v, str) for v in values):
+        return COLUMN_STRING
+    if values and all(isinstance(v, list) and all(isinstance(i, str) for i in v) for v in values):
+        return COLUMN_STRING_LIST
+    return COLUMN_VALUE
+
+
+def build_bundle(version_dir: Path, firmware: str, version: str) -> Optional[Dict[str, Any]]:
+    """Bundle a version directory's consolidated mapping files (None if there are none)"""
+    sources = bundle_source_files(version_dir)
+    if not sources:
+        return None
+    writer = BundleWriter(firmware, version)
+    for source in sources:
+        with open(source, 'r', encoding='utf-8') as f:
+            writer.add_document(source.relative_to(version_dir).as_posix(), json.load(f))
+    return writer.to_json()
+
+
+def write_bundle(version_dir: Path, firmware: str, version: str) -> Optional[Path]:
+    """Write {firmware}-mapping-bundle.json for a version directory, only if its content changed"""
+    bundle = build_bundle(version_dir, firmware, version)
+    if bundle is None:
+        return None
+
+    bundle_path = version_dir / bundle_file_name(firmware)
+    content = json.dumps(bundle, separators=(',', ':'), ensure_ascii=False)
+    if bundle_path.exists() and bundle_path.read_text(encoding='utf-8') == content:
+        print(f"   ➖ {bundle_path.name} (unchanged)")
+        return bundle_path
+
+    bundle_path.write_text(content, encoding='utf-8')
+    source_size = sum(path.stat().st_size for path in bundle_source_files(version_dir))
+    print(f"   📦 {bundle_path.name}: {len(bundle['documents'])} files, "
+          f"{len(bundle['index'])} defines, {len(content) / 1024:.0f} KB "
+          f"(from {source_size / 1024:.0f} KB of JSON)")
+    return bundle_path
+
+
+# ---------------------------------------------------------------------------
+# Reader
+# ---------------------------------------------------------------------------
+
+class MappingBundle:
+    """Read-only view of a bundle; categories are decoded on first access"""
+
+    def __init__(self, data: Dict[str, Any]):
+        if data.get('format') != BUNDLE_FORMAT or data.get('formatVersion') != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Not a {BUNDLE_FORMAT} v{BUNDLE_FORMAT_VERSION} file")
+        self.firmware = data['firmware']
+        self.version = data['version']
+        self._strings = data['strings']
+        self._documents = data['documents']
+        self._categories = data['categories']
+        self._index = data['index']
+        self._document_ids = {doc['name']: i for i, doc in enumerate(self._documents)}
+        self._decoded: Dict[int, Dict[str, Any]] = {}
+        self._decoded_columns: Dict[int, Dict[str, List[Any]]] = {}
+        self._decoded_shapes: Dict[Tuple[int, int], List[str]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> 'MappingBundle':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @property
+    def document_names(self) -> List[str]:
+        return [doc['name'] for doc in self._documents]
+
+    def category_names(self, document: str) -> List[str]:
+        doc = self._documents[self._document_ids[document]]
+        return [self._strings[self._categories[c]['name']] for c in doc['categories']]
+
+    def metadata(self, document: str) -> Dict[str, Any]:
+        return dict(self._documents[self._document_ids[document]]['metadata'])
+
+    def category(self, document: str, name: str) -> Dict[str, Any]:
+        """Fields of one category as {fieldKey: fieldDict}"""
+        doc = self._documents[self._document_ids[document]]
+        for category_id in doc['categories']:
+            if self._strings[self._categories[category_id]['name']] == name:
+                return self._category(category_id)
+        raise KeyError(f"{document}: no category {name!r}")
+
+    def document(self, document: str) -> Dict[str, Any]:
+        """Whole mapping file, equal to the JSON it was built from"""
+        doc = self._documents[self._document_ids[document]]
+        categories = {self._strings[self._categories[c]['name']]: c for c in doc['categories']}
+        mapping = {}
+        for key in doc['order']:
+            if key in categories:
+                mapping[key] = self._category(categories[key])
+            else:
+                mapping[key] = doc['metadata'][key]
+        return mapping
+
+    def defines(self) -> Iterable[str]:
+        return self._index.keys()
+
+    def lookup(self, define: str) -> List[Dict[str, Any]]:
+        """Every field mapping a define: [{document, category, fieldKey, field}]"""
+        results = []
+        for document_id, category_id, row in self._index.get(define, []):
+            category = self._categories[category_id]
+            results.append({
+                'document': self._documents[document_id]['name'],
+                'category': self._strings[category['name']],
+                'fieldKey': self._strings[category['keys'][row]],
+                'field': self._row(category_id, row),
+            })
+        return results
+
+    def _category(self, category_id: int) -> Dict[str, Any]:
+        fields = self._decoded.get(category_id)
+        if fields is None:
+            category = self._categories[category_id]
+            extras = category.get('extras', {})
+            fields = {}
+            for row, key_id in enumerate(category['keys']):
+                key = self._strings[key_id]
+                fields[key] = extras[key] if key in extras else self._row(category_id, row)
+            self._decoded[category_id] = fields
+        return fields
+
+    def _columns(self, category_id: int) -> Dict[str, List[Any]]:
+        """Decoded columns of a category (field name -> value per row), cached"""
+        columns = self._decoded_columns.get(category_id)
+        if columns is None:
+            strings = self._strings
+            columns = {}
+            for name_id, encoding, values in self._categories[category_id]['columns']:
+                if encoding == COLUMN_STRING:
+                    values = [None if v is None else strings[v] for v in values]
+                elif encoding == COLUMN_STRING_LIST:
+                    values = [None if v is None else [strings[i] for i in v] for v in values]
+                columns[strings[name_id]] = values
+            self._decoded_columns[category_id] = columns
+        return columns
+
+    def _row(self, category_id: int, row: int) -> Dict[str, Any]:
+        category = self._categories[category_id]
+        columns = self._columns(category_id)
+        shape = self._shape(category_id, category['rowShapes'][row])
+        # Lists are copied so callers can't mutate the shared column data
+        return {name: list(value) if isinstance(value, list) else value
+                for name, value in ((name, columns[name][row]) for name in shape)}
+
+    def _shape(self, category_id: int, shape_id: int) -> List[str]:
+        key = (category_id, shape_id)
+        shape = self._decoded_shapes.get(key)
+        if shape is None:
+            shape = [self._strings[i] for i in self._categories[category_id]['shapes'][shape_id]]
+            self._decoded_shapes[key] = shape
+        return shape
+
+
+def iter_version_dirs(maps_dir: Path) -> Iterable[Tuple[str, str, Path]]:
+    """(firmware, version, directory) for every version directory with full/ mappings"""
+    for full_dir in sorted(maps_dir.glob('*/*/full')):
+        version_dir = full_dir.parent
+        yield version_dir.parent.name, version_dir.name, version_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query compact mapping bundles')
+    parser.add_argument('--maps-dir', type=Path, default=Path('assets/data/maps'),
+                        help='Mapping output directory (firmware/version/full, core)')
+    parser.add_argument('--lookup', metavar='DEFINE',
+                        help='Print where a define is mapped (reads existing bundles)')
+    args = parser.parse_args()
+
+    for firmware, version, version_dir in iter_version_dirs(args.maps_dir):
+        if args.lookup:
+            bundle_path = version_dir / bundle_file_name(firmware)
+            if not bundle_path.exists():
+                continue
+            for hit in MappingBundle.load(bundle_path).lookup(args.lookup):
+                print(f"{firmware}/{version}/{hit['document']}: {hit['category']}.{hit['fieldKey']}")
+        else:
+            print(f"🔧 {firmware}/{version}")
+            write_bundle(version_dir, firmware, version)
+
+
+if __name__ == '__main__':
+    main()
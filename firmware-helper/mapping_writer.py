@@ -0,0 +1,180 @@
+"""
+Mapping Writer - streaming JSON output for generated mappings
+Writes the part files, the consolidated full file and the core file of one
+config header in a single pass over its field records, instead of building
+merged/split copies of every field and serializing each whole document.
+
+The text produced is byte-identical to json.dumps(document, indent=2):
+every field record is serialized once and the same text goes to each file
+it belongs to (fields sit at the same depth in all three).
+
+Files are streamed to a temporary file and only replace the target when the
+content differs, so unchanged outputs keep their timestamps.
+"""
+
+import os
+import json
+import filecmp
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Indent of a field record inside {"category": {"field": ...}}
+FIELD_INDENT = '\n    '
+
+
+def field_json(field: Any) -> str:
+    """A field record as it appears at depth 2 of an indent=2 document"""
+    return json.dumps(field, indent=2).replace('\n', FIELD_INDENT)
+
+
+class JsonObjectStream:
+    """
+    Incrementally write a top-level JSON object in json.dumps(indent=2) layout.
+    Categories are opened lazily, so a category that receives no fields is
+    either written as {} (keep_empty) or left out entirely.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        self._file = open(self.temp_path, 'w', encoding='utf-8')
+        self._file.write('{')
+        self._has_items = False
+        self._category: Optional[str] = None
+        self._category_open = False
+        self.lines = 1
+        self.fields = 0
+
+    def _write(self, text: str):
+        self._file.write(text)
+        self.lines += text.count('\n')
+
+    def _next_item(self):
+        self._write(',\n  ' if self._has_items else '\n  ')
+        self._has_items = True
+
+    def add(self, key: str, value: Any):
+        """Top-level key with a plain value (metadata)"""
+        self.end_category()
+        self._next_item()
+        text = json.dumps(value, indent=2).replace('\n', '\n  ')
+        self._write(f"{json.dumps(key)}: {text}")
+
+    def begin_category(self, key: str):
+        self.end_category()
+        self._category = key
+
+    def add_field(self, key: str, text: str):
+        """Field record already serialized with field_json()"""
+        if not self._category_open:
+            self._next_item()
+            self._write(f"{json.dumps(self._category)}: {{\n    ")
+            self._category_open = True
+        else:
+            self._write(',\n    ')
+        self._write(f"{json.dumps(key)}: {text}")
+        self.fields += 1
+
+    def end_category(self, keep_empty: bool = False):
+        if self._category_open:
+            self._write('\n  }')
+        elif self._category is not None and keep_empty:
+            self._next_item()
+            self._write(f"{json.dumps(self._category)}: {{}}")
+        self._category = None
+        self._category_open = False
+
+    def close(self) -> bool:
+        """Finish the document; returns True if the target file was (re)written"""
+        self.end_category()
+        self._write('\n}' if self._has_items else '}')
+        self._file.close()
+        if self.path.exists() and filecmp.cmp(self.temp_path, self.path, shallow=False):
+            self.temp_path.unlink()
+            return False
+        self.temp_path.replace(self.path)
+        return True
+
+    def abort(self):
+        self._file.close()
+        self.temp_path.unlink(missing_ok=True)
+
+
+def stream_mapping_outputs(parts: List[Tuple[str, Dict[str, Dict[str, Any]]]],
+                           metadata: Dict[str, Any], part_paths: List[Path],
+                           full_path: Optional[Path] = None, core_path: Optional[Path] = None,
+                           is_core: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                           ui_field_id: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None
+                           ) -> Dict[str, Any]:
+    """
+    Write every part file, plus the consolidated full file and the core file
+    when their paths are given, in one traversal of the parts.
+
+    is_core: field -> bool, selects fields for the core file
+    ui_field_id: field -> uiFieldId added to the core copy of a field (or None)
+
+    Returns per-file results: {'parts': [(path, changed, lines)], 'full': (path, changed),
+    'core': (path, changed), 'coreDefines': n, 'uiFields': n}
+    """
+    streams: List[JsonObjectStream] = []
+
+    def open_stream(path: Path) -> JsonObjectStream:
+        stream = JsonObjectStream(path)
+        streams.append(stream)
+        for key, value in metadata.items():
+            stream.add(key, value)
+        return stream
+
+    result: Dict[str, Any] = {'parts': [], 'coreDefines': 0, 'uiFields': 0}
+    try:
+        full = open_stream(full_path) if full_path else None
+        core = open_stream(core_path) if core_path and is_core else None
+        seen_categories = set()
+
+        for (_, part), part_path in zip(parts, part_paths):
+            part_stream = open_stream(part_path)
+            for category, fields in part.items():
+                if category in seen_categories:
+                    # split_by_line_count gives every category/chunk a unique key
+                    raise ValueError(f"Category '{category}' appears in more than one part")
+                seen_categories.add(category)
+
+                for stream in (part_stream, full, core):
+                    if stream:
+                        stream.begin_category(category)
+                for field_key, field in fields.items():
+                    text = field_json(field)
+                    part_stream.add_field(field_key, text)
+                    if not isinstance(field, dict):
+                        continue
+                    if full:
+                        full.add_field(field_key, text)
+                    if core and is_core(field):
+                        ui_id = ui_field_id(field) if ui_field_id else None
+                        if ui_id:
+                            core.add_field(field_key, field_json({**field, 'uiFieldId': ui_id}))
+                            result['uiFields'] += 1
+                        else:
+                            core.add_field(field_key, text)
+                part_stream.end_category(keep_empty=True)
+
+            changed = part_stream.close()
+            streams.remove(part_stream)
+            result['parts'].append((part_path, changed, part_stream.lines))
+
+        if core:
+            result['coreDefines'] = core.fields
+            core.add('coreDefines', core.fields)
+            result['core'] = (core.path, core.close())
+            streams.remove(core)
+        if full:
+            if core:
+                full.add('fullDefines', metadata.get('totalDefines'))
+            result['full'] = (full.path, full.close())
+            streams.remove(full)
+    finally:
+        for stream in streams:
+            stream.abort()
+
+    return result
+
@@ -0,0 +1,266 @@
+"""
+Pipeline Profile - per-stage timing for the mapping tools (--profile)
+Records, for every stage of every config run through the pipeline:
+
+    wall time, CPU time (including child processes), peak memory,
+    records handled and bytes written
+
+and writes them as a JSON report, so a slow scan can be pinned to one pass
+of one config file. A cProfile dump of the whole run can be added for
+function-level detail (open it with snakeviz or pstats).
+
+Stages are recorded through the module-level stage() helper; it is a no-op
+until enable() is called, so instrumented code costs nothing in normal runs.
+
+    with pipeline_profile.stage('build', config_path) as counts:
+        ...
+        counts.add(records=len(fields))
+
+Used by:
+    create-comprehensive-mappings.py --profile
+    process-all-mappings.py --profile   (scan, manual and --annotate modes)
+"""
+
+import os
+import json
+import time
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+REPORT_FORMAT_VERSION = 1
+DEFAULT_REPORT = Path('mapping-profile.json')
+
+
+class StageCounts:
+    """Records/bytes counters of one running stage"""
+
+    def __init__(self):
+        self.records = 0
+        self.bytes_written = 0
+
+    def add(self, records: int = 0, bytes_written: int = 0):
+        self.records += records
+        self.bytes_written += bytes_written
+
+    def add_files(self, paths: Iterable[Path]):
+        """Count the size of written output files"""
+        for path in paths:
+            try:
+                self.bytes_written += Path(path).stat().st_size
+            except OSError:
+                pass
+
+
+class _NullCounts(StageCounts):
+    def add(self, records: int = 0, bytes_written: int = 0):
+        pass
+
+    def add_files(self, paths: Iterable[Path]):
+        pass
+
+
+_NULL_COUNTS = _NullCounts()
+
+
+def _cpu_seconds() -> float:
+    """User + system time of this process and its finished children"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class PipelineProfiler:
+    """Collects stage records for one run"""
+
+    def __init__(self, trace_memory: bool = True, cprofile: bool = False):
+        self.trace_memory = trace_memory
+        self.records: List[Dict[str, Any]] = []
+        self._open_peaks: List[List[int]] = []  # [baseline, peak] of each open stage
+        self._profile = cProfile.Profile() if cprofile else None
+        self._started = time.perf_counter()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self._profile:
+            self._profile.enable()
+
+    def _fold_peak(self):
+        """Carry the traced peak into every open stage (inner stages reset it)"""
+        _, peak = tracemalloc.get_traced_memory()
+        for open_peak in self._open_peaks:
+            open_peak[1] = max(open_peak[1], peak)
+
+    @contextmanager
+    def stage(self, name: str, config: Any = None):
+        counts = StageCounts()
+        memory = None
+        if self.trace_memory:
+            self._fold_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            memory = [current, current]
+            self._open_peaks.append(memory)
+        wall = time.perf_counter()
+        cpu = _cpu_seconds()
+        try:
+            yield counts
+        finally:
+            record = {
+                'stage': name,
+                'config': _config_label(config),
+                'wallSeconds': round(time.perf_counter() - wall, 6),
+                'cpuSeconds': round(_cpu_seconds() - cpu, 6),
+                'peakMemoryBytes': None,
+                'records': counts.records,
+                'bytesWritten': counts.bytes_written,
+            }
+            if memory is not None:
+                self._fold_peak()
+                self._open_peaks.remove(memory)
+                record['peakMemoryBytes'] = memory[1] - memory[0]
+            self.records.append(record)
+
+    def totals(self) -> Dict[str, Dict[str, Any]]:
+        """Per stage name: calls, summed time/records/bytes, largest peak memory"""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for record in self.records:
+            total = totals.setdefault(record['stage'], {
+                'calls': 0, 'wallSeconds': 0.0, 'cpuSeconds': 0.0,
+                'peakMemoryBytes': None, 'records': 0, 'bytesWritten': 0,
+            })
+            total['calls'] += 1
+            total['wallSeconds'] += record['wallSeconds']
+            total['cpuSeconds'] += record['cpuSeconds']
+            total['records'] += record['records']
+            total['bytesWritten'] += record['bytesWritten']
+            if record['peakMemoryBytes'] is not None:
+                total['peakMemoryBytes'] = max(total['peakMemoryBytes'] or 0, record['peakMemoryBytes'])
+        for total in totals.values():
+            total['wallSeconds'] = round(total['wallSeconds'], 6)
+            total['cpuSeconds'] = round(total['cpuSeconds'], 6)
+        return totals
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'formatVersion': REPORT_FORMAT_VERSION,
+            'totalWallSeconds': round(time.perf_counter() - self._started, 6),
+            'stages': self.totals(),
+            'records': self.records,
+        }
+
+    def finish(self, report_path: Path = DEFAULT_REPORT, cprofile_path: Optional[Path] = None):
+        """Stop collecting, write the JSON report (and cProfile dump), print a summary"""
+        if self._profile:
+            self._profile.disable()
+        report = self.report()
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        if self._profile and cprofile_path:
+            self._profile.dump_stats(str(cprofile_path))
+        if self.trace_memory:
+            tracemalloc.stop()
+
+        print_summary(report)
+        print(f"\n📄 Timing report: {report_path}")
+        if self._profile and cprofile_path:
+            print(f"📄 cProfile dump: {cprofile_path} (python -m pstats {cprofile_path})")
+
+
+def _config_label(config: Any) -> Optional[str]:
+    """firmware/version/Configuration.h for a scan path, else the path as given"""
+    if config is None:
+        return None
+    path = Path(config)
+    parts = path.parts
+    return '/'.join(parts[-3:]) if len(parts) >= 3 else path.as_posix()
+
+
+def _format_bytes(size: Optional[int]) -> str:
+    if size is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def print_summary(report: Dict[str, Any]):
+    """Per-stage totals, slowest first"""
+    stages = sorted(report['stages'].items(), key=lambda item: -item[1]['wallSeconds'])
+    print(f"\n⏱️  Stage timings ({report['totalWallSeconds']:.2f}s total):")
+    print(f"   {'stage':<28} {'calls':>5} {'wall':>9} {'cpu':>9} {'peak mem':>9} "
+          f"{'records':>8} {'written':>9}")
+    for name, total in stages:
+        print(f"   {name:<28} {total['calls']:>5} {total['wallSeconds']:>8.3f}s "
+              f"{total['cpuSeconds']:>8.3f}s {_format_bytes(total['peakMemoryBytes']):>9} "
+              f"{total['records']:>8} {_format_bytes(total['bytesWritten']):>9}")
+
+    slowest = max(report['records'], key=lambda record: record['wallSeconds'], default=None)
+    if slowest:
+        print(f"   🐢 Slowest: {slowest['stage']} of {slowest['config'] or '(run)'} "
+              f"({slowest['wallSeconds']:.3f}s)")
+
+
+_active: Optional[PipelineProfiler] = None
+
+
+def enable(trace_memory: bool = True, cprofile: bool = False) -> PipelineProfiler:
+    """Start recording stages for this process"""
+    global _active
+    _active = PipelineProfiler(trace_memory, cprofile)
+    return _active
+
+
+def active() -> Optional[PipelineProfiler]:
+    return _active
+
+
+def finish(report_path: Path = DEFAULT_REPORT, cprofile_path: Optional[Path] = None):
+    """Write the report of the active profiler (no-op when profiling is off)"""
+    global _active
+    if _active is None:
+        return
+    _active.finish(report_path, cprofile_path)
+    _active = None
+
+
+@contextmanager
+def stage(name: str, config: Any = None):
+    """Record one stage when profiling is enabled; yields a StageCounts"""
+    if _active is None:
+        yield _NULL_COUNTS
+        return
+    with _active.stage(name, config) as counts:
+        yield counts
+
+
+def timed(name: str, fn: Callable[[Any], int], config: Any = None) -> Callable[[Any], int]:
+    """Wrap a pass function (data -> fields updated) so each call is recorded as a stage"""
+    def run(data):
+        with stage(name, config) as counts:
+            updated = fn(data)
+            counts.add(records=updated)
+        return updated
+    return run
+
+
+def add_arguments(parser):
+    """The shared --profile options of the pipeline scripts"""
+    parser.add_argument('--profile', action='store_true',
+                        help='Record wall/CPU time, peak memory, records and bytes written for '
+                             'every stage and write a JSON timing report')
+    parser.add_argument('--profile-report', type=Path, default=DEFAULT_REPORT,
+                        help=f'Timing report path for --profile (default: {DEFAULT_REPORT})')
+    parser.add_argument('--cprofile', type=Path, metavar='PATH',
+                        help='Also dump cProfile stats of the whole run to PATH (implies --profile)')
+    parser.add_argument('--no-trace-memory', action='store_true',
+                        help='With --profile: skip peak memory tracking (tracemalloc slows '
+                             'the run down)')
+
+
+def resolve_arguments(args):
+    """Apply the option implications after parse_args (--cprofile turns on --profile)"""
+    if args.cprofile is not None:
+        args.profile = True
@@ -0,0 +1,641 @@
+"""
+Preprocessor Expression Engine - shared #if evaluation
+Parses #if / #elif expressions into an AST once and evaluates them against a
+define set, so conditional blocks can be resolved instead of only listing
+the identifiers they mention.
+
+Used by create-comprehensive-mappings.py (EffectiveConfigResolver, value
+folding) and analyze-conditionals.py (ConditionalAnalyzer, via BranchTracker).
+
+Supported syntax:
+    defined X, defined(X)
+    Marlin macros: ENABLED, DISABLED, ANY, ALL, NONE, BOTH, EITHER, PIN_EXISTS
+    ! ~ unary +/-, * / %, + -, << >>, < <= > >=, == !=, & ^ |, && ||, ?:
+    integer literals (dec/hex/octal/binary, U/L suffixes) and float literals
+
+Evaluation follows the C preprocessor: an undefined identifier is 0, a define
+with a numeric value is that number, and a define whose value is itself an
+expression is evaluated recursively. A define with no value (a bare feature
+flag) evaluates to 1. Unknown function-like macros evaluate to 0.
+
+Compiled expressions are cached by expression text, so a header with the same
+condition repeated hundreds of times (e.g. ENABLED(PIDTEMP)) parses it once.
+"""
+
+import re
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+
+class ExpressionError(ValueError):
+    """Raised when a preprocessor expression can't be tokenized or parsed"""
+
+
+# Define set: name -> raw value string (None or '' for bare flags)
+Defines = Mapping[str, Optional[str]]
+
+# Values that make ENABLED() false even though the macro is defined
+FALSE_VALUES = {'0', 'false'}
+
+# Recursion limit when a define's value is another expression
+MAX_EXPANSION_DEPTH = 16
+
+# The preprocessor works in intmax_t; larger or negative shift counts are undefined
+MAX_SHIFT = 64
+
+# What evaluating a compiled expression can raise (bad shift, float bitwise op, ...).
+# Callers treat it like an unparseable expression.
+EVALUATION_ERRORS = (TypeError, ValueError, OverflowError)
+
+
+TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<number>(?:0[xX][0-9a-fA-F]+|0[bB][01]+|\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?[uUlLfF]*)
+      | (?P<ident>[A-Za-z_]\w*)
+      | (?P<op>&&|\|\||==|!=|<=|>=|<<|>>|[-+*/%!~<>&|^?:(),])
+    )''', re.VERBOSE)
+
+INT_SUFFIX_RE = re.compile(r'[uUlL]+$')
+IDENTIFIER_RE = re.compile(r'[A-Za-z_]\w*$')
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    """Split an expression into (kind, text) tokens"""
+    tokens = []
+    pos = 0
+    end = len(text.rstrip())
+    while pos < end:
+        match = TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ExpressionError(f"Unexpected character at {pos}: {text[pos:pos + 10]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+def parse_number(text: str) -> Optional[float]:
+    """Parse a C numeric literal (optionally signed/parenthesized), None if the text isn't one"""
+    text = text.strip()
+    if text.startswith('(') and text.endswith(')'):
+        text = text[1:-1].strip()
+    sign = 1
+    if text[:1] in ('-', '+'):
+        sign = -1 if text[0] == '-' else 1
+        text = text[1:].strip()
+    if not text or not (text[0].isdigit() or text[0] == '.'):
+        return None
+    try:
+        if text.lower().startswith(('0x', '0b')):
+            return sign * int(INT_SUFFIX_RE.sub('', text), 0)
+        stripped = INT_SUFFIX_RE.sub('', text)
+        if stripped.isdigit():
+            # Leading-zero integers are octal in C
+            return sign * (int(stripped, 8) if len(stripped) > 1 and stripped[0] == '0' else int(stripped))
+        return sign * float(text.rstrip('fF'))
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# AST nodes
+# ---------------------------------------------------------------------------
+
+class Node:
+    """Base AST node"""
+    __slots__ = ()
+
+    def evaluate(self, defines: Defines, depth: int = 0) -> Any:
+        raise NotImplementedError
+
+    def identifiers(self) -> List[str]:
+        """Define names this node reads, in source order"""
+        return []
+
+
+class Number(Node):
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def evaluate(self, defines, depth=0):
+        return self.value
+
+
+class Identifier(Node):
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def evaluate(self, defines, depth=0):
+        return define_value(self.name, defines, depth)
+
+    def identifiers(self):
+        return [self.name]
+
+
+class Defined(Node):
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def evaluate(self, defines, depth=0):
+        return 1 if self.name in defines else 0
+
+    def identifiers(self):
+        return [self.name]
+
+
+class MacroTest(Node):
+    """Marlin ENABLED/DISABLED/ANY/ALL/NONE/BOTH/EITHER feature tests"""
+    __slots__ = ('macro', 'names')
+
+    def __init__(self, macro: str, names: List[str]):
+        self.macro = macro
+        self.names = names
+
+    def evaluate(self, defines, depth=0):
+        enabled = (is_enabled(name, defines) for name in self.names)
+        if self.macro in ('ENABLED', 'ALL', 'BOTH'):
+            return 1 if all(enabled) else 0
+        if self.macro in ('ANY', 'EITHER'):
+            return 1 if any(enabled) else 0
+        # DISABLED, NONE
+        return 0 if any(enabled) else 1
+
+    def identifiers(self):
+        return list(self.names)
+
+
+class PinExists(Node):
+    """PIN_EXISTS(PN) -> defined(PN_PIN) && PN_PIN >= 0"""
+    __slots__ = ('name',)
+
+    def __init__(self, pin: str):
+        self.name = f"{pin}_PIN"
+
+    def evaluate(self, defines, depth=0):
+        if self.name not in defines:
+            return 0
+        return 1 if define_value(self.name, defines, depth) >= 0 else 0
+
+    def identifiers(self):
+        return [self.name]
+
+
+class Call(Node):
+    """Function-like macro we can't expand (evaluates to 0)"""
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name: str, args: List[Node]):
+        self.name = name
+        self.args = args
+
+    def evaluate(self, defines, depth=0):
+        return 0
+
+    def identifiers(self):
+        names = []
+        for arg in self.args:
+            names.extend(arg.identifiers())
+        return names
+
+
+class Unary(Node):
+    __slots__ = ('op', 'operand')
+
+    def __init__(self, op: str, operand: Node):
+        self.op = op
+        self.operand = operand
+
+    def evaluate(self, defines, depth=0):
+        value = self.operand.evaluate(defines, depth)
+        if self.op == '!':
+            return 0 if value else 1
+        if self.op == '-':
+            return -value
+        if self.op == '~':
+            return ~int(value)
+        return value
+
+    def identifiers(self):
+        return self.operand.identifiers()
+
+
+class Binary(Node):
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op: str, left: Node, right: Node):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def evaluate(self, defines, depth=0):
+        op = self.op
+        left = self.left.evaluate(defines, depth)
+
+        # Short-circuit like the preprocessor does
+        if op == '&&':
+            return 1 if left and self.right.evaluate(defines, depth) else 0
+        if op == '||':
+            return 1 if left or self.right.evaluate(defines, depth) else 0
+
+        right = self.right.evaluate(defines, depth)
+        if op in BINARY_FUNCTIONS:
+            return BINARY_FUNCTIONS[op](left, right)
+        # / and % by zero are errors in C; treat as 0 rather than failing the header
+        if right == 0:
+            return 0
+        if op == '/':
+            if isinstance(left, int) and isinstance(right, int):
+                return int(left / right)  # C truncates toward zero
+            return left / right
+        return int(left) % int(right)
+
+    def identifiers(self):
+        return self.left.identifiers() + self.right.identifiers()
+
+
+class Conditional(Node):
+    __slots__ = ('test', 'if_true', 'if_false')
+
+    def __init__(self, test: Node, if_true: Node, if_false: Node):
+        self.test = test
+        self.if_true = if_true
+        self.if_false = if_false
+
+    def evaluate(self, defines, depth=0):
+        if self.test.evaluate(defines, depth):
+            return self.if_true.evaluate(defines, depth)
+        return self.if_false.evaluate(defines, depth)
+
+    def identifiers(self):
+        return self.test.identifiers() + self.if_true.identifiers() + self.if_false.identifiers()
+
+
+BINARY_FUNCTIONS = {
+    '*': lambda a, b: a * b,
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '<<': lambda a, b: int(a) << _shift_count(b),
+    '>>': lambda a, b: int(a) >> _shift_count(b),
+    '<': lambda a, b: 1 if a < b else 0,
+    '<=': lambda a, b: 1 if a <= b else 0,
+    '>': lambda a, b: 1 if a > b else 0,
+    '>=': lambda a, b: 1 if a >= b else 0,
+    '==': lambda a, b: 1 if a == b else 0,
+    '!=': lambda a, b: 1 if a != b else 0,
+    '&': lambda a, b: int(a) & int(b),
+    '^': lambda a, b: int(a) ^ int(b),
+    '|': lambda a, b: int(a) | int(b),
+}
+
+def _shift_count(count) -> int:
+    count = int(count)
+    if not 0 <= count < MAX_SHIFT:
+        raise ValueError(f"shift count {count} out of range")
+    return count
+
+
+# Binary operator precedence (higher binds tighter), per C
+BINARY_PRECEDENCE = {
+    '||': 1, '&&': 2, '|': 3, '^': 4, '&': 5,
+    '==': 6, '!=': 6,
+    '<': 7, '<=': 7, '>': 7, '>=': 7,
+    '<<': 8, '>>': 8,
+    '+': 9, '-': 9,
+    '*': 10, '/': 10, '%': 10,
+}
+
+MACRO_TESTS = {'ENABLED', 'DISABLED', 'ANY', 'ALL', 'NONE', 'BOTH', 'EITHER'}
+
+
+# ---------------------------------------------------------------------------
+# Parser
+# ---------------------------------------------------------------------------
+
+class _Parser:
+    """Precedence-climbing parser over a token list"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def parse(self) -> Node:
+        node = self._expression()
+        if self.pos != len(self.tokens):
+            raise ExpressionError(f"Unexpected token {self.tokens[self.pos][1]!r} in {self.text!r}")
+        return node
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos][1] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise ExpressionError(f"Unexpected end of expression in {self.text!r}")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _expect(self, text: str):
+        kind, value = self._next()
+        if value != text:
+            raise ExpressionError(f"Expected {text!r}, got {value!r} in {self.text!r}")
+
+    def _expression(self) -> Node:
+        node = self._binary(1)
+        if self._peek() == '?':
+            self._next()
+            if_true = self._expression()
+            self._expect(':')
+            if_false = self._expression()
+            node = Conditional(node, if_true, if_false)
+        return node
+
+    def _binary(self, min_precedence: int) -> Node:
+        left = self._unary()
+        while True:
+            op = self._peek()
+            precedence = BINARY_PRECEDENCE.get(op)
+            if precedence is None or precedence < min_precedence:
+                return left
+            self._next()
+            right = self._binary(precedence + 1)
+            left = Binary(op, left, right)
+
+    def _unary(self) -> Node:
+        if self._peek() in ('!', '-', '+', '~'):
+            op = self._next()[1]
+            return Unary(op, self._unary())
+        return self._primary()
+
+    def _primary(self) -> Node:
+        kind, value = self._next()
+
+        if kind == 'number':
+            number = parse_number(value)
+            if number is None:
+                raise ExpressionError(f"Bad number {value!r} in {self.text!r}")
+            return Number(number)
+
+        if value == '(':
+            node = self._expression()
+            self._expect(')')
+            return node
+
+        if kind != 'ident':
+            raise ExpressionError(f"Unexpected token {value!r} in {self.text!r}")
+
+        if value == 'defined':
+            if self._peek() == '(':
+                self._next()
+                name = self._identifier()
+                self._expect(')')
+            else:
+                name = self._identifier()
+            return Defined(name)
+
+        if self._peek() != '(':
+            return Identifier(value)
+
+        # Function-like macro call
+        self._next()
+        if value in MACRO_TESTS:
+            return MacroTest(value, self._identifier_list())
+        if value == 'PIN_EXISTS':
+            pin = self._identifier()
+            self._expect(')')
+            return PinExists(pin)
+
+        args = []
+        if self._peek() != ')':
+            args.append(self._expression())
+            while self._peek() == ',':
+                self._next()
+                args.append(self._expression())
+        self._expect(')')
+        return Call(value, args)
+
+    def _identifier(self) -> str:
+        kind, value = self._next()
+        if kind != 'ident':
+            raise ExpressionError(f"Expected identifier, got {value!r} in {self.text!r}")
+        return value
+
+    def _identifier_list(self) -> List[str]:
+        names = [self._identifier()]
+        while self._peek() == ',':
+            self._next()
+            names.append(self._identifier())
+        self._expect(')')
+        return names
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+_expression_cache: Dict[str, Node] = {}
+
+
+def compile_expression(text: str) -> Node:
+    """Parse an #if expression into an AST, cached by expression text"""
+    node = _expression_cache.get(text)
+    if node is None:
+        node = _Parser(text).parse()
+        _expression_cache[text] = node
+    return node
+
+
+def try_compile_expression(text: str) -> Optional[Node]:
+    """compile_expression, but return None for expressions we can't parse"""
+    try:
+        return compile_expression(text)
+    except ExpressionError:
+        return None
+
+
+def is_enabled(name: str, defines: Defines) -> bool:
+    """Marlin ENABLED(): defined and not explicitly 0/false"""
+    if name not in defines:
+        return False
+    value = defines[name]
+    return value is None or value.strip() not in FALSE_VALUES
+
+
+def define_value(name: str, defines: Defines, depth: int = 0) -> Any:
+    """Numeric value of a define as the preprocessor sees it"""
+    if name not in defines:
+        return 0
+    raw = defines[name]
+    if raw is None or not raw.strip():
+        return 1
+    number = parse_number(raw)
+    if number is not None:
+        return number
+    if depth >= MAX_EXPANSION_DEPTH:
+        return 0
+    node = try_compile_expression(raw)
+    if node is None:
+        return 0
+    return node.evaluate(defines, depth + 1)
+
+
+def evaluate(text: str, defines: Defines) -> bool:
+    """Evaluate an #if expression string against a define set"""
+    return bool(compile_expression(text).evaluate(defines))
+
+
+def fold_constant(text: str, defines: Defines, depth: int = 0) -> Optional[Any]:
+    """
+    Numeric value of a define's replacement text, or None unless every part
+    of it is known: all referenced defines must exist and fold to numbers
+    themselves, and no unexpandable macro calls are allowed.
+    """
+    number = parse_number(text)
+    if number is not None:
+        return number
+    node = try_compile_expression(text)
+    if node is None or depth >= MAX_EXPANSION_DEPTH or not _is_foldable(node, defines, depth):
+        return None
+    try:
+        return node.evaluate(defines)
+    except EVALUATION_ERRORS:
+        return None
+
+
+def _is_foldable(node: Node, defines: Defines, depth: int) -> bool:
+    if isinstance(node, Number):
+        return True
+    if isinstance(node, Identifier):
+        raw = defines.get(node.name)
+        return raw is not None and fold_constant(raw, defines, depth + 1) is not None
+    if isinstance(node, Unary):
+        return _is_foldable(node.operand, defines, depth)
+    if isinstance(node, Binary):
+        return _is_foldable(node.left, defines, depth) and _is_foldable(node.right, defines, depth)
+    if isinstance(node, Conditional):
+        return all(_is_foldable(part, defines, depth) for part in (node.test, node.if_true, node.if_false))
+    return False
+
+
+def required_defines(node: Node) -> Tuple[List[str], List[str]]:
+    """
+    Defines an expression needs on / off to be true, from its top-level && chain.
+    Returns (all_of, none_of). Only simple literals are collected
+    (ENABLED/ALL/BOTH/defined and their negations), so the lists are a sound
+    under-approximation: every name in them really is required.
+    """
+    all_of: List[str] = []
+    none_of: List[str] = []
+    _collect_required(node, False, all_of, none_of)
+    return list(dict.fromkeys(all_of)), list(dict.fromkeys(none_of))
+
+
+def _collect_required(node: Node, negated: bool, all_of: List[str], none_of: List[str]):
+    if isinstance(node, Unary) and node.op == '!':
+        _collect_required(node.operand, not negated, all_of, none_of)
+        return
+
+    # !(A || B) == !A && !B, so || under negation behaves like &&
+    conjunction = '||' if negated else '&&'
+    if isinstance(node, Binary) and node.op == conjunction:
+        _collect_required(node.left, negated, all_of, none_of)
+        _collect_required(node.right, negated, all_of, none_of)
+        return
+
+    if isinstance(node, Defined):
+        (none_of if negated else all_of).append(node.name)
+    elif isinstance(node, MacroTest):
+        positive = node.macro not in ('DISABLED', 'NONE')
+        if len(node.names) == 1:
+            (all_of if positive != negated else none_of).extend(node.names)
+        elif not negated and node.macro in ('ENABLED', 'ALL', 'BOTH'):
+            all_of.extend(node.names)
+        elif not negated and not positive:
+            none_of.extend(node.names)
+        elif negated and node.macro in ('ANY', 'EITHER'):
+            none_of.extend(node.names)
+
+
+class Branch:
+    """
+    One level of an #if/#elif/#else chain: the active test plus the tests of
+    earlier branches in the same chain, which must all have been false.
+    A test of None is an #else (or an unparseable expression).
+    """
+    __slots__ = ('test', 'previous')
+
+    def __init__(self, test: Optional[Node], previous: Tuple[Optional[Node], ...] = ()):
+        self.test = test
+        self.previous = previous
+
+    def required_defines(self) -> Tuple[List[str], List[str]]:
+        """(all_of, none_of) implied by this branch being taken"""
+        all_of: List[str] = []
+        none_of: List[str] = []
+        if self.test is not None:
+            _collect_required(self.test, False, all_of, none_of)
+        for node in self.previous:
+            if node is not None:
+                _collect_required(node, True, all_of, none_of)
+        return all_of, none_of
+
+
+class BranchTracker:
+    """Follows #if/#ifdef/#ifndef/#elif/#else/#endif and keeps the open Branch stack"""
+
+    def __init__(self):
+        self.stack: List[Branch] = []
+
+    def handle(self, line: str):
+        """Update the stack for a stripped conditional directive line"""
+        if line.startswith('#endif'):
+            if self.stack:
+                self.stack.pop()
+        elif line.startswith('#else'):
+            if self.stack:
+                branch = self.stack.pop()
+                self.stack.append(Branch(None, branch.previous + (branch.test,)))
+        elif line.startswith('#elif '):
+            previous: Tuple[Optional[Node], ...] = ()
+            if self.stack:
+                branch = self.stack.pop()
+                previous = branch.previous + (branch.test,)
+            self.stack.append(Branch(directive_expression(line[6:]), previous))
+        elif line.startswith('#ifdef '):
+            self.stack.append(Branch(_name_test(line[7:], negate=False)))
+        elif line.startswith('#ifndef '):
+            self.stack.append(Branch(_name_test(line[8:], negate=True)))
+        elif line.startswith('#if '):
+            self.stack.append(Branch(directive_expression(line[4:])))
+
+    def snapshot(self) -> Tuple[Branch, ...]:
+        """Immutable copy of the open branches (Branch objects are never mutated)"""
+        return tuple(self.stack)
+
+
+def directive_expression(text: str) -> Optional[Node]:
+    """Compile the expression part of an #if/#elif line (comments stripped)"""
+    text = strip_directive_comment(text)
+    return try_compile_expression(text) if text else None
+
+
+def strip_directive_comment(text: str) -> str:
+    if '//' in text:
+        text = text[:text.index('//')]
+    if '/*' in text:
+        text = text[:text.index('/*')]
+    return text.strip()
+
+
+def _name_test(text: str, negate: bool) -> Optional[Node]:
+    """defined(NAME) / !defined(NAME) for an #ifdef / #ifndef line"""
+    words = strip_directive_comment(text).split()
+    if not words or not IDENTIFIER_RE.match(words[0]):
+        return None
+    return compile_expression(f"{'!' if negate else ''}defined({words[0]})")
+
@@ -11,30 +11,76 @@ Usage:
     
     # Manual mode (single config)
     python process-all-mappings.py --config path/to/Configuration.h --version 2.1.x --firmware marlin
+    
+    # In-process mode (parse once, no subprocesses, write once)
+    python process-all-mappings.py --scan --in-process
+    
+    # Re-annotate existing mappings only (passes 2 + 3 over the whole tree)
+    python process-all-mappings.py --annotate --jobs 0
+    
+    # Watch mode (scan once, then rebuild each config as it is added or edited)
+    python process-all-mappings.py --scan --watch
 """
 
+import io
 import sys
+import time
 import argparse
 import subprocess
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
 from pathlib import Path
 from typing import List, Tuple
 
-def run_command(cmd: List[str], description: str) -> bool:
-    """Run a command and return success status"""
+from config_header import load_header
+from file_watch import DEFAULT_INTERVAL, FileWatcher
+from mapping_annotation import load_helper_module, run_batch
+import pipeline_profile
+
+def run_command(cmd: List[str], description: str, capture: bool = False) -> bool:
+    """Run a command and return success status (capture: echo child output via sys.stdout)"""
     print(f"\n{'='*60}")
     print(f"🔧 {description}")
     print(f"{'='*60}")
     
     try:
-        result = subprocess.run(cmd, check=True, capture_output=False, text=True)
+        if capture:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    text=True, encoding='utf-8', errors='replace')
+            print(result.stdout, end='')
+            result.check_returncode()
+        else:
+            result = subprocess.run(cmd, check=True, capture_output=False, text=True)
         return True
     except subprocess.CalledProcessError as e:
         print(f"❌ Error: {e}")
         return False
 
 
+def run_pass(cmd: List[str], description: str, capture: bool, stage_name: str,
+             config_path: Path, mapping_dir: Path) -> bool:
+    """run_command as a profiled stage (bytes written = mapping files the pass rewrote)"""
+    with pipeline_profile.stage(stage_name, config_path) as counts:
+        started = time.time()
+        ok = run_command(cmd, description, capture)
+        if pipeline_profile.active():
+            counts.add_files(path for path in mapping_dir.rglob('*.json')
+                             if path.stat().st_mtime >= started)
+    return ok
+
+
+# Passes 2-3 run as separate scripts after pass 1 (names are part of the build manifest key).
+# Pass 1 already writes full/ and core/ and tags UI field ids (field_registry), so
+# the old split-core-mappings.py / add-ui-mappings.py passes are not run.
+SUBPROCESS_STAGES = [
+    "PASS 2: Analyzing conditional dependencies",
+    "PASS 3: Extracting validation rules",
+]
+
+
 def process_config_file(config_path: Path, firmware: str, version: str, 
-                       output_dir: Path, scan_dir: Path) -> bool:
+                       output_dir: Path, scan_dir: Path, capture: bool = False,
+                       force: bool = False) -> bool:
     """Process a single config file through all three passes"""
     
     print(f"\n{'#'*60}")
@@ -42,10 +88,16 @@ def process_config_file(config_path: Path, firmware: str, version: str,
     print(f"# Firmware: {firmware} | Version: {version}")
     print(f"{'#'*60}")
     
+    mappings = load_helper_module('create-comprehensive-mappings.py')
+    if not force and mappings.is_config_up_to_date(config_path, firmware, version, output_dir,
+                                                   max_lines=900, stage_names=SUBPROCESS_STAGES):
+        print(f"\n⏭️  Unchanged since last build, skipping all passes: {config_path.name}")
+        return True
+    
     # Determine mapping directory
     mapping_dir = output_dir / firmware / version
     
-    # PASS 1: Create comprehensive mappings
+    # PASS 1: Create comprehensive mappings (full/ parts + full file, core/ file)
     cmd_pass1 = [
         sys.executable, 
         'firmware-helper/create-comprehensive-mappings.py',
@@ -54,54 +106,117 @@ def process_config_file(config_path: Path, firmware: str, version: str,
         '--firmware', firmware,
         '--output-dir', str(output_dir)
     ]
+    if force:
+        cmd_pass1.append('--force')
     
-    if not run_command(cmd_pass1, f"PASS 1: Creating mappings from {config_path.name}"):
+    if not run_pass(cmd_pass1, f"PASS 1: Creating mappings from {config_path.name}", capture,
+                    'build mappings (pass 1)', config_path, mapping_dir):
         return False
+    failed = []
+    
+    # Passes 2 and 3 annotate this config's files only, in full/ and core/
+    config_pattern = f"*/{firmware}-config{mappings.config_output_suffix(config_path)}-mapping*.json"
     
     # PASS 2: Analyze conditionals
     cmd_pass2 = [
         sys.executable,
         'firmware-helper/analyze-conditionals.py',
         '--mapping-dir', str(mapping_dir),
-        '--config', str(config_path)
+        '--config', str(config_path),
+        '--pattern', config_pattern
     ]
     
-    if not run_command(cmd_pass2, f"PASS 2: Analyzing conditional dependencies"):
+    if not run_pass(cmd_pass2, SUBPROCESS_STAGES[0], capture,
+                    'conditional pass', config_path, mapping_dir):
         print("⚠️  Warning: Conditional analysis failed, continuing...")
+        failed.append('conditionals')
     
     # PASS 3: Analyze validation rules
     cmd_pass3 = [
         sys.executable,
         'firmware-helper/analyze-validation.py',
         '--mapping-dir', str(mapping_dir),
-        '--config', str(config_path)
+        '--config', str(config_path),
+        '--pattern', config_pattern
     ]
     
-    if not run_command(cmd_pass3, f"PASS 3: Extracting validation rules"):
+    if not run_pass(cmd_pass3, SUBPROCESS_STAGES[1], capture,
+                    'validation pass', config_path, mapping_dir):
         print("⚠️  Warning: Validation analysis failed, continuing...")
+        failed.append('validation')
     
-    # PASS 4: Split into core and full mappings
-    cmd_pass4 = [
-        sys.executable,
-        'firmware-helper/split-core-mappings.py',
-        '--mapping-dir', str(mapping_dir)
-    ]
-    
-    if not run_command(cmd_pass4, f"PASS 4: Splitting core/full mappings"):
-        print("⚠️  Warning: Mapping split failed, continuing...")
+    # Pass 1 saved a manifest for its own outputs only; mark the config up to
+    # date for this pipeline once every later pass has succeeded
+    if failed:
+        print(f"⚠️  Not marking {config_path.name} up to date ({', '.join(failed)} failed) - "
+              f"it will be rebuilt next run")
+    else:
+        mappings.record_completed_stages(config_path, firmware, version, output_dir, 900,
+                                         SUBPROCESS_STAGES)
     
-    # PASS 5: Add UI field mappings to core files
-    mapping_dir_core = mapping_dir / 'core'
-    cmd_pass5 = [
-        sys.executable,
-        'firmware-helper/add-ui-mappings.py',
-        '--mapping-dir', str(mapping_dir_core)
-    ]
+    print(f"\n✅ Complete: {config_path.name} → {mapping_dir}")
+    return True
+
+
+# In-process passes applied to the in-memory mapping tree (names are part of the build manifest key)
+IN_PROCESS_STAGES = [
+    "PASS 2: Analyzing conditional dependencies",
+    "PASS 3: Extracting validation rules",
+]
+
+
+def process_config_in_process(config_path: Path, firmware: str, version: str,
+                              output_dir: Path, max_lines: int = 900, force: bool = False) -> bool:
+    """
+    Process a single config file through all five passes in this interpreter.
+    The config is parsed once and the mapping tree stays in memory through the
+    conditional, validation, core-split and UI stages; each output file is
+    written once at the end.
+    """
+    print(f"\n{'#'*60}")
+    print(f"# Processing (in-process): {config_path.name}")
+    print(f"# Firmware: {firmware} | Version: {version}")
+    print(f"{'#'*60}")
     
-    if not run_command(cmd_pass5, f"PASS 5: Adding UI field mappings"):
-        print("⚠️  Warning: UI mapping failed, continuing...")
+    try:
+        mappings = load_helper_module('create-comprehensive-mappings.py')
+        conditionals = load_helper_module('analyze-conditionals.py')
+        validation = load_helper_module('analyze-validation.py')
+        
+        if not force and mappings.is_config_up_to_date(config_path, firmware, version, output_dir,
+                                                       max_lines, stage_names=IN_PROCESS_STAGES):
+            print(f"\n⏭️  Unchanged since last build, skipping: {config_path.name}")
+            return True
+        
+        # One parse of the header shared by every pass
+        with pipeline_profile.stage('load header', config_path) as counts:
+            header = load_header(config_path)
+            counts.add(records=len(header.lines))
+        
+        conditional_analyzer = conditionals.ConditionalAnalyzer(config_path)
+        with pipeline_profile.stage('conditional analysis', config_path) as counts:
+            conditional_analyzer.analyze(header)
+            counts.add(records=len(header.defines))
+        validation_analyzer = validation.ValidationAnalyzer(config_path)
+        with pipeline_profile.stage('validation analysis', config_path) as counts:
+            validation_analyzer.analyze(header)
+            counts.add(records=len(header.defines))
+        
+        stages = list(zip(IN_PROCESS_STAGES, [
+            pipeline_profile.timed('conditional pass', lambda data: conditionals.apply_conditional_info(
+                data, conditional_analyzer), config_path),
+            pipeline_profile.timed('validation pass', lambda data: validation.apply_validation_info(
+                data, validation_analyzer), config_path),
+        ]))
+        
+        # Passes 1, 4 and 5 (build, core split, UI mappings) run inside process_single_config
+        mappings.process_single_config(config_path, firmware, version, output_dir, max_lines,
+                                       header=header, stages=stages, force=True)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
     
-    print(f"\n✅ Complete: {config_path.name} → {mapping_dir}")
+    print(f"\n✅ Complete: {config_path.name} → {output_dir / firmware / version}")
     return True
 
 
@@ -127,7 +242,76 @@ def scan_config_directory(base_dir: Path) -> List[Tuple[str, str, Path]]:
             for config_file in version_dir.glob('*.h'):
                 config_files.append((firmware_type, version, config_file))
     
-    return config_files
+    # Stable order so scan output (and --jobs logs) are deterministic
+    return sorted(config_files, key=lambda item: (item[0], item[1], item[2].name))
+
+
+def process_scan_job(job: tuple) -> Tuple[bool, str]:
+    """Pool worker: run one scan job through the pipeline, capturing its output"""
+    config_path, firmware, version, output_dir, scan_dir, in_process, force = job
+    buffer = io.StringIO()
+    with redirect_stdout(buffer), redirect_stderr(buffer):
+        try:
+            if in_process:
+                ok = process_config_in_process(config_path, firmware, version, output_dir,
+                                               force=force)
+            else:
+                ok = process_config_file(config_path, firmware, version,
+                                         output_dir, scan_dir, capture=True, force=force)
+        except Exception as e:
+            print(f"❌ Error processing {config_path}: {e}")
+            traceback.print_exc()
+            ok = False
+    return ok, buffer.getvalue()
+
+
+def config_key(config_path: Path, scan_dir: Path) -> Tuple[str, str]:
+    """(firmware, version) of a header under scan_dir/{firmware}/{version}/"""
+    firmware, version = config_path.relative_to(scan_dir).parts[:2]
+    return firmware, version
+
+
+def watch_scan_dir(scan_dir: Path, output_dir: Path, firmware: str = None, version: str = None,
+                   interval: float = DEFAULT_INTERVAL) -> int:
+    """
+    Rebuild configs as they are added or edited under scan_dir, until Ctrl+C.
+    Everything runs in this interpreter, so the helper modules, the define
+    classifier and the parsed-header cache stay warm between rebuilds; only
+    the changed config is reprocessed and only its version's bundle and
+    define index entries are rewritten.
+    """
+    def collect() -> List[Path]:
+        return [path for fw, ver, path in scan_config_directory(scan_dir)
+                if (not firmware or fw == firmware) and (not version or ver == version)]
+    
+    mappings = load_helper_module('create-comprehensive-mappings.py')
+    # Import the pass modules now so the first rebuild doesn't pay for it
+    load_helper_module('analyze-conditionals.py')
+    load_helper_module('analyze-validation.py')
+    watcher = FileWatcher(collect, roots=[scan_dir])
+    print(f"\n👀 Watching {scan_dir}/ ({len(watcher.snapshot)} config file(s), {watcher.mode}) - Ctrl+C to stop")
+    
+    try:
+        while True:
+            changed = watcher.wait(interval)
+            started = time.perf_counter()
+            versions = []
+            for config_path in changed:
+                if config_path not in watcher.snapshot:
+                    print(f"\n🗑️  Removed: {config_path} (existing mappings left in place)")
+                    continue
+                fw, ver = config_key(config_path, scan_dir)
+                if process_config_in_process(config_path, fw, ver, output_dir):
+                    versions.append((fw, ver))
+            if versions:
+                mappings.write_version_bundles(versions, output_dir)
+                print(f"\n⏱️  Rebuilt {len(versions)} config(s) in "
+                      f"{time.perf_counter() - started:.2f}s")
+            print(f"\n👀 Watching {scan_dir}/ - Ctrl+C to stop")
+    except KeyboardInterrupt:
+        watcher.close()
+        print("\n👋 Stopped watching")
+        return 0
 
 
 def main():
@@ -144,6 +328,21 @@ Examples:
   
   # Manual mode - process single config
   python process-all-mappings.py --config path/to/Configuration.h --version 2.1.x --firmware marlin
+  
+  # In-process mode - one interpreter, config parsed once, outputs written once
+  python process-all-mappings.py --scan --in-process
+  
+  # Parallel scan - one worker process per CPU core
+  python process-all-mappings.py --scan --in-process --jobs 0
+  
+  # Re-run passes 2 and 3 on the existing tree (no regeneration), in parallel
+  python process-all-mappings.py --annotate --jobs 0
+  
+  # Watch mode - process the scan once, then rebuild only the configs that change
+  python process-all-mappings.py --scan --watch
+  
+  # Time every pass of every config (writes mapping-profile.json, optional cProfile dump)
+  python process-all-mappings.py --scan --in-process --force --profile --cprofile scan.prof
 
 Five-Pass Workflow:
   Pass 1: Create basic mapping structure (field names, types, line numbers)
@@ -159,6 +358,9 @@ Five-Pass Workflow:
                        help='Scan new configs/ directory and process all .h files')
     parser.add_argument('--scan-dir', type=Path, default=Path('new configs'),
                        help='Directory to scan (default: new configs)')
+    parser.add_argument('--annotate', action='store_true',
+                       help='Only re-apply passes 2 and 3 (conditionals, validation) to the existing '
+                            'mappings in --output-dir, using the headers in --scan-dir')
     
     # Manual mode
     parser.add_argument('--config', type=Path,
@@ -171,12 +373,60 @@ Five-Pass Workflow:
     # Common arguments
     parser.add_argument('--output-dir', type=Path, default=Path('assets/data/maps'),
                        help='Output directory for mappings')
+    parser.add_argument('--in-process', action='store_true',
+                       help='Run all passes in this interpreter (parse once, write once) '
+                            'instead of launching a subprocess per pass')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                       help='Parallel worker processes in scan/annotate mode (0 = one per CPU core)')
+    parser.add_argument('--force', action='store_true',
+                       help='Reprocess configs even if their build manifest is up to date')
+    parser.add_argument('--watch', action='store_true',
+                       help='With --scan: keep running and rebuild each config as it is added or '
+                            'edited (implies --in-process)')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                       help=f'Seconds between checks in --watch mode (default: {DEFAULT_INTERVAL}; '
+                            f'with watchdog installed, saves are picked up immediately)')
+    pipeline_profile.add_arguments(parser)
     
     args = parser.parse_args()
+    pipeline_profile.resolve_arguments(args)
+    
+    if args.profile:
+        pipeline_profile.enable(not args.no_trace_memory, cprofile=args.cprofile is not None)
+        if args.jobs != 1:
+            # Stage records live in this process; parallel workers would also skew the timings
+            print("⏱️  --profile: processing serially (--jobs ignored)")
+            args.jobs = 1
+    try:
+        return run_pipeline(args, parser)
+    finally:
+        pipeline_profile.finish(args.profile_report, args.cprofile)
+
+
+def run_pipeline(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """Annotate, scan or manual mode of main() (split out so --profile can wrap it)"""
+    if args.watch:
+        if not args.scan:
+            print("❌ Error: --watch requires --scan")
+            return 1
+        # Warm state between rebuilds only exists in this interpreter
+        args.in_process = True
+    
+    def process(config_path: Path, firmware: str, version: str) -> bool:
+        if args.in_process:
+            return process_config_in_process(config_path, firmware, version, args.output_dir,
+                                             force=args.force)
+        return process_config_file(config_path, firmware, version,
+                                   args.output_dir, args.scan_dir, force=args.force)
     
     print("🚀 Complete Mapping Processor - Three-Pass System")
     print("=" * 60)
     
+    # ANNOTATE MODE: passes 2 + 3 over the existing tree, one parse per header
+    if args.annotate:
+        return run_batch(args.output_dir, args.scan_dir, ('conditionals', 'validation'),
+                         args.jobs, args.firmware, args.version)
+    
     # SCAN MODE
     if args.scan:
         print(f"🔍 Scanning {args.scan_dir}/ for configuration files...")
@@ -201,12 +451,23 @@ Five-Pass Workflow:
         
         print(f"✅ Found {len(config_files)} configuration file(s)")
         
-        # Process each config
-        success_count = 0
-        for firmware, version, config_path in config_files:
-            if process_config_file(config_path, firmware, version, 
-                                  args.output_dir, args.scan_dir):
-                success_count += 1
+        jobs = [(config_path, firmware, version, args.output_dir, args.scan_dir, args.in_process,
+                 args.force)
+                for firmware, version, config_path in config_files]
+        mappings = load_helper_module('create-comprehensive-mappings.py')
+        workers = mappings.resolve_job_count(args.jobs, len(jobs))
+        
+        if workers > 1:
+            # Parallel: configs are independent and write distinct firmware/version trees
+            print(f"\n⚡ Processing with {workers} parallel jobs...")
+            results = mappings.run_scan_jobs(process_scan_job, jobs, workers)
+        else:
+            # Process each config
+            results = [(job, process(job[0], job[1], job[2])) for job in jobs]
+        
+        success_count = sum(1 for _, ok in results if ok)
+        mappings.print_scan_summary(results, args.output_dir)
+        mappings.write_version_bundles(((f, v) for f, v, _ in config_files), args.output_dir)
         
         print(f"\n{'='*60}")
         print(f"🎉 Processing Complete!")
@@ -214,6 +475,10 @@ Five-Pass Workflow:
         print(f"   Output: {args.output_dir}/")
         print(f"{'='*60}")
         
+        if args.watch:
+            return watch_scan_dir(args.scan_dir, args.output_dir, args.firmware, args.version,
+                                  args.interval)
+        
         return 0 if success_count == len(config_files) else 1
     
     # MANUAL MODE
@@ -231,8 +496,10 @@ Five-Pass Workflow:
             print(f"❌ Error: Config file not found: {args.config}")
             return 1
         
-        success = process_config_file(args.config, args.firmware, args.version,
-                                     args.output_dir, args.scan_dir)
+        success = process(args.config, args.firmware, args.version)
+        if success:
+            mappings = load_helper_module('create-comprehensive-mappings.py')
+            mappings.write_version_bundles([(args.firmware, args.version)], args.output_dir)
         
         return 0 if success else 1
 
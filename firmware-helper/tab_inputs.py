@@ -0,0 +1,123 @@
+"""
+Tab Inputs - cached extraction of UI input IDs from the profile tab scripts
+Reads every assets/js/enhanced-profiles/tabs/tab-{N}-*.js once and stores the
+field input IDs it renders (id="tab{N}_fieldName") with their line numbers.
+
+Results are cached in firmware-helper/.tab-input-cache.json per tab file,
+keyed by mtime and size, with the SHA-256 of the content as a fallback: a
+touched-but-identical file is not re-scanned, and an unchanged file is not
+even read.
+
+Used by validate-ui-mappings.py.
+"""
+
+import os
+import re
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+TABS_DIR = Path('assets/js/enhanced-profiles/tabs')
+CACHE_FILE = Path(__file__).resolve().parent / '.tab-input-cache.json'
+
+# Bump when the extraction rules change (invalidates the cache)
+CACHE_VERSION = 1
+
+TAB_FILE_RE = re.compile(r'tab-(\d+)')
+
+# id="..." / id='...' in HTML template strings
+ID_RE = re.compile(r'id=["\']([^"\']+)["\']')
+
+
+def tab_number(tab_file: Path) -> Optional[int]:
+    match = TAB_FILE_RE.search(tab_file.name)
+    return int(match.group(1)) if match else None
+
+
+def tab_files(tabs_dir: Path = TABS_DIR) -> List[Path]:
+    return sorted(path for path in tabs_dir.glob('tab-*.js') if tab_number(path) is not None)
+
+
+def extract_input_ids(text: str) -> Dict[str, int]:
+    """Field input IDs in a tab script -> line number (of the last occurrence)"""
+    inputs = {}
+    line = 1
+    position = 0
+    for match in ID_RE.finditer(text):
+        input_id = match.group(1)
+        # Skip non-field IDs (buttons, containers, etc.)
+        if not (input_id.startswith('tab') and '_' in input_id):
+            continue
+        line += text.count('\n', position, match.start())
+        position = match.start()
+        inputs[input_id] = line
+    return inputs
+
+
+class TabInputCache:
+    """Per-file input IDs, persisted between runs"""
+
+    def __init__(self, cache_file: Path = CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.scanned = 0  # files (re)extracted in this process
+        self._dirty = False
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.entries = data.get('files', {})
+        except (OSError, ValueError):
+            pass
+
+    def inputs(self, tab_file: Path) -> Dict[str, int]:
+        """Input IDs of one tab file -> line, re-extracted only if its content changed"""
+        key = tab_file.as_posix()
+        stat = tab_file.stat()
+        entry = self.entries.get(key)
+        if entry and entry['mtimeNs'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry['inputs']
+
+        raw = tab_file.read_bytes()
+        sha256 = hashlib.sha256(raw).hexdigest()
+        if not entry or entry['sha256'] != sha256:
+            entry = {'sha256': sha256, 'inputs': extract_input_ids(raw.decode('utf-8'))}
+            self.scanned += 1
+        entry.update(mtimeNs=stat.st_mtime_ns, size=stat.st_size)
+        self.entries[key] = entry
+        self._dirty = True
+        return entry['inputs']
+
+    def forget_missing(self):
+        """Drop entries of deleted tab files"""
+        for key in [key for key in self.entries if not Path(key).exists()]:
+            del self.entries[key]
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            temp_file = self.cache_file.with_name(f".{self.cache_file.name}.{os.getpid()}.tmp")
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'files': self.entries}, f)
+            temp_file.replace(self.cache_file)
+            self._dirty = False
+        except OSError:
+            pass  # Read-only checkout etc. - caching is best effort
+
+
+def load_tab_inputs(tabs_dir: Path = TABS_DIR, cache: Optional[TabInputCache] = None,
+                    only_tabs: Optional[set] = None) -> Dict[str, Dict[str, Any]]:
+    """input id -> {tab, file, line} over every tab script (or only the given tab numbers)"""
+    cache = cache or TabInputCache()
+    input_ids = {}
+    for tab_file in tab_files(tabs_dir):
+        tab = tab_number(tab_file)
+        if only_tabs is not None and tab not in only_tabs:
+            continue
+        for input_id, line in cache.inputs(tab_file).items():
+            input_ids[input_id] = {'tab': tab, 'file': tab_file.name, 'line': line}
+    cache.save()
+    return input_ids
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Regression tests for #if analysis (pass 2 and the effective-config resolver)
+
+Usage:
+    python -m pytest firmware-helper/test_conditional_analysis.py
+    python firmware-helper/test_conditional_analysis.py
+"""
+
+import tempfile
+from pathlib import Path
+
+from mapping_annotation import HELPER_DIR, load_helper_module
+
+TH3D_CONFIG = HELPER_DIR / 'example-th3d-ender5plus-config.h'
+
+
+def conditional_fields(config_path: Path):
+    """(define name, pass 2 field data) for every conditional define in a header"""
+    conditionals = load_helper_module('analyze-conditionals.py')
+    analyzer = conditionals.ConditionalAnalyzer(config_path)
+    analyzer.analyze()
+    data = {'fields': {name: {'mapsFrom': [name]} for name in analyzer.conditional_map}}
+    conditionals.apply_conditional_info(data, analyzer)
+    return data['fields']
+
+
+def test_conditional_on_all_covers_every_definition():
+    # TEMP_SENSOR_0 is set under NONE(..., TH3D_HOTEND_THERMISTOR, ...) and, in
+    # the #else, under ENABLED(TH3D_HOTEND_THERMISTOR) - so neither is required
+    fields = conditional_fields(TH3D_CONFIG)
+    assert 'TH3D_HOTEND_THERMISTOR' in fields['TEMP_SENSOR_0']['conditionalOnNot']
+    assert fields['TEMP_SENSOR_0']['conditionalOnAll'] == []
+
+
+def test_conditional_on_all_never_contradicts_conditional_on_not():
+    for name, field in conditional_fields(TH3D_CONFIG).items():
+        assert not set(field['conditionalOnAll']) & set(field['conditionalOnNot']), name
+
+
+def test_effective_config_counts_unevaluable_conditions():
+    mappings = load_helper_module('create-comprehensive-mappings.py')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = Path(temp_dir) / 'Configuration.h'
+        config_path.write_text('#if (1 << -1)\n#define A 1\n#else\n#define B 2\n#endif\n'
+                               '#if 10 << 100000000\n#define C 3\n#elif 1 >> -1\n#define D 4\n'
+                               '#else\n#define E 5\n#endif\n', encoding='utf-8')
+        resolver = mappings.EffectiveConfigResolver()
+        resolver.resolve([config_path])
+    assert list(resolver.defines) == ['B', 'E']
+    assert resolver.unparsed_conditions == 3
+
+
+def test_effective_config_keeps_source_literals():
+    mappings = load_helper_module('create-comprehensive-mappings.py')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = Path(temp_dir) / 'Configuration.h'
+        config_path.write_text('#define CONFIGURATION_H_VERSION 02010201\n#define BAUDRATE 250000\n'
+                               '#define FLAG\n#define STEPS 0x10\n#define DOUBLE_STEPS (STEPS * 2)\n',
+                               encoding='utf-8')
+        resolver = mappings.EffectiveConfigResolver()
+        resolver.resolve([config_path])
+    defines = resolver.to_json('marlin', 'test')['defines']
+    assert defines['CONFIGURATION_H_VERSION']['rawValue'] == '02010201'
+    assert defines['STEPS']['rawValue'] == '0x10'
+    assert (defines['DOUBLE_STEPS']['value'], defines['DOUBLE_STEPS']['rawValue']) == (32, '(STEPS * 2)')
+    assert 'rawValue' not in defines['BAUDRATE'] and 'rawValue' not in defines['FLAG']
+
+
+if __name__ == '__main__':
+    for test_name, test in list(globals().items()):
+        if test_name.startswith('test_'):
+            test()
+            print(f"✅ {test_name}")
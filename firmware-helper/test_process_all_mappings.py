@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the subprocess pipeline of process-all-mappings.py
+
+Usage:
+    python -m pytest firmware-helper/test_process_all_mappings.py
+    python firmware-helper/test_process_all_mappings.py
+"""
+
+import io
+import os
+import json
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from mapping_annotation import HELPER_DIR, load_helper_module
+
+CONFIG = HELPER_DIR / 'example-ender5plus-config.h'
+
+
+def run_subprocess_pipeline(output_dir: Path) -> str:
+    """process_config_file from the repo root (the pass scripts are run by relative path)"""
+    pipeline = load_helper_module('process-all-mappings.py')
+    output = io.StringIO()
+    cwd = os.getcwd()
+    os.chdir(HELPER_DIR.parent)
+    try:
+        with redirect_stdout(output):
+            assert pipeline.process_config_file(CONFIG, 'marlin', 'test', output_dir, output_dir, capture=True)
+    finally:
+        os.chdir(cwd)
+    return output.getvalue()
+
+
+def test_second_scan_skips_unchanged_config():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_dir = Path(temp_dir)
+        first = run_subprocess_pipeline(output_dir)
+        assert 'Not marking' not in first
+        second = run_subprocess_pipeline(output_dir)
+        assert 'Unchanged since last build, skipping all passes' in second
+
+        # Passes 2 and 3 annotated the full/ and core/ files of this config
+        version_dir = output_dir / 'marlin' / 'test'
+        for mapping_file in [version_dir / 'full' / 'marlin-config-mapping-full.json',
+                             version_dir / 'core' / 'marlin-config-mapping-core.json']:
+            data = json.loads(mapping_file.read_text(encoding='utf-8'))
+            fields = [field for category in data.values() if isinstance(category, dict)
+                      for field in category.values() if isinstance(field, dict)]
+            assert fields and all('isConditional' in field for field in fields), mapping_file.name
+
+
+if __name__ == '__main__':
+    for test_name, test in list(globals().items()):
+        if test_name.startswith('test_'):
+            test()
+            print(f"✅ {test_name}")
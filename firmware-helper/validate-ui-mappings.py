@@ -1,42 +1,71 @@
 #!/usr/bin/env python3
 """
 Validate UI field mappings between core mapping files and tab JavaScript files.
-Checks that all uiFieldId values in mappings correspond to actual input IDs in tabs.
+Checks that all uiFieldId values in mappings correspond to actual input IDs in tabs,
+for every firmware/version core folder under the maps directory.
+
+Tab input IDs come from tab_inputs.py (cached per tab file); uiFieldIds come
+from the define index, or from the core mapping JSON when there is none.
 
 Usage:
     python validate-ui-mappings.py
+    python validate-ui-mappings.py --firmware th3d --version "TH3D UFW 2.97a"
+
+    # Revalidate only the changed tab / core file on every save
+    python validate-ui-mappings.py --watch --quiet
 """
 
-import json
 import re
+import sys
+import json
+import argparse
 from pathlib import Path
 from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from define_index import DefineIndex
+from file_watch import DEFAULT_INTERVAL, FileWatcher
+from tab_inputs import TABS_DIR, TabInputCache, load_tab_inputs, tab_files, tab_number
 
 # Paths
-MAPPING_DIR = Path('assets/data/maps/th3d/TH3D UFW 2.97a/core')
-TABS_DIR = Path('assets/js/enhanced-profiles/tabs')
+MAPS_DIR = Path('assets/data/maps')
+
+UI_FIELD_TAB_RE = re.compile(r'tab(\d+)_')
+
+def find_core_dirs(maps_dir: Path, firmware: Optional[str] = None,
+                   version: Optional[str] = None) -> List[Tuple[str, str, Path]]:
+    """(firmware, version, core dir) for every generated version"""
+    core_dirs = []
+    for core_dir in sorted(maps_dir.glob('*/*/core')):
+        core_firmware, core_version = core_dir.parent.parent.name, core_dir.parent.name
+        if firmware and core_firmware != firmware:
+            continue
+        if version and core_version != version:
+            continue
+        core_dirs.append((core_firmware, core_version, core_dir))
+    return core_dirs
 
-def extract_ui_fields_from_mappings():
-    """Extract all uiFieldId values from core mapping files"""
+def extract_ui_fields_from_mappings(mapping_dir: Path):
+    """Extract all uiFieldId values from the core mapping files of one version"""
     ui_fields = {}  # uiFieldId -> {defineName, category, file}
-    
-    for mapping_file in MAPPING_DIR.glob('*-core.json'):
+
+    for mapping_file in sorted(mapping_dir.glob('*-core.json')):
         with open(mapping_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
-        
+
         for category, fields in data.items():
-            if category.startswith('$') or category in ['version', 'firmware', 'configFile', 
-                                                         'generatedFrom', 'totalDefines', 
+            if category.startswith('$') or category in ['version', 'firmware', 'configFile',
+                                                         'generatedFrom', 'totalDefines',
                                                          'coreDefines']:
                 continue
-            
+
             if not isinstance(fields, dict):
                 continue
-            
+
             for field_name, field_data in fields.items():
                 if not isinstance(field_data, dict):
                     continue
-                
+
                 ui_field_id = field_data.get('uiFieldId')
                 if ui_field_id:
                     define_name = field_data.get('mapsFrom', ['UNKNOWN'])[0]
@@ -46,80 +75,45 @@ def extract_ui_fields_from_mappings():
                         'fieldName': field_name,
                         'file': mapping_file.name
                     }
-    
+
     return ui_fields
 
-def extract_input_ids_from_tabs():
-    """Extract all input/select/textarea IDs from tab files"""
-    input_ids = {}  # id -> {tab, file, line}
-    
-    # Pattern to match id="..." in HTML strings
-    id_pattern = re.compile(r'id=["\']([^"\']+)["\']')
-    
-    for tab_file in TABS_DIR.glob('tab-*.js'):
-        # Extract tab number from filename
-        tab_match = re.search(r'tab-(\d+)', tab_file.name)
-        if not tab_match:
-            continue
-        tab_num = int(tab_match.group(1))
-        
-        with open(tab_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        for line_num, line in enumerate(lines, 1):
-            # Find all id attributes
-            for match in id_pattern.finditer(line):
-                input_id = match.group(1)
-                # Skip non-field IDs (buttons, containers, etc.)
-                if input_id.startswith('tab') and '_' in input_id:
-                    input_ids[input_id] = {
-                        'tab': tab_num,
-                        'file': tab_file.name,
-                        'line': line_num
-                    }
-    
-    return input_ids
+def load_version_ui_fields(index: Optional[DefineIndex], firmware: str, version: str,
+                           core_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """uiFieldIds of one version (via the define index when it covers the version)"""
+    if index is not None:
+        ui_fields = index.ui_fields(firmware, version)
+        if ui_fields:
+            return ui_fields
+    return extract_ui_fields_from_mappings(core_dir)
 
-def validate_mappings():
-    """Validate that all uiFieldId values have corresponding inputs in tabs"""
-    print('🔍 Validating UI Field Mappings...\n')
-    
-    # Extract data
-    print('📂 Loading mapping files...')
-    ui_fields = extract_ui_fields_from_mappings()
-    print(f'   Found {len(ui_fields)} fields with uiFieldId')
-    
-    print('📂 Scanning tab files for input IDs...')
-    input_ids = extract_input_ids_from_tabs()
-    print(f'   Found {len(input_ids)} input fields in tabs\n')
-    
-    # Validate
+def validate_mappings(ui_fields: Dict[str, Dict[str, Any]], input_ids: Dict[str, Dict[str, Any]],
+                      tabs: Optional[Set[int]] = None, quiet: bool = False) -> Dict[str, list]:
+    """Validate that all uiFieldId values have corresponding inputs in tabs (optionally only some tabs)"""
     errors = []
     warnings = []
     success = []
-    
+
     # Group by tab
     by_tab = defaultdict(list)
     for ui_field_id, field_info in ui_fields.items():
         # Extract tab number from uiFieldId (format: tab{N}_fieldName)
-        tab_match = re.match(r'tab(\d+)_', ui_field_id)
+        tab_match = UI_FIELD_TAB_RE.match(ui_field_id)
         if tab_match:
             tab_num = int(tab_match.group(1))
-            by_tab[tab_num].append((ui_field_id, field_info))
-    
-    print('='*70)
-    print('VALIDATION RESULTS')
-    print('='*70)
-    
+            if tabs is None or tab_num in tabs:
+                by_tab[tab_num].append((ui_field_id, field_info))
+
     for tab_num in sorted(by_tab.keys()):
         fields = by_tab[tab_num]
-        print(f'\n📋 Tab {tab_num}: {len(fields)} mapped fields')
-        print('-'*70)
-        
+        if not quiet:
+            print(f'\n📋 Tab {tab_num}: {len(fields)} mapped fields')
+            print('-'*70)
+
         tab_errors = 0
         tab_success = 0
-        
-        for ui_field_id, field_info in sorted(fields):
+
+        for ui_field_id, field_info in sorted(fields, key=lambda item: item[0]):
             if ui_field_id in input_ids:
                 # Success
                 input_info = input_ids[ui_field_id]
@@ -131,48 +125,53 @@ def validate_mappings():
                 else:
                     success.append(ui_field_id)
                     tab_success += 1
-                    print(f'  ✅ {ui_field_id} → {field_info["defineName"]}')
+                    if not quiet:
+                        print(f'  ✅ {ui_field_id} → {field_info["defineName"]}')
             else:
                 # Error: field not found
                 error = f"  ❌ {ui_field_id}: Not found in tab-{tab_num}-*.js (maps {field_info['defineName']})"
                 errors.append(error)
                 print(error)
                 tab_errors += 1
-        
-        print(f'\n  Summary: {tab_success} valid, {tab_errors} missing')
-    
-    # Check for unmapped inputs
+
+        if not quiet:
+            print(f'\n  Summary: {tab_success} valid, {tab_errors} missing')
+
+    # Inputs (of the validated tabs) that no uiFieldId points at
+    unmapped = {id: info for id, info in input_ids.items()
+                if id not in ui_fields and (tabs is None or info['tab'] in tabs)}
+    return {'errors': errors, 'warnings': warnings, 'success': success, 'unmapped': unmapped}
+
+def print_unmapped(unmapped: Dict[str, Dict[str, Any]]):
     print('\n' + '='*70)
     print('UNMAPPED INPUT FIELDS')
     print('='*70)
-    
-    mapped_ids = set(ui_fields.keys())
-    unmapped = {id: info for id, info in input_ids.items() if id not in mapped_ids}
-    
+
     if unmapped:
         by_tab_unmapped = defaultdict(list)
         for input_id, info in unmapped.items():
             by_tab_unmapped[info['tab']].append((input_id, info))
-        
+
         for tab_num in sorted(by_tab_unmapped.keys()):
             print(f'\n📋 Tab {tab_num}: {len(by_tab_unmapped[tab_num])} unmapped inputs')
-            for input_id, info in sorted(by_tab_unmapped[tab_num]):
+            for input_id, info in sorted(by_tab_unmapped[tab_num], key=lambda item: item[0]):
                 print(f'  💡 {input_id} (no mapping defined)')
     else:
         print('\n✅ All input fields have mappings!')
-    
-    # Final summary
+
+def print_summary(label: str, ui_fields: Dict, input_ids: Dict, results: Dict[str, list]):
+    errors, warnings = results['errors'], results['warnings']
     print('\n' + '='*70)
-    print('SUMMARY')
+    print(f'SUMMARY - {label}')
     print('='*70)
     print(f'Total mapped fields:     {len(ui_fields)}')
     print(f'Total input fields:      {len(input_ids)}')
-    print(f'✅ Valid mappings:       {len(success)}')
+    print(f'✅ Valid mappings:       {len(results["success"])}')
     print(f'⚠️  Warnings (wrong tab): {len(warnings)}')
     print(f'❌ Errors (missing):     {len(errors)}')
-    print(f'💡 Unmapped inputs:      {len(unmapped)}')
+    print(f'💡 Unmapped inputs:      {len(results["unmapped"])}')
     print('='*70)
-    
+
     if errors:
         print('\n❌ VALIDATION FAILED')
         print('\nMissing field details:')
@@ -180,13 +179,114 @@ def validate_mappings():
             print(error)
         if len(errors) > 10:
             print(f'   ... and {len(errors) - 10} more')
-        return 1
     elif warnings:
         print('\n⚠️  VALIDATION PASSED WITH WARNINGS')
-        return 0
     else:
         print('\n✅ VALIDATION PASSED - All mappings are correct!')
+
+def validate_version(label: str, ui_fields: Dict, input_ids: Dict, tabs: Optional[Set[int]] = None,
+                     quiet: bool = False) -> bool:
+    """Validate and report one firmware/version; returns False if a uiFieldId has no input"""
+    if tabs is not None:
+        label = f'{label} (tab {", ".join(map(str, sorted(tabs)))})'
+    print('\n' + '='*70)
+    print(f'VALIDATION RESULTS - {label}')
+    print('='*70)
+    results = validate_mappings(ui_fields, input_ids, tabs, quiet)
+    if not quiet:
+        print_unmapped(results['unmapped'])
+    print_summary(label, ui_fields, input_ids, results)
+    return not results['errors']
+
+def changed_tabs(old_inputs: Dict[str, Dict[str, Any]], new_inputs: Dict[str, Dict[str, Any]],
+                 changed_files: List[Path]) -> Set[int]:
+    """Tabs whose validation can change: edited tab files plus tabs of input IDs that moved or vanished"""
+    tabs = {tab_number(path) for path in changed_files}
+    for input_id in old_inputs.keys() | new_inputs.keys():
+        if old_inputs.get(input_id) != new_inputs.get(input_id):
+            tab_match = UI_FIELD_TAB_RE.match(input_id)
+            if tab_match:
+                tabs.add(int(tab_match.group(1)))
+    return tabs
+
+def watch(core_dirs: List[Tuple[str, str, Path]], ui_by_version: Dict[Tuple[str, str], Dict],
+          input_ids: Dict, tabs_dir: Path, cache: TabInputCache, quiet: bool, interval: float):
+    """Revalidate on every save: a tab file → that tab in every version, a core file → that version"""
+    version_dirs = {core_dir: (firmware, version) for firmware, version, core_dir in core_dirs}
+    watcher = FileWatcher(lambda: tab_files(tabs_dir) +
+                          [path for core_dir in version_dirs for path in sorted(core_dir.glob('*-core.json'))])
+    print(f'\n👀 Watching {tabs_dir}/ and {len(version_dirs)} core folder(s) ({watcher.mode}) - Ctrl+C to stop')
+
+    try:
+        while True:
+            changed = watcher.wait(interval)
+            tab_changes = [path for path in changed if path.suffix == '.js']
+            core_changes = {version_dirs[path.parent] for path in changed if path.parent in version_dirs}
+            print(f'\n🔄 Changed: {", ".join(path.name for path in changed)}')
+
+            if tab_changes:
+                cache.forget_missing()
+                new_inputs = load_tab_inputs(tabs_dir, cache)
+                tabs = changed_tabs(input_ids, new_inputs, tab_changes)
+                input_ids = new_inputs
+                for key in sorted(ui_by_version.keys() - core_changes):
+                    validate_version('/'.join(key), ui_by_version[key], input_ids, tabs, quiet)
+
+            for key in sorted(core_changes):
+                # Hand-edited core files aren't in the define index yet - read the JSON
+                core_dir = next(path for path, version_key in version_dirs.items() if version_key == key)
+                ui_by_version[key] = extract_ui_fields_from_mappings(core_dir)
+                validate_version('/'.join(key), ui_by_version[key], input_ids, quiet=quiet)
+    except KeyboardInterrupt:
+        watcher.close()
+        print('\n👋 Stopped watching')
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate uiFieldId values against the input IDs of the profile tabs')
+    parser.add_argument('--maps-dir', type=Path, default=MAPS_DIR,
+                        help=f'Mapping tree with {{firmware}}/{{version}}/core/ folders (default: {MAPS_DIR})')
+    parser.add_argument('--tabs-dir', type=Path, default=TABS_DIR,
+                        help=f'Folder with the tab-{{N}}-*.js scripts (default: {TABS_DIR})')
+    parser.add_argument('--firmware', help='Only validate this firmware (marlin/th3d)')
+    parser.add_argument('--version', help='Only validate this firmware version')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                        help='Only print problems and summaries')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and revalidate whenever a tab or core file changes')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help=f'Polling interval for --watch in seconds (default: {DEFAULT_INTERVAL}; '
+                             f'with watchdog installed, saves are picked up immediately)')
+    args = parser.parse_args()
+
+    print('🔍 Validating UI Field Mappings...\n')
+
+    core_dirs = find_core_dirs(args.maps_dir, args.firmware, args.version)
+    if not core_dirs:
+        print(f'❌ No core mapping folders found in {args.maps_dir}/')
+        return 1
+
+    # Extract data
+    print('📂 Loading mapping files...')
+    index = DefineIndex.load_if_exists(args.maps_dir)
+    ui_by_version = {}
+    for firmware, version, core_dir in core_dirs:
+        ui_by_version[(firmware, version)] = load_version_ui_fields(index, firmware, version, core_dir)
+        print(f'   {firmware}/{version}: {len(ui_by_version[(firmware, version)])} fields with uiFieldId')
+
+    print('📂 Scanning tab files for input IDs...')
+    cache = TabInputCache()
+    input_ids = load_tab_inputs(args.tabs_dir, cache)
+    print(f'   Found {len(input_ids)} input fields in tabs'
+          f' ({cache.scanned} tab file(s) scanned, others from cache)')
+
+    ok = True
+    for key, ui_fields in ui_by_version.items():
+        ok = validate_version('/'.join(key), ui_fields, input_ids, quiet=args.quiet) and ok
+
+    if args.watch:
+        watch(core_dirs, ui_by_version, input_ids, args.tabs_dir, cache, args.quiet, args.interval)
         return 0
+    return 0 if ok else 1
 
 if __name__ == '__main__':
-    exit(validate_mappings())
+    sys.exit(main())
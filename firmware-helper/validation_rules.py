@@ -0,0 +1,203 @@
+"""
+Validation Rules - rule engine for trailing-comment validation hints
+Turns a config comment such as "// Max feedrate (mm/s) 1-500" into
+{'unit': 'mm/s', 'min': 1, 'max': 500, 'description': 'Max feedrate'}.
+
+Used by analyze-validation.py (ValidationAnalyzer).
+
+Rules are a declarative, ordered table (VALIDATION_RULES). Each rule has a
+cheap trigger - a necessary condition for its pattern to match - and all
+triggers are compiled into one alternation, so a comment is scanned once to
+find the rules that can fire; only those run their own precompiled pattern.
+Results are memoized per comment text (the same comments repeat across every
+version of a header) and every rule counts its hits.
+
+Custom extractors plug in with ValidationRuleEngine.add_rule().
+"""
+
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+Extractor = Callable[[re.Match, Dict[str, Any]], bool]
+
+
+class ValidationRule(NamedTuple):
+    """One entry of the rule table"""
+    name: str
+    trigger: str  # regex that must occur for pattern to match (matched case-insensitively)
+    pattern: re.Pattern
+    extract: Extractor  # fills the result from the first match; returns True if it fired
+    strip: Optional[re.Pattern] = None  # text removed from the description
+    unless: Optional[str] = None  # skip when this (earlier) rule fired
+
+
+def _number(text: str):
+    return float(text) if '.' in text else int(text)
+
+
+# ---------------------------------------------------------------------------
+# Built-in extractors
+# ---------------------------------------------------------------------------
+
+ALLOWED_ITEM_RE = re.compile(r"'([^']*)'|\"([^\"]*)\"|(-?\d+\.?\d*)")
+
+# (mm), (°C), (mm/s²), (µs), (16bit), (%), (steps/mm)
+UNIT_RE = re.compile(r'^(?:[a-zA-Z°µ]+(/[a-zA-Z]+)?[²³]?|\d+\s*[a-zA-Z]+|%|steps/mm)$')
+
+
+def extract_allowed_values(match: re.Match, result: Dict[str, Any]) -> bool:
+    """:['A', 'B', 'C'] or :[0, 1, 2, 3]"""
+    values = []
+    for item in ALLOWED_ITEM_RE.finditer(match.group(1)):
+        if item.group(1):  # Single quote
+            values.append(item.group(1))
+        elif item.group(2):  # Double quote
+            values.append(item.group(2))
+        elif item.group(3):  # Number
+            values.append(_number(item.group(3)))
+    if values:
+        result['allowedValues'] = values
+        return True
+    return False
+
+
+def extract_unit(match: re.Match, result: Dict[str, Any]) -> bool:
+    """First parenthesized text, if it looks like a unit"""
+    unit = match.group(1)
+    if UNIT_RE.match(unit):
+        result['unit'] = unit
+        return True
+    return False
+
+
+def extract_range(match: re.Match, result: Dict[str, Any]) -> bool:
+    """0-255, 1.0-10.0, -100 to 100 (floats if either end has a decimal point)"""
+    low, high = match.group(1), match.group(2)
+    if '.' in low or '.' in high:
+        result['min'], result['max'] = float(low), float(high)
+    else:
+        result['min'], result['max'] = int(low), int(high)
+    return True
+
+
+def extract_min(match: re.Match, result: Dict[str, Any]) -> bool:
+    result['min'] = _number(match.group(1))
+    return True
+
+
+def extract_max(match: re.Match, result: Dict[str, Any]) -> bool:
+    result['max'] = _number(match.group(1))
+    return True
+
+
+def extract_deprecated(match: re.Match, result: Dict[str, Any]) -> bool:
+    result['deprecated'] = True
+    return True
+
+
+def extract_requires(match: re.Match, result: Dict[str, Any]) -> bool:
+    result['requires'] = [match.group(1)]
+    return True
+
+
+RANGE = r'(-?\d+\.?\d*)\s*[-–to]+\s*(-?\d+\.?\d*)'
+DEPRECATED = r'\b(deprecated|obsolete|legacy)\b'
+
+# Order matters: description text is stripped in this order, and 'unless'
+# refers to an earlier rule
+VALIDATION_RULES: List[ValidationRule] = [
+    ValidationRule('allowedValues', r':\s*\[', re.compile(r':\s*\[([^\]]+)\]'), extract_allowed_values,
+                   strip=re.compile(r':\s*\[[^\]]+\]')),
+    ValidationRule('unit', r'\(', re.compile(r'\(([^)]+)\)'), extract_unit,
+                   strip=re.compile(r'\([^)]+\)')),
+    ValidationRule('range', r'\d', re.compile(RANGE), extract_range,
+                   strip=re.compile(r'-?\d+\.?\d*\s*[-–to]+\s*-?\d+\.?\d*')),
+    ValidationRule('min', r'\d', re.compile(r'(?:minimum|min|at least|>=?)\s+(-?\d+\.?\d*)', re.IGNORECASE),
+                   extract_min, unless='range'),
+    ValidationRule('max', r'\d', re.compile(r'(?:maximum|max|up to|<=?)\s+(-?\d+\.?\d*)', re.IGNORECASE),
+                   extract_max, unless='range'),
+    ValidationRule('deprecated', DEPRECATED, re.compile(DEPRECATED, re.IGNORECASE), extract_deprecated,
+                   strip=re.compile(DEPRECATED, re.IGNORECASE)),
+    # Lookahead keeps the trigger from consuming text other triggers need
+    ValidationRule('requires', r'(?:requires?|needs?)(?=\s+\w)',
+                   re.compile(r'(?:requires?|needs?)\s+(\w+)', re.IGNORECASE), extract_requires),
+]
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+class ValidationRuleEngine:
+    """Applies the rule table to comments, with one trigger scan per comment and a result cache"""
+
+    def __init__(self, rules: Optional[List[ValidationRule]] = None, min_description: int = 5):
+        """
+        rules: ordered rule table (default: VALIDATION_RULES)
+        min_description: descriptions this short or shorter are dropped
+        """
+        self.rules: List[ValidationRule] = list(VALIDATION_RULES if rules is None else rules)
+        self.min_description = min_description
+        self.hits: Counter = Counter()
+        self.comments = 0
+        self.cache_hits = 0
+        self._cache: Dict[str, Tuple[Optional[Dict[str, Any]], Tuple[str, ...]]] = {}
+        self._compile()
+
+    def add_rule(self, rule: ValidationRule, before: Optional[str] = None):
+        """Plug in an extractor (appended, or inserted before the named rule)"""
+        index = len(self.rules)
+        if before is not None:
+            index = next(i for i, existing in enumerate(self.rules) if existing.name == before)
+        self.rules.insert(index, rule)
+        self._compile()
+
+    def _compile(self):
+        # One group per distinct trigger; rules sharing a trigger share the group
+        self._trigger_groups: Dict[str, str] = {}
+        for rule in self.rules:
+            self._trigger_groups.setdefault(rule.trigger, f"t{len(self._trigger_groups)}")
+        self._trigger_re = re.compile('|'.join(
+            f"(?P<{group}>{trigger})" for trigger, group in self._trigger_groups.items()), re.IGNORECASE)
+        self._cache.clear()
+
+    def extract(self, comment: str) -> Optional[Dict[str, Any]]:
+        """Validation info for a comment (None if nothing was found)"""
+        self.comments += 1
+        cached = self._cache.get(comment)
+        if cached is None:
+            cached = self._extract(comment)
+            self._cache[comment] = cached
+        else:
+            self.cache_hits += 1
+        result, fired = cached
+        self.hits.update(fired)
+        return dict(result) if result else None
+
+    def _extract(self, comment: str) -> Tuple[Optional[Dict[str, Any]], Tuple[str, ...]]:
+        present = {match.lastgroup for match in self._trigger_re.finditer(comment)}
+        result: Dict[str, Any] = {}
+        fired: List[str] = []
+        description = comment
+        for rule in self.rules:
+            triggered = self._trigger_groups[rule.trigger] in present
+            if triggered and (rule.unless is None or rule.unless not in fired):
+                match = rule.pattern.search(comment)
+                if match and rule.extract(match, result):
+                    fired.append(rule.name)
+            # Once earlier strips changed the text, new matches can appear - always strip then
+            if rule.strip is not None and (triggered or description is not comment):
+                description = rule.strip.sub('', description)
+
+        description = WHITESPACE_RE.sub(' ', description.strip())
+        if description and len(description) > self.min_description:
+            result['description'] = description
+        return (result or None), tuple(fired)
+
+    def stats(self) -> List[Tuple[str, int]]:
+        """(rule name, hits) in table order"""
+        return [(rule.name, self.hits[rule.name]) for rule in self.rules]
+
+
+# Shared by every ValidationAnalyzer in a process, so the comment cache spans
+# all headers and versions of a scan / batch
+default_engine = ValidationRuleEngine()